@@ -0,0 +1,90 @@
+"""Summary tables kept in step with expenses by triggers.
+
+daily_totals holds one row per user and day, monthly_category_totals one row
+per user, month and category. Charts and the calendar read these instead of
+summing the raw expenses, so they cost O(days) or O(months) rather than
+O(expenses). Totals are whole paise, so adding and removing expenses leaves
+no rounding error behind. Triggers created by db_migrations keep them
+current; rebuild() recomputes them from scratch if they ever drift.
+"""
+import argparse
+import sqlite3
+
+import storage
+
+def rebuild(connection, username=None):
+    """Recompute the summary tables from expenses, for one user or everyone"""
+    where = "WHERE username = ?" if username is not None else ""
+    user = f"AND e.user_id = {storage.USER_ID}" if username is not None else ""
+    params = (username,) if username is not None else ()
+
+    connection.execute(f"DELETE FROM daily_totals {where}", params)
+    connection.execute(f"DELETE FROM monthly_category_totals {where}", params)
+    connection.execute(f"""
+        INSERT INTO daily_totals (username, date, total_paise, count)
+        SELECT u.username, COALESCE({storage.date_sql('e.day')}, ''), SUM(e.amount_paise), COUNT(*)
+        FROM expenses e
+        JOIN users u ON u.id = e.user_id
+        WHERE e.amount_paise IS NOT NULL {user}
+        GROUP BY e.user_id, e.day
+    """, params)
+    # Days are summed first, so the month is worked out per day rather than per row
+    connection.execute(f"""
+        INSERT INTO monthly_category_totals (username, month, category, total_paise, count)
+        SELECT u.username, COALESCE(substr({storage.date_sql('d.day')}, 1, 7), '') AS month,
+               COALESCE(c.name, ''), SUM(d.total_paise), SUM(d.count)
+        FROM (
+            SELECT e.user_id, e.category_id, e.day, SUM(e.amount_paise) AS total_paise, COUNT(*) AS count
+            FROM expenses e
+            WHERE e.amount_paise IS NOT NULL {user}
+            GROUP BY e.user_id, e.category_id, e.day
+        ) d
+        JOIN users u ON u.id = d.user_id
+        LEFT JOIN categories c ON c.id = d.category_id
+        GROUP BY d.user_id, d.category_id, month
+    """, params)
+
+def category_totals(connection, username):
+    """Return [(category, total)] over the user's whole history"""
+    return connection.execute("""
+        SELECT category, SUM(total_paise) / 100.0 as total
+        FROM monthly_category_totals
+        WHERE username = ?
+        GROUP BY category
+    """, (username,)).fetchall()
+
+def monthly_totals(connection, username):
+    """Return [(YYYY-MM, total)] in month order"""
+    return connection.execute("""
+        SELECT month, SUM(total_paise) / 100.0 as total
+        FROM monthly_category_totals
+        WHERE username = ?
+        GROUP BY month
+        ORDER BY month
+    """, (username,)).fetchall()
+
+def daily_totals(connection, username, start_date, end_date):
+    """Return {YYYY-MM-DD: total} for start_date <= date < end_date"""
+    rows = connection.execute("""
+        SELECT date, total_paise / 100.0
+        FROM daily_totals
+        WHERE username = ? AND date >= ? AND date < ?
+    """, (username, start_date, end_date)).fetchall()
+    return {date: total for date, total in rows}
+
+if __name__ == "__main__":
+    from db_config import DB_PATH, ensure_database
+
+    parser = argparse.ArgumentParser(description="Rebuild the expense summary tables")
+    parser.add_argument('--user', help="only rebuild this user's totals")
+    parser.add_argument('--db', default=DB_PATH, help="database file")
+    args = parser.parse_args()
+
+    ensure_database(args.db)
+    connection = sqlite3.connect(args.db)
+    try:
+        with connection:
+            rebuild(connection, args.user)
+        print("Summary tables rebuilt")
+    finally:
+        connection.close()
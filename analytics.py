@@ -0,0 +1,289 @@
+"""Vectorised spending analytics over a user's whole history.
+
+A user's expenses are loaded once into parallel NumPy arrays (day number,
+amount, category code) and kept in an ExpenseArrayCache until the user's
+expense change counter moves on. Every statistic below is computed
+with array operations over those arrays, so recommendations cover all of
+the data rather than the last few rows.
+"""
+import threading
+
+import numpy as np
+
+import storage
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+# Stand-in day number for rows without a date
+_NO_DATE = np.iinfo(np.int32).min
+
+
+class ExpenseArrays:
+    """One user's expenses as parallel arrays sorted by date"""
+
+    def __init__(self, days, amounts, codes, categories, sorted_amounts, counts, fingerprint=None):
+        self.days = days              # int32 days since 1970-01-01
+        self.amounts = amounts        # float64
+        self.codes = codes            # int16 index into categories
+        self.categories = categories
+        # Amounts grouped by category code and sorted within each group,
+        # with each group's size and offset
+        self.sorted_amounts = sorted_amounts
+        self.counts = counts
+        self.starts = np.cumsum(counts) - counts
+        self.fingerprint = fingerprint
+        self._months = None
+
+    def __len__(self):
+        return len(self.amounts)
+
+    @property
+    def months(self):
+        """int32 months since 1970-01, computed on first use"""
+        if self._months is None:
+            self._months = (EPOCH + self.days).astype('datetime64[M]').astype(np.int32)
+        return self._months
+
+
+def fingerprint(connection, username):
+    """The user's expense change counter, bumped by triggers on every write
+
+    Totals alone are not enough: moving an expense to another date or
+    category leaves the user's count and sum unchanged.
+    """
+    row = connection.execute("""
+        SELECT v.version
+        FROM expense_versions v
+        JOIN users u ON u.id = v.user_id
+        WHERE u.username = ?
+    """, (username,)).fetchone()
+    return row[0] if row else 0
+
+def load(connection, username):
+    """Read all of a user's expenses into ExpenseArrays
+
+    One query per category walks the (user_id, category_id, day,
+    amount_paise) index, so category codes need no per-row work in Python.
+    """
+    # Read before the rows, so a write during the load makes the arrays look stale
+    version = fingerprint(connection, username)
+    user_id = storage.user_id(connection, username)
+    # The summary tables store a missing category as '', which has no id
+    buckets = connection.execute("""
+        SELECT t.category, c.id, SUM(t.count)
+        FROM monthly_category_totals t
+        LEFT JOIN categories c ON c.name = t.category
+        WHERE t.username = ?
+        GROUP BY t.category
+        ORDER BY t.category
+    """, (username,)).fetchall()
+    row_type = np.dtype([('day', np.int32), ('amount', np.float64)])
+    categories, parts, codes, sorted_parts = [], [], [], []
+    for code, (category, category_id, count) in enumerate(buckets):
+        cursor = connection.execute(f"""
+            SELECT COALESCE(day, {_NO_DATE}), amount_paise / 100.0
+            FROM expenses
+            WHERE user_id = ? AND category_id IS ? AND amount_paise IS NOT NULL
+        """, (user_id, category_id))
+        rows = np.fromiter(cursor, dtype=row_type)
+        rows = rows[rows['day'] != _NO_DATE]
+        categories.append(category or 'Uncategorized')
+        sorted_parts.append(np.sort(rows['amount']))
+        parts.append(rows)
+        codes.append(np.full(len(rows), code, dtype=np.int16))
+
+    if parts:
+        rows = np.concatenate(parts)
+        code_array = np.concatenate(codes)
+        sorted_amounts = np.concatenate(sorted_parts)
+    else:
+        rows = np.empty(0, dtype=row_type)
+        code_array = np.empty(0, dtype=np.int16)
+        sorted_amounts = np.empty(0)
+    order = np.argsort(rows['day'], kind='stable')
+    return ExpenseArrays(
+        np.ascontiguousarray(rows['day'][order]),
+        np.ascontiguousarray(rows['amount'][order]),
+        code_array[order],
+        categories,
+        sorted_amounts,
+        np.array([len(part) for part in sorted_parts], dtype=np.int64),
+        version
+    )
+
+
+class ExpenseArrayCache:
+    """Loaded ExpenseArrays per user, reloaded when the user's data changes"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, connection, username):
+        """Return current arrays for the user, loading them if needed"""
+        current = fingerprint(connection, username)
+        with self._lock:
+            arrays = self._entries.get(username)
+        if arrays is not None and arrays.fingerprint == current:
+            return arrays
+        arrays = load(connection, username)
+        with self._lock:
+            self._entries[username] = arrays
+        return arrays
+
+    def invalidate(self, username):
+        """Forget a user's arrays"""
+        with self._lock:
+            self._entries.pop(username, None)
+
+
+def rolling_mean(values, window):
+    """Mean of each run of window consecutive values (len(values) - window + 1 of them)"""
+    if len(values) < window:
+        return np.empty(0)
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    return (sums[window:] - sums[:-window]) / window
+
+def daily_totals(arrays):
+    """(first day number, spend per day) with zero-filled gaps"""
+    if not len(arrays):
+        return 0, np.empty(0)
+    first = int(arrays.days[0])
+    return first, np.bincount(arrays.days - first, weights=arrays.amounts)
+
+def category_matrix(arrays):
+    """(first month number, categories x months array of totals)"""
+    if not len(arrays):
+        return 0, np.zeros((len(arrays.categories), 0))
+    months = arrays.months
+    first = int(months[0])
+    span = int(months[-1]) - first + 1
+    cells = arrays.codes.astype(np.int64) * span + (months - first)
+    totals = np.bincount(cells, weights=arrays.amounts, minlength=len(arrays.categories) * span)
+    return first, totals.reshape(len(arrays.categories), span)
+
+def month_over_month(arrays):
+    """Per category: (this month's total, last month's total, change)
+
+    Months are the latest month with any spending and the one before it.
+    """
+    _, matrix = category_matrix(arrays)
+    if matrix.shape[1] == 0:
+        return np.zeros((len(arrays.categories), 3))
+    current = matrix[:, -1]
+    previous = matrix[:, -2] if matrix.shape[1] > 1 else np.zeros_like(current)
+    return np.column_stack((current, previous, current - previous))
+
+def _per_category_sum(arrays, values):
+    """Sum values (aligned with sorted_amounts) over each category's run"""
+    sums = np.zeros(len(arrays.categories))
+    present = arrays.counts > 0
+    if present.any():
+        sums[present] = np.add.reduceat(values, arrays.starts[present])
+    return sums
+
+def category_stats(arrays):
+    """(counts, totals, means, standard deviations) per category code"""
+    counts = arrays.counts
+    totals = _per_category_sum(arrays, arrays.sorted_amounts)
+    squares = _per_category_sum(arrays, arrays.sorted_amounts ** 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, totals / counts, 0.0)
+        variances = np.where(counts > 0, squares / counts - means ** 2, 0.0)
+    return counts, totals, means, np.sqrt(np.maximum(variances, 0.0))
+
+def category_percentiles(arrays, percentiles=(50, 90)):
+    """categories x percentiles array of amounts, by linear interpolation"""
+    size = len(arrays.categories)
+    counts, starts = arrays.counts, arrays.starts
+    ordered = arrays.sorted_amounts
+    result = np.zeros((size, len(percentiles)))
+    present = counts > 0
+    for column, percentile in enumerate(percentiles):
+        position = starts[present] + (counts[present] - 1) * (percentile / 100.0)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        result[present, column] = ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+    return result
+
+def outliers(arrays, threshold=3.0, stats=None):
+    """(indexes, z-scores) of expenses more than threshold standard deviations above their category's mean"""
+    _, _, means, deviations = stats or category_stats(arrays)
+    # Compare against one cut-off per category instead of scoring every row
+    cutoffs = np.where(deviations > 0, means + threshold * deviations, np.inf)
+    flagged = np.nonzero(arrays.amounts > cutoffs[arrays.codes])[0]
+    codes = arrays.codes[flagged]
+    scores = (arrays.amounts[flagged] - means[codes]) / deviations[codes]
+    return flagged, scores
+
+def recommendations(arrays, monthly_income=0.0, window=30, outlier_limit=5):
+    """Everything the recommendations tab shows, as plain Python values"""
+    if not len(arrays):
+        return {'count': 0}
+
+    stats = category_stats(arrays)
+    counts, totals, _, _ = stats
+    total = float(totals.sum())
+    percentiles = category_percentiles(arrays, (50, 90))
+    categories = sorted(
+        (
+            {
+                'category': arrays.categories[code],
+                'count': int(counts[code]),
+                'total': float(totals[code]),
+                'share': float(totals[code] / total) if total else 0.0,
+                'median': float(percentiles[code, 0]),
+                'p90': float(percentiles[code, 1]),
+            }
+            for code in range(len(arrays.categories)) if counts[code]
+        ),
+        key=lambda row: -row['total']
+    )
+
+    first_day, per_day = daily_totals(arrays)
+    recent = rolling_mean(per_day, min(window, len(per_day)))
+
+    flagged, scores = outliers(arrays, stats=stats)
+    # The most recent unusual expenses, newest first
+    unusual = [
+        {
+            'date': str(EPOCH + int(arrays.days[index])),
+            'category': arrays.categories[arrays.codes[index]],
+            'amount': float(arrays.amounts[index]),
+            'z': float(score),
+        }
+        for index, score in zip(flagged[::-1][:outlier_limit], scores[::-1][:outlier_limit])
+    ]
+
+    first_month, matrix = category_matrix(arrays)
+    changes = month_over_month(arrays)
+    latest_month = str(np.datetime64(first_month + matrix.shape[1] - 1, 'M'))
+    monthly = matrix.sum(axis=0)
+
+    return {
+        'count': len(arrays),
+        'total': total,
+        'average': total / len(arrays),
+        'categories': categories,
+        'daily_average': float(per_day.mean()),
+        'recent_daily_average': float(recent[-1]) if len(recent) else 0.0,
+        'window_days': min(window, len(per_day)),
+        'monthly_average': float(monthly.mean()),
+        'monthly_trend': [float(value) for value in rolling_mean(monthly, 3)[-6:]],
+        'latest_month': latest_month,
+        'month_over_month': sorted(
+            (
+                {
+                    'category': arrays.categories[code],
+                    'current': float(changes[code, 0]),
+                    'previous': float(changes[code, 1]),
+                    'change': float(changes[code, 2]),
+                }
+                for code in range(len(arrays.categories)) if changes[code, 0] or changes[code, 1]
+            ),
+            key=lambda row: -abs(row['change'])
+        ),
+        'outliers': unusual,
+        'outlier_count': int(len(flagged)),
+        'monthly_income': float(monthly_income),
+    }
@@ -0,0 +1,125 @@
+"""Statements for every user, built in parallel worker processes.
+
+Each user gets the same PDF report as the desktop's Export to PDF and the
+same monthly trend chart as the Insights screen, written into one output
+directory with a reports.json index. Users are handed out across a
+ProcessPoolExecutor in small chunks, so a few users with long histories do
+not leave the other workers idle. Each worker opens its own read-only
+connection once; with the database in WAL mode they all read at the same
+time without blocking each other or the app. Charts are drawn with the Agg
+backend, so no display is needed.
+
+Run it with python -m expense_tracker report-all OUT_DIR [--workers N].
+"""
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import aggregates
+from pdf_report import build_report
+
+# Read settings for the workers' connections; journal_mode and synchronous
+# cannot be changed on a read-only connection and do not matter to readers
+READ_PRAGMAS = {
+    'query_only': 1,
+    'cache_size': -16384,          # KiB, so 16 MiB per worker
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Each worker's even share of the users is handed out in this many chunks
+CHUNKS_PER_WORKER = 8
+
+# Set in each worker process by _start_worker
+_connection = None
+_chart = None
+
+
+def open_readonly(db_path):
+    """A read-only connection to an existing database"""
+    connection = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+    for pragma, value in READ_PRAGMAS.items():
+        connection.execute(f"PRAGMA {pragma} = {value}")
+    return connection
+
+def file_stem(user_id, username):
+    """A file name for the user's outputs that is safe on every platform"""
+    return f"{user_id}_{re.sub(r'[^A-Za-z0-9_.-]', '_', username)}"
+
+def _start_worker(db_path):
+    """Worker initializer: Agg backend, one connection and one chart figure"""
+    global _connection, _chart
+    import matplotlib
+    matplotlib.use('Agg')
+    from chart_renderer import LineChart
+
+    _connection = open_readonly(db_path)
+    _chart = LineChart(None, "Monthly Expense Trend", "Month", "Total Expenses (₹)")
+
+def render_user(user, out_dir, filters):
+    """Write one user's PDF and trend chart; returns what was written
+
+    Runs in a worker. A failure is reported in the result instead of
+    stopping the batch.
+    """
+    user_id, username = user
+    stem = os.path.join(out_dir, file_stem(user_id, username))
+    result = {'user': username, 'pdf': None, 'chart': None}
+    started = time.perf_counter()
+    try:
+        report = build_report(_connection, f"{stem}.pdf", username, **filters)
+        result.update(pdf=f"{stem}.pdf", rows=report['rows'], pages=report['pages'])
+        data = aggregates.monthly_totals(_connection, username)
+        if data:
+            _chart.update([row[0] for row in data], [row[1] for row in data])
+            _chart.figure.savefig(f"{stem}_trend.png")
+            result['chart'] = f"{stem}_trend.png"
+    except Exception as e:
+        result['error'] = str(e)
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+def run(db_path, out_dir, users=None, workers=None, start_date=None, end_date=None,
+        category=None, progress=None):
+    """Build statements for users (default: everyone) and return the results
+
+    The database must already be migrated and in WAL mode, as any
+    connection from db_pool leaves it. progress(done, total) is called as
+    users finish.
+    """
+    workers = workers or os.cpu_count() or 1
+    filters = {'start_date': start_date, 'end_date': end_date, 'category': category}
+    os.makedirs(out_dir, exist_ok=True)
+
+    connection = open_readonly(db_path)
+    try:
+        rows = connection.execute("SELECT id, username FROM users ORDER BY id").fetchall()
+    finally:
+        connection.close()
+    if users is not None:
+        wanted = set(users)
+        rows = [row for row in rows if row[1] in wanted]
+
+    results = []
+    chunksize = max(1, len(rows) // (workers * CHUNKS_PER_WORKER))
+    # spawn, not fork: the parent may hold open SQLite connections and Tk
+    # state, and it behaves the same on Windows and in the frozen app
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+        initializer=_start_worker, initargs=(db_path,)
+    ) as executor:
+        for result in executor.map(
+            render_user, rows, [out_dir] * len(rows), [filters] * len(rows), chunksize=chunksize
+        ):
+            results.append(result)
+            if progress:
+                progress(len(results), len(rows))
+
+    with open(os.path.join(out_dir, 'reports.json'), 'w') as f:
+        json.dump(results, f, indent=2)
+    return results
@@ -0,0 +1,67 @@
+"""Time the analytics engine behind the recommendations tab.
+
+Loads one user's history into arrays (cold), then times recommendations()
+on the cached arrays. Exits with status 1 if the warm call is slower than
+--max-ms, or if the cache still returns the old arrays after an expense is
+moved to another month (same count and total, different history).
+
+Usage: python benchmarks/bench_analytics.py [--rows 1000000] [--max-ms 50]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_connections import populate
+from analytics import ExpenseArrayCache, recommendations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--max-ms', type=float, default=50.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        populate(db_path, args.rows, users=1)
+        connection = sqlite3.connect(db_path)
+        cache = ExpenseArrayCache()
+
+        started = time.perf_counter()
+        arrays = cache.get(connection, "user0")
+        load_ms = (time.perf_counter() - started) * 1000
+
+        timings = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            arrays = cache.get(connection, "user0")
+            result = recommendations(arrays, 50000)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        # Move one expense 40 days later, into another month
+        connection.execute("UPDATE expenses SET day = day + 40 WHERE id = (SELECT MIN(id) FROM expenses)")
+        connection.commit()
+        moved = cache.get(connection, "user0")
+        stale = moved is arrays or (moved.days == arrays.days).all()
+        connection.close()
+
+    warm_ms = statistics.median(timings)
+    print(f"rows: {result['count']}")
+    print(f"load into arrays (cold): {load_ms:.1f} ms")
+    print(f"recommendations (cached arrays): {warm_ms:.1f} ms (median of {args.runs})")
+    print(f"outliers flagged: {result['outlier_count']}")
+    if stale:
+        print("FAIL: cached arrays were not reloaded after an expense moved to another month")
+        sys.exit(1)
+    if warm_ms > args.max_ms:
+        print(f"FAIL: recommendations took longer than {args.max_ms:.0f} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Users per second of batch statements by number of worker processes.
+
+Builds a database with --users users, then writes statements (PDF report
+and trend chart) for a --sample of them: once serially in this process, as
+a per-user loop over the same calls would, then through batch_reports.run
+with each worker count. Speedup is against the serial loop.
+
+Usage: python benchmarks/bench_batch_reports.py [--users 10000] [--rows 500000] [--sample 400] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch_reports
+from bench_connections import populate
+from db_config import apply_profile
+
+def serial(db_path, out_dir, users):
+    """The per-user loop in one process; returns seconds"""
+    os.makedirs(out_dir)
+    batch_reports._start_worker(db_path)
+    started = time.perf_counter()
+    for user in users:
+        batch_reports.render_user(user, out_dir, {})
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--sample', type=int, default=400, help="users to write statements for")
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        print(f"Populating {args.rows} expenses for {args.users} users...")
+        populate(db_path, args.rows, users=args.users)
+        connection = apply_profile(sqlite3.connect(db_path))
+        step = max(1, args.users // args.sample)
+        users = connection.execute(
+            "SELECT id, username FROM users WHERE id % ? = 0 ORDER BY id LIMIT ?", (step, args.sample)
+        ).fetchall()
+        connection.close()
+
+        print(f"{os.cpu_count()} CPUs, statements for {len(users)} users")
+        print(f"{'workers':<8} {'seconds':>8} {'users/sec':>10} {'speedup':>8}")
+        baseline = serial(db_path, os.path.join(tmp, "serial"), users)
+        print(f"{'serial':<8} {baseline:>8.1f} {len(users) / baseline:>10.1f} {1:>8.2f}", flush=True)
+        for workers in args.workers:
+            started = time.perf_counter()
+            results = batch_reports.run(
+                db_path, os.path.join(tmp, f"workers_{workers}"),
+                users=[username for _, username in users], workers=workers
+            )
+            seconds = time.perf_counter() - started
+            assert len(results) == len(users) and not any('error' in result for result in results)
+            print(f"{workers:<8} {seconds:>8.1f} {len(users) / seconds:>10.1f} {baseline / seconds:>8.2f}",
+                  flush=True)
+
+if __name__ == "__main__":
+    main()
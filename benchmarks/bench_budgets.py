@@ -0,0 +1,87 @@
+"""Time budget-vs-actual against the expense count.
+
+For each size, compares the grouped budget_goals / monthly_category_totals
+join with summing expenses once per goal, and times the per-expense budget
+check done on every add_expense from the cached running totals.
+
+Usage: python benchmarks/bench_budgets.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+from bench_connections import CATEGORIES, populate
+from budgets import BudgetTracker, month_status
+
+# A month inside populate()'s 2020-2024 date range
+MONTH = '2022-06'
+
+def per_goal_sums(connection, username, month):
+    """The old way: one scan of the user's expenses per goal"""
+    goals = connection.execute(
+        "SELECT category, amount FROM budget_goals WHERE username = ?", (username,)
+    ).fetchall()
+    return [
+        (category, amount, connection.execute(f"""
+            SELECT COALESCE(SUM(amount_paise), 0) / 100.0 FROM expenses
+            WHERE user_id = {storage.USER_ID} AND category_id = {storage.CATEGORY_ID}
+              AND strftime('%Y-%m', day + 2440587.5) = ?
+        """, (username, category, month)).fetchone()[0])
+        for category, amount in goals
+    ]
+
+def timed(func, runs):
+    """Median milliseconds of func() over runs calls"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'per goal':>10} {'grouped':>10} {'alert check':>12}")
+    for rows in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.db")
+            populate(db_path, rows, users=1)
+            connection = sqlite3.connect(db_path)
+            connection.executemany(
+                "INSERT INTO budget_goals (username, category, amount) VALUES ('user0', ?, 50000)",
+                [(category,) for category in CATEGORIES]
+            )
+            connection.commit()
+            # Same answer both ways, up to summation order
+            old = sorted((category, budget, round(spent, 2))
+                         for category, budget, spent in per_goal_sums(connection, 'user0', MONTH))
+            new = [(category, budget, round(spent, 2))
+                   for category, budget, spent in month_status(connection, 'user0', MONTH)]
+            assert old == new, (old, new)
+
+            old_ms = timed(lambda: per_goal_sums(connection, 'user0', MONTH), args.runs)
+            new_ms = timed(lambda: month_status(connection, 'user0', MONTH), args.runs)
+
+            tracker = BudgetTracker()
+            tracker.load(connection, 'user0')
+            today = time.strftime('%Y-%m-%d')
+            started = time.perf_counter()
+            for _ in range(10000):
+                tracker.record('user0', 'Food', 1.0, today)
+            record_us = (time.perf_counter() - started) * 1e6 / 10000
+            connection.close()
+        print(f"{rows:>10} {old_ms:>8.2f}ms {new_ms:>8.3f}ms {record_us:>10.2f}us")
+
+if __name__ == "__main__":
+    main()
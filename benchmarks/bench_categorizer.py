@@ -0,0 +1,114 @@
+"""Time category suggestions against a large description history.
+
+Builds one user's history from a vocabulary of merchant words per category
+plus words shared by every category, then times building the index and
+suggest() on descriptions typed one keystroke at a time, as the add-expense
+form does. Exits with status 1 if the 99th percentile suggestion is slower
+than --max-ms.
+
+Usage: python benchmarks/bench_categorizer.py [--rows 200000] [--max-ms 1]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+from categorizer import build_index
+from db_migrations import migrate
+
+MERCHANTS = {
+    'Food': ['swiggy', 'zomato', 'dominos', 'bigbasket', 'cafe', 'bakery', 'grocery', 'restaurant'],
+    'Transport': ['uber', 'ola', 'metro', 'petrol', 'fuel', 'parking', 'rapido', 'irctc'],
+    'Entertainment': ['netflix', 'spotify', 'pvr', 'inox', 'bookmyshow', 'steam', 'hotstar', 'concert'],
+    'Utilities': ['electricity', 'broadband', 'airtel', 'jio', 'water', 'gas', 'bescom', 'recharge'],
+    'Other': ['amazon', 'flipkart', 'pharmacy', 'salon', 'gift', 'donation', 'laundry', 'stationery'],
+}
+SHARED = ['payment', 'upi', 'order', 'bill', 'online', 'monthly', 'card', 'india']
+
+def description(rng, category):
+    """A few merchant and shared words, with a reference number"""
+    words = rng.sample(MERCHANTS[category], rng.randint(1, 2))
+    words += rng.sample(SHARED, rng.randint(0, 2))
+    # Rare words a user might type, so the vocabulary grows with the history
+    if rng.random() < 0.3:
+        words.append(f"ref{rng.randrange(100000)}")
+    rng.shuffle(words)
+    return " ".join(words)
+
+def populate(db_path, rows, seed=42):
+    """One user with rows described expenses"""
+    rng = random.Random(seed)
+    connection = sqlite3.connect(db_path)
+    migrate(connection)
+    user_id = connection.execute(
+        "INSERT INTO users (username, password, income) VALUES ('user0', 'x', 0)"
+    ).lastrowid
+    categories = list(MERCHANTS)
+    category_ids = {category: storage.category_id(connection, category) for category in categories}
+    day = storage.day_number('2024-01-01')
+    connection.executemany(
+        "INSERT INTO expenses (user_id, day, category_id, amount_paise, description) VALUES (?, ?, ?, ?, ?)",
+        (
+            (user_id, day, category_ids[category], 10000, description(rng, category))
+            for category in (rng.choice(categories) for _ in range(rows))
+        )
+    )
+    connection.commit()
+    return connection
+
+def keystrokes(text):
+    """Every prefix of text, as seen while it is typed"""
+    return [text[:end] for end in range(1, len(text) + 1)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--samples', type=int, default=2000)
+    parser.add_argument('--max-ms', type=float, default=1.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        connection = populate(os.path.join(tmp, "bench.db"), args.rows)
+        started = time.perf_counter()
+        index = build_index(connection, 'user0')
+        build_ms = (time.perf_counter() - started) * 1000
+        connection.close()
+
+    rng = random.Random(7)
+    samples = [(category, description(rng, category))
+               for category in (rng.choice(list(MERCHANTS)) for _ in range(args.samples))]
+
+    timings, correct = [], 0
+    for category, text in samples:
+        for typed in keystrokes(text):
+            started = time.perf_counter()
+            suggestion, _ = index.suggest(typed, partial=True)
+            timings.append((time.perf_counter() - started) * 1000)
+        correct += suggestion == category
+
+    started = time.perf_counter()
+    for category, text in samples:
+        index.add(text, category)
+    add_us = (time.perf_counter() - started) * 1e6 / len(samples)
+
+    timings.sort()
+    p50 = timings[len(timings) // 2]
+    p99 = timings[int(len(timings) * 0.99)]
+    print(f"history: {args.rows} expenses, {len(index)} distinct words")
+    print(f"build index: {build_ms:.0f} ms")
+    print(f"suggest per keystroke: p50 {p50 * 1000:.1f} us, p99 {p99 * 1000:.1f} us, "
+          f"max {timings[-1] * 1000:.1f} us over {len(timings)} calls")
+    print(f"incremental add: {add_us:.1f} us per expense")
+    print(f"accuracy on new descriptions: {correct / len(samples) * 100:.1f}%")
+    if p99 > args.max_ms:
+        print(f"FAIL: 99th percentile suggestion took longer than {args.max_ms} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Compare per-call connections against the shared connection pool.
+
+Usage: python benchmarks/bench_connections.py [--rows 500000] [--actions 200]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+from db_config import initialize_database
+from db_migrations import LATEST_VERSION, migrate
+from db_pool import ConnectionPool
+
+CATEGORIES = ['Food', 'Transport', 'Entertainment', 'Utilities', 'Other']
+
+def populate(db_path, rows, users=10, schema_version=LATEST_VERSION):
+    """Fill a fresh database with synthetic expenses
+
+    The same seed gives the same expenses in every schema version.
+    """
+    connection = sqlite3.connect(db_path)
+    migrate(connection, target=schema_version)
+    rng = random.Random(42)
+    start = date(2020, 1, 1)
+    connection.executemany(
+        "INSERT INTO users (username, password, income) VALUES (?, ?, ?)",
+        [(f"user{i}", "x", 50000) for i in range(users)]
+    )
+    expenses = (
+        (
+            f"user{rng.randrange(users)}",
+            start + timedelta(days=rng.randrange(1500)),
+            rng.choice(CATEGORIES),
+            round(rng.uniform(10, 5000), 2),
+            "synthetic",
+        )
+        for _ in range(rows)
+    )
+    if schema_version < 8:
+        connection.executemany(
+            "INSERT INTO expenses (username, date, category, amount, description) VALUES (?, ?, ?, ?, ?)",
+            ((username, day.isoformat(), category, amount, description)
+             for username, day, category, amount, description in expenses)
+        )
+    else:
+        user_ids = {f"user{i}": storage.user_id(connection, f"user{i}") for i in range(users)}
+        category_ids = {category: storage.category_id(connection, category) for category in CATEGORIES}
+        connection.executemany(
+            "INSERT INTO expenses (user_id, day, category_id, amount_paise, description) VALUES (?, ?, ?, ?, ?)",
+            ((user_ids[username], storage.day_number(day.isoformat()), category_ids[category],
+              storage.to_paise(amount), description)
+             for username, day, category, amount, description in expenses)
+        )
+    connection.commit()
+    connection.close()
+
+def action(connection):
+    """One typical screen action: a login lookup followed by an income read"""
+    connection.execute("SELECT * FROM users WHERE username = ? AND password = ?", ("user1", "x")).fetchone()
+    connection.execute("SELECT income FROM users WHERE username = ?", ("user1",)).fetchone()
+
+def bench_per_call(db_path, actions):
+    """Old behaviour: open, run the DDL, query and close on every action"""
+    started = time.perf_counter()
+    for _ in range(actions):
+        connection = sqlite3.connect(db_path)
+        initialize_database(connection)
+        action(connection)
+        connection.close()
+    return time.perf_counter() - started
+
+def bench_pooled(db_path, actions):
+    """New behaviour: borrow a long-lived connection from the pool"""
+    pool = ConnectionPool(db_path)
+    started = time.perf_counter()
+    for _ in range(actions):
+        with pool.connection() as connection:
+            action(connection)
+    elapsed = time.perf_counter() - started
+    stats = pool.stats()
+    pool.close_all()
+    return elapsed, stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--actions', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        print(f"Populating {args.rows} expenses...")
+        populate(db_path, args.rows)
+
+        per_call = bench_per_call(db_path, args.actions)
+        pooled, stats = bench_pooled(db_path, args.actions)
+
+        print(f"per-call: {per_call / args.actions * 1000:.3f} ms/action")
+        print(f"pooled:   {pooled / args.actions * 1000:.3f} ms/action")
+        print(f"pool stats: opened={stats['opened']} reused={stats['reused']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Compare the database profiles in db_config.DB_PROFILES.
+
+For each profile, plus the old defaults (rollback journal, synchronous=FULL),
+times single-expense adds through ExpenseService (one commit each, as the
+add-expense form does) and the read latency of a month's daily totals and
+the first page of the expense list, both alone and while another thread
+keeps adding expenses.
+
+Run it on the disk the app really uses (--dir); fsync costs on tmpfs are
+not representative.
+
+Usage: python benchmarks/bench_db_profiles.py [--rows 100000] [--inserts 500] [--dir PATH]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_connections import populate
+from db_config import DB_PROFILES
+from db_pool import ConnectionPool
+from expense_service import ExpenseService
+
+# What every connection used before profiles existed, benchmarked as one more profile
+DEFAULTS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+def open_pool(db_path, profile):
+    """A two-connection pool with profile applied"""
+    return ConnectionPool(db_path, max_size=2, profile=profile)
+
+def percentile(timings, fraction):
+    """Value at fraction of the sorted timings"""
+    ordered = sorted(timings)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def read_once(service):
+    """The reads behind the calendar and the expense list"""
+    started = time.perf_counter()
+    service.daily_totals('user0', '2022-06-01', '2022-07-01')
+    service.list_expenses('user0', limit=50)
+    return (time.perf_counter() - started) * 1000
+
+def bench_profile(db_path, profile, inserts, reads):
+    """(inserts/sec, quiet read p50/p99, read p50/p99 under writes) in ms"""
+    pool = open_pool(db_path, profile)
+    service = ExpenseService(pool)
+
+    started = time.perf_counter()
+    for number in range(inserts):
+        service.add_expense('user0', 100 + number, 'Food', 'bench', '2022-06-15')
+    insert_rate = inserts / (time.perf_counter() - started)
+
+    quiet = [read_once(service) for _ in range(reads)]
+
+    stop = threading.Event()
+    def writer():
+        writer_service = ExpenseService(open_pool(db_path, profile))
+        while not stop.is_set():
+            writer_service.add_expense('user1', 50, 'Transport', 'bench', '2022-06-16')
+        writer_service.pool.close_all()
+    thread = threading.Thread(target=writer)
+    thread.start()
+    time.sleep(0.05)
+    busy = [read_once(service) for _ in range(reads)]
+    stop.set()
+    thread.join()
+    pool.maintain()
+    pool.close_all()
+    return (insert_rate, percentile(quiet, 0.5), percentile(quiet, 0.99),
+            percentile(busy, 0.5), percentile(busy, 0.99))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--inserts', type=int, default=500)
+    parser.add_argument('--reads', type=int, default=200)
+    parser.add_argument('--dir', help="directory for the test databases (default: system temp)")
+    args = parser.parse_args()
+
+    print(f"{'profile':<10} {'adds/sec':>10} {'read p50':>10} {'read p99':>10} "
+          f"{'busy p50':>10} {'busy p99':>10}  (ms)")
+    profiles = list(DB_PROFILES)
+    DB_PROFILES['default'] = DEFAULTS
+    for profile in ['default'] + profiles:
+        with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+            db_path = os.path.join(tmp, "bench.db")
+            populate(db_path, args.rows, users=2)
+            rate, p50, p99, busy50, busy99 = bench_profile(db_path, profile, args.inserts, args.reads)
+        print(f"{profile:<10} {rate:>10.0f} {p50:>10.2f} {p99:>10.2f} {busy50:>10.2f} {busy99:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare deleting expenses by their shown values with deleting by id.
+
+Times the old value-matching DELETE (username, date, category, amount and
+description) against deletion_journal.delete by primary key, one expense at
+a time, then one multi-select of --batch ids in a single statement, and
+finally restoring that batch.
+
+Usage: python benchmarks/bench_delete.py [--rows 500000] [--deletes 200] [--batch 1000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import deletion_journal
+import storage
+from bench_connections import populate
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--deletes', type=int, default=200)
+    parser.add_argument('--batch', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        populate(db_path, args.rows, users=10)
+        connection = sqlite3.connect(db_path)
+        ids = [row[0] for row in connection.execute(
+            f"SELECT id FROM expenses WHERE user_id = {storage.USER_ID}", ('user0',)
+        )]
+        random.Random(1).shuffle(ids)
+        by_value, by_id, batch_ids = (
+            ids[:args.deletes], ids[args.deletes:2 * args.deletes],
+            ids[2 * args.deletes:2 * args.deletes + args.batch]
+        )
+
+        started = time.perf_counter()
+        for expense_id in by_value:
+            row = connection.execute(
+                "SELECT user_id, day, category_id, amount_paise, description FROM expenses WHERE id = ?",
+                (expense_id,)
+            ).fetchone()
+            connection.execute("""
+                DELETE FROM expenses
+                WHERE user_id = ? AND day = ? AND category_id = ? AND amount_paise = ? AND description = ?
+            """, row)
+            connection.commit()
+        value_ms = (time.perf_counter() - started) * 1000 / len(by_value)
+
+        started = time.perf_counter()
+        for expense_id in by_id:
+            deletion_journal.delete(connection, 'user0', [expense_id])
+            connection.commit()
+        id_ms = (time.perf_counter() - started) * 1000 / len(by_id)
+
+        started = time.perf_counter()
+        batch, rows = deletion_journal.delete(connection, 'user0', batch_ids)
+        connection.commit()
+        batch_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        restored = deletion_journal.restore(connection, 'user0', batch)
+        connection.commit()
+        restore_ms = (time.perf_counter() - started) * 1000
+        connection.close()
+
+    print(f"{args.rows} rows, 10 users")
+    print(f"delete by shown values: {value_ms:.3f} ms per expense")
+    print(f"delete by id, journalled: {id_ms:.3f} ms per expense")
+    print(f"delete {len(rows)} selected ids at once: {batch_ms:.1f} ms")
+    print(f"undo that delete ({len(restored)} rows): {restore_ms:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Time to first paint and peak memory of the expense list: full fetch vs paged.
+
+Runs headlessly, so it measures the data side of the list screen (the rows
+that would be handed to the Treeview), not Tk drawing itself.
+
+Usage: python benchmarks/bench_expense_list.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+from bench_connections import populate
+from db_pool import ConnectionPool
+from expense_pager import ExpensePager
+
+def measure(func):
+    """Return (seconds, peak bytes) for one call"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+def full_fetch(pool):
+    """The old load_expenses query: every row at once"""
+    with pool.connection() as connection:
+        connection.execute(f"""
+            SELECT {storage.date_sql('e.day')}, c.name, e.amount_paise / 100.0, e.description
+            FROM {storage.EXPENSE_TABLES} WHERE e.user_id = {storage.USER_ID} ORDER BY e.day DESC
+        """, ('user0',)).fetchall()
+
+def first_page(pool):
+    """The paged list: only the first window"""
+    ExpensePager(pool, 'user0').fetch_next()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'full ms':>10} {'full MiB':>10} {'page ms':>10} {'page MiB':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'bench.db')
+            populate(db_path, size, users=1)
+            pool = ConnectionPool(db_path)
+            # Warm the page cache so both sides read from memory
+            full_fetch(pool)
+
+            full_time, full_peak = measure(lambda: full_fetch(pool))
+            page_time, page_peak = measure(lambda: first_page(pool))
+            pool.close_all()
+
+        print(f"{size:>10} {full_time * 1000:>10.1f} {full_peak / 2**20:>10.2f} "
+              f"{page_time * 1000:>10.1f} {page_peak / 2**20:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Peak memory and throughput of the CSV and Excel exports at several sizes.
+
+Peak memory is Python's allocation high-water mark (tracemalloc) during the
+export, so it should stay flat as the row count grows. --legacy also runs the
+old pandas read_sql_query + to_excel path for comparison.
+
+Usage: python benchmarks/bench_export.py [--rows 10000 100000 500000] [--legacy]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+from bench_connections import populate
+from expense_exporter import export_csv, export_excel
+
+def export_legacy(connection, path, username):
+    """The old export: load the whole table into a DataFrame, then write it"""
+    import pandas as pd
+
+    df = pd.read_sql_query(f"""
+        SELECT {storage.date_sql('e.day')}, c.name, e.amount_paise / 100.0, e.description
+        FROM {storage.EXPENSE_TABLES} WHERE e.user_id = {storage.USER_ID} ORDER BY e.day DESC
+    """, connection, params=(username,))
+    df.to_excel(path, index=False)
+    return len(df)
+
+def measure(export, connection, path, username):
+    """Return (rows written, seconds, peak MiB) for one export"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    written = export(connection, path, username)
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return written, seconds, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 500000])
+    parser.add_argument('--legacy', action='store_true', help="also time the pandas export")
+    args = parser.parse_args()
+
+    exports = [('csv', '.csv', export_csv), ('excel', '.xlsx', export_excel)]
+    if args.legacy:
+        exports.append(('legacy excel', '.xlsx', export_legacy))
+
+    print(f"{'rows':>8}  {'export':<13} {'seconds':>8} {'rows/sec':>10} {'peak MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            db_path = os.path.join(tmp, f"bench_{rows}.db")
+            # A single user, so every row is exported
+            populate(db_path, rows, users=1)
+            connection = sqlite3.connect(db_path)
+            for name, extension, export in exports:
+                path = os.path.join(tmp, f"export_{rows}{extension}")
+                written, seconds, peak = measure(export, connection, path, "user0")
+                print(f"{written:>8}  {name:<13} {seconds:>8.2f} {written / seconds:>10.0f} {peak:>9.1f}")
+                os.remove(path)
+            connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Show that forecasting cost does not grow with the number of expenses.
+
+For each size, one user's history is generated and the forecast is timed
+three ways: a cold fit with no stored models, a warm call where the models
+are already up to date, and a call after another month has completed (one
+month added to each model). The models read only monthly_category_totals,
+so every column should stay roughly flat as the row count grows.
+
+Usage: python benchmarks/bench_forecast.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_connections import populate
+from forecasting import forecast
+
+# populate() spreads expenses over 1500 days from 2020-01-01
+TODAY = '2024-03-15'
+NEXT_MONTH = '2024-04-15'
+
+def timed(func, runs=1):
+    """Median milliseconds of func() over runs calls"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'cold fit':>10} {'warm':>10} {'new month':>10}  (ms)")
+    for rows in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.db")
+            populate(db_path, rows, users=1)
+            connection = sqlite3.connect(db_path)
+            cold_ms = timed(lambda: forecast(connection, "user0", today=TODAY))
+            warm_ms = timed(lambda: forecast(connection, "user0", today=TODAY), args.runs)
+            result = {}
+            def next_month():
+                result.update(forecast(connection, "user0", today=NEXT_MONTH))
+            new_month_ms = timed(next_month)
+            connection.close()
+        print(f"{rows:>10} {cold_ms:>10.2f} {warm_ms:>10.2f} {new_month_ms:>10.2f}"
+              f"  ({len(result['categories'])} models, {result['retrained']} extended)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Memory regression check: open the Insights charts 200 times and count figures.
+
+Renders headlessly with the Agg canvas, so it runs without a display. After
+warm-up and again after the visits it counts the live matplotlib Figures,
+canvases and pyplot-managed figures, and exits with status 1 if any count
+grew. RSS is printed for information only, as it depends on the machine.
+
+Usage: python benchmarks/bench_insights_memory.py [--visits 200] [--legacy]
+"""
+import argparse
+import gc
+import os
+import resource
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backend_bases import FigureCanvasBase
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from chart_renderer import ChartRenderer, PieChart, LineChart
+
+CATEGORIES = ['Food', 'Transport', 'Entertainment', 'Utilities', 'Other']
+MONTHS = [f"2024-{month:02d}" for month in range(1, 13)]
+
+def rss_mib():
+    """Current resident set size in MiB"""
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        # Peak RSS is the best portable fallback (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+def live_objects():
+    """{'figures', 'canvases', 'pyplot figures'} alive after a full collection"""
+    gc.collect()
+    objects = gc.get_objects()
+    pyplot = sys.modules.get('matplotlib.pyplot')
+    return {
+        'figures': sum(1 for obj in objects if isinstance(obj, Figure)),
+        'canvases': sum(1 for obj in objects if isinstance(obj, FigureCanvasBase)),
+        'pyplot figures': len(pyplot.get_fignums()) if pyplot else 0,
+    }
+
+def visit_data(visit):
+    """Slightly different totals on each visit, like a user adding expenses"""
+    amounts = [1000 + (visit * 7 + i * 13) % 500 for i in range(len(CATEGORIES))]
+    trend = [5000 + (visit * 11 + i * 17) % 900 for i in range(len(MONTHS))]
+    return amounts, trend
+
+def visit_slots(renderer, visit):
+    """What the Insights screen does now: update the reused slots"""
+    amounts, trend = visit_data(visit)
+    pie = renderer.slot('category_distribution', lambda root: PieChart(root, "By Category"))
+    line = renderer.slot('monthly_trend', lambda root: LineChart(root, "Trend", "Month", "Total"))
+    for chart, labels, values in ((pie, CATEGORIES, amounts), (line, MONTHS, trend)):
+        if not isinstance(chart.figure.canvas, FigureCanvasAgg):
+            FigureCanvasAgg(chart.figure)
+        chart.update(labels, values)
+        chart.figure.canvas.draw()
+
+def visit_legacy(renderer, visit):
+    """What the Insights screen used to do: new pyplot figures every visit"""
+    import matplotlib.pyplot as plt
+
+    amounts, trend = visit_data(visit)
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.pie(amounts, labels=CATEGORIES, autopct='%1.1f%%')
+    fig.canvas.draw()
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.plot(MONTHS, trend, marker='o')
+    fig.canvas.draw()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--visits', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--legacy', action='store_true', help="measure the old pyplot code path")
+    args = parser.parse_args()
+
+    visit = visit_legacy if args.legacy else visit_slots
+    renderer = ChartRenderer(root=None)
+
+    for i in range(args.warmup):
+        visit(renderer, i)
+    baseline, baseline_rss = live_objects(), rss_mib()
+    for i in range(args.visits):
+        visit(renderer, args.warmup + i)
+    final, final_rss = live_objects(), rss_mib()
+
+    for name in baseline:
+        print(f"{name}: {baseline[name]} after warm-up, {final[name]} after {args.visits} visits")
+    print(f"RSS after warm-up: {baseline_rss:.1f} MiB, after {args.visits} visits: {final_rss:.1f} MiB")
+    leaked = [name for name in baseline if final[name] > baseline[name]]
+    if leaked:
+        print(f"FAIL: {', '.join(leaked)} accumulate with each Insights visit")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
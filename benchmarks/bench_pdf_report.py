@@ -0,0 +1,97 @@
+"""Pages per second and peak memory of the PDF report at several sizes.
+
+Each report is built in a fresh interpreter and its peak memory is the growth
+in peak RSS over the interpreter's baseline. --legacy also times the old
+single-Table report, which is only practical for the smaller sizes.
+
+Usage: python benchmarks/bench_pdf_report.py [--rows 10000 100000 500000] [--legacy]
+"""
+import argparse
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+from bench_connections import populate
+from pdf_report import build_report
+
+def report_legacy(connection, path, username):
+    """The old report: every row in one Table, laid out by SimpleDocTemplate"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+    data = connection.execute(f"""
+        SELECT {storage.date_sql('e.day')}, c.name, e.amount_paise / 100.0, e.description
+        FROM {storage.EXPENSE_TABLES} WHERE e.user_id = {storage.USER_ID} ORDER BY e.day DESC
+    """, (username,)).fetchall()
+    doc = SimpleDocTemplate(path, pagesize=letter)
+    table = Table([["Date", "Category", "Amount", "Description"]] + data, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ]))
+    doc.build([table])
+    return {'rows': len(data), 'pages': doc.page}
+
+BUILDS = {'paged': build_report, 'legacy': report_legacy}
+
+def peak_rss_mib():
+    """Peak resident set size of this process in MiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+def child(name, db_path, path):
+    """Build one report in this process and print its measurements as JSON"""
+    connection = sqlite3.connect(db_path)
+    baseline = peak_rss_mib()
+    started = time.perf_counter()
+    result = BUILDS[name](connection, path, "user0")
+    result['seconds'] = time.perf_counter() - started
+    result['peak_mib'] = peak_rss_mib() - baseline
+    connection.close()
+    print(json.dumps(result))
+
+def measure(name, db_path, path):
+    """Run child() in a fresh interpreter and return its measurements"""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', name, db_path, path],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 500000])
+    parser.add_argument('--legacy', action='store_true', help="also time the single-table report")
+    parser.add_argument('--child', nargs=3, metavar=('REPORT', 'DB', 'PDF'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    names = ['paged', 'legacy'] if args.legacy else ['paged']
+
+    print(f"{'rows':>8}  {'report':<8} {'pages':>6} {'seconds':>8} {'pages/sec':>10} {'peak MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            db_path = os.path.join(tmp, f"bench_{rows}.db")
+            # A single user, so every row is in the report
+            populate(db_path, rows, users=1)
+            for name in names:
+                path = os.path.join(tmp, f"report_{rows}.pdf")
+                result = measure(name, db_path, path)
+                print(f"{result['rows']:>8}  {name:<8} {result['pages']:>6} {result['seconds']:>8.2f} "
+                      f"{result['pages'] / result['seconds']:>10.1f} {result['peak_mib']:>9.1f}", flush=True)
+                os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Show query plans and timings for the per-user screens before and after the index migration.
+
+Usage: python benchmarks/bench_query_plans.py [--rows 500000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_connections import populate
+from db_migrations import get_version, migrate
+
+# The queries behind the list, trend, category and calendar screens
+QUERIES = {
+    'list': ("""
+        SELECT date, category, amount, description
+        FROM expenses WHERE username = ? ORDER BY date DESC
+    """, ('user1',)),
+    'monthly_trend': ("""
+        SELECT strftime('%Y-%m', date) as month, SUM(amount) as total
+        FROM expenses WHERE username = ? GROUP BY month ORDER BY month
+    """, ('user1',)),
+    'category_distribution': ("""
+        SELECT category, SUM(amount) as total
+        FROM expenses WHERE username = ? GROUP BY category
+    """, ('user1',)),
+    'calendar_month': ("""
+        SELECT date, SUM(amount) as total
+        FROM expenses WHERE username = ? AND date >= ? AND date < ?
+        GROUP BY date
+    """, ('user1', '2022-03-01', '2022-04-01')),
+}
+
+def report(connection, repeat):
+    """Print the plan and the mean run time of every query"""
+    print(f"-- schema version {get_version(connection)}")
+    for name, (sql, params) in QUERIES.items():
+        plan = connection.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            connection.execute(sql, params).fetchall()
+        elapsed = (time.perf_counter() - started) / repeat
+        print(f"{name}: {elapsed * 1000:.2f} ms")
+        for row in plan:
+            print(f"    {row[-1]}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        print(f"Populating {args.rows} expenses...")
+        populate(db_path, args.rows, users=args.users, schema_version=1)
+
+        connection = sqlite3.connect(db_path)
+        report(connection, args.repeat)
+        # The last version that stores these text columns; bench_storage_v2
+        # compares the integer-encoded layout that follows
+        migrate(connection, target=7)
+        report(connection, args.repeat)
+        connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Cost of query_profiler on typical statements.
+
+Runs a login lookup, a page of the expense list and a full fetch of one
+user's expenses on a plain sqlite3 connection, on a ProfiledConnection with
+profiling switched off, and on one with it on, and reports the median time
+of each.
+
+Usage: python benchmarks/bench_query_profiler.py [--rows 200000] [--runs 200]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import query_profiler
+import storage
+from bench_connections import populate
+from query_profiler import ProfiledConnection
+
+STATEMENTS = [
+    ('login lookup', lambda c: c.execute(
+        "SELECT * FROM users WHERE username = ? AND password = ?", ("user1", "x")
+    ).fetchone()),
+    ('list page of 50', lambda c: c.execute(f"""
+        SELECT {storage.EXPENSE_COLUMNS} FROM {storage.EXPENSE_TABLES}
+        WHERE e.user_id = {storage.USER_ID} ORDER BY e.day DESC, e.id DESC LIMIT 50
+    """, ("user1",)).fetchall()),
+    ('iterate all rows', lambda c: sum(1 for _ in c.execute(f"""
+        SELECT {storage.EXPENSE_COLUMNS} FROM {storage.EXPENSE_TABLES}
+        WHERE e.user_id = {storage.USER_ID}
+    """, ("user1",)))),
+]
+
+def timed(func, connection, runs):
+    """Median microseconds of func(connection)"""
+    func(connection)
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func(connection)
+        timings.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--runs', type=int, default=200)
+    args = parser.parse_args()
+
+    # Keep the run's slow statements out of the app's log
+    query_profiler.SLOW_QUERY_MS = float('inf')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        populate(db_path, args.rows)
+        plain = sqlite3.connect(db_path)
+        profiled = sqlite3.connect(db_path, factory=ProfiledConnection)
+
+        print(f"{'statement':<18} {'plain':>10} {'off':>10} {'on':>10}  (median µs)")
+        for name, func in STATEMENTS:
+            plain_us = timed(func, plain, args.runs)
+            query_profiler.enabled = False
+            off_us = timed(func, profiled, args.runs)
+            query_profiler.enabled = True
+            on_us = timed(func, profiled, args.runs)
+            print(f"{name:<18} {plain_us:>10.1f} {off_us:>10.1f} {on_us:>10.1f}")
+        plain.close()
+        profiled.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Cost of receipt images for the queries that do not want them.
+
+Attaches --receipts synthetic JPEG receipts to expenses two ways: inline in
+the old expenses.receipt_image column, and through receipts.store into the
+receipts table. Then times a full scan of expenses (as an aggregate without
+a covering index does), the first page of the expense list and a SELECT *
+(as show_db.py does), and compares showing a stored thumbnail with reading
+and decoding the original.
+
+Usage: python benchmarks/bench_receipts.py [--rows 100000] [--receipts 300] [--kib 300]
+"""
+import argparse
+import io
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import receipts
+from bench_connections import populate
+from db_pool import ConnectionPool
+from expense_pager import ExpensePager
+
+def synthetic_jpeg(kib):
+    """A noisy JPEG of roughly kib KiB"""
+    from PIL import Image
+
+    side = int((kib * 1024 / 0.6) ** 0.5)
+    image = Image.frombytes('RGB', (side, side), random.Random(1).randbytes(side * side * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+def timed(func, runs=5):
+    """Median milliseconds of func() over runs calls"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def scans(db_path):
+    """(full scan ms, first list page ms, SELECT * ms) on a database"""
+    connection = sqlite3.connect(db_path)
+    pool = ConnectionPool(db_path)
+    full_scan = timed(lambda: connection.execute(
+        "SELECT COUNT(*), SUM(length(description)) FROM expenses NOT INDEXED"
+    ).fetchone())
+    first_page = timed(lambda: ExpensePager(pool, 'user0').fetch_next())
+    select_all = timed(lambda: connection.execute("SELECT * FROM expenses").fetchall(), runs=1)
+    pool.close_all()
+    connection.close()
+    return full_scan, first_page, select_all
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--receipts', type=int, default=300)
+    parser.add_argument('--kib', type=int, default=300, help="approximate size of each receipt")
+    args = parser.parse_args()
+
+    jpeg = synthetic_jpeg(args.kib)
+    with tempfile.TemporaryDirectory() as tmp:
+        inline_path, table_path = os.path.join(tmp, "inline.db"), os.path.join(tmp, "table.db")
+        populate(inline_path, args.rows, users=1)
+        shutil.copyfile(inline_path, table_path)
+        ids = random.Random(2).sample(range(1, args.rows + 1), args.receipts)
+
+        # Trailing bytes after the JPEG end marker make each receipt distinct
+        def receipt(number):
+            return jpeg + number.to_bytes(4, 'big')
+
+        connection = sqlite3.connect(inline_path)
+        connection.executemany(
+            "UPDATE expenses SET receipt_image = ? WHERE id = ?",
+            ((receipt(number), expense_id) for number, expense_id in enumerate(ids))
+        )
+        connection.commit()
+        connection.close()
+
+        connection = sqlite3.connect(table_path)
+        image_path = os.path.join(tmp, "receipt.jpg")
+        started = time.perf_counter()
+        for number, expense_id in enumerate(ids):
+            with open(image_path, 'wb') as f:
+                f.write(receipt(number))
+            receipt_id, _ = receipts.store(connection, image_path)
+            connection.execute("UPDATE expenses SET receipt_id = ? WHERE id = ?", (receipt_id, expense_id))
+        connection.commit()
+        store_ms = (time.perf_counter() - started) * 1000 / len(ids)
+
+        thumbnail_ms = timed(lambda: receipts.thumbnail(connection, receipt_id), runs=20)
+        def decode_original():
+            from PIL import Image
+            Image.open(io.BytesIO(receipts.read(connection, receipt_id))).load()
+        original_ms = timed(decode_original, runs=5)
+        connection.close()
+
+        print(f"{args.rows} expenses, {args.receipts} receipts of {len(jpeg) / 1024:.0f} KiB")
+        print(f"{'':<12} {'full scan':>10} {'list page':>10} {'SELECT *':>10}  (ms)")
+        for name, path in (('inline', inline_path), ('receipts', table_path)):
+            full_scan, first_page, select_all = scans(path)
+            print(f"{name:<12} {full_scan:>10.1f} {first_page:>10.2f} {select_all:>10.0f}")
+        print(f"store one receipt with its thumbnail: {store_ms:.1f} ms")
+        print(f"show thumbnail: {thumbnail_ms:.2f} ms, read and decode original: {original_ms:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Catch-up time for recurring expenses with a large backlog.
+
+Creates --schedules schedules spread over --users users, all started
+--years ago and never run, then times one catch-up and a second (no-op) one.
+
+Usage: python benchmarks/bench_recurring.py [--schedules 5000] [--years 3]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_migrations import migrate
+from recurring_scheduler import catch_up
+
+FREQUENCIES = ['Weekly', 'Monthly', 'Monthly', 'Monthly', 'Yearly']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--schedules', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--years', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    first_day = date.today() - timedelta(days=365 * args.years)
+    with tempfile.TemporaryDirectory() as tmp:
+        connection = sqlite3.connect(os.path.join(tmp, "bench.db"))
+        migrate(connection)
+        connection.executemany(
+            "INSERT INTO users (username, password, income) VALUES (?, ?, ?)",
+            [(f"user{i}", "x", 50000) for i in range(args.users)]
+        )
+        schedules = []
+        for _ in range(args.schedules):
+            start = (first_day + timedelta(days=rng.randrange(28))).isoformat()
+            schedules.append((
+                f"user{rng.randrange(args.users)}", round(rng.uniform(100, 5000), 2),
+                rng.choice(FREQUENCIES), "subscription", start, start
+            ))
+        connection.executemany("""
+            INSERT INTO recurring_expenses (username, amount, frequency, description, next_date, start_date)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, schedules)
+        connection.commit()
+
+        first = catch_up(connection)
+        print(f"catch-up: {first['schedules']} schedules, {first['inserted']} expenses "
+              f"in {first['seconds'] * 1000:.1f} ms")
+        again = catch_up(connection)
+        print(f"re-run:   {again['schedules']} schedules, {again['inserted']} expenses "
+              f"in {again['seconds'] * 1000:.1f} ms")
+        connection.close()
+
+if __name__ == "__main__":
+    main()
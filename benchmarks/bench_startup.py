@@ -0,0 +1,101 @@
+"""Cold-start benchmark for the desktop app.
+
+Measures, each in a fresh interpreter:
+  * module import time of expense_tracker_desktop via `python -X importtime`
+  * time until the login window has been drawn (skipped without a display)
+
+Exits with status 1 if the import exceeds --max-import-ms or a heavy module
+(pandas, matplotlib, reportlab, sklearn, numpy) is imported at startup.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--max-import-ms 400]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only load when a feature needs them
+DEFERRED = ('pandas', 'matplotlib', 'reportlab', 'sklearn', 'numpy')
+
+FIRST_WINDOW = """
+import time
+started = time.perf_counter()
+import tkinter as tk
+import expense_tracker_desktop
+root = tk.Tk()
+app = expense_tracker_desktop.ExpenseTrackerApp(root)
+root.update()
+print(time.perf_counter() - started)
+root.destroy()
+"""
+
+def import_profile():
+    """Return (total ms, {top-level package: cumulative ms}) for one cold import"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import expense_tracker_desktop'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    total = 0.0
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        fields = [field.strip() for field in line[len('import time:'):].split('|')]
+        if not fields[1].isdigit():
+            continue  # header line
+        cumulative_ms = int(fields[1]) / 1000
+        name = fields[2]
+        if name == 'expense_tracker_desktop':
+            total = cumulative_ms
+        package = name.split('.')[0]
+        packages[package] = max(packages.get(package, 0.0), cumulative_ms)
+    return total, packages
+
+def first_window_time():
+    """Seconds until the login window is drawn, or None without a display"""
+    result = subprocess.run(
+        [sys.executable, '-c', FIRST_WINDOW],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-import-ms', type=float, default=400.0)
+    args = parser.parse_args()
+
+    totals = []
+    for _ in range(args.runs):
+        total, packages = import_profile()
+        totals.append(total)
+    import_ms = statistics.median(totals)
+
+    print(f"import expense_tracker_desktop: {import_ms:.1f} ms (median of {args.runs})")
+    print("slowest packages:")
+    for package, ms in sorted(packages.items(), key=lambda item: -item[1])[:8]:
+        print(f"  {package:<30} {ms:8.1f} ms")
+
+    window_times = [first_window_time() for _ in range(args.runs)]
+    if None in window_times:
+        print("time to first window: skipped (no display)")
+    else:
+        print(f"time to first window: {statistics.median(window_times) * 1000:.1f} ms")
+
+    failed = False
+    loaded = [name for name in DEFERRED if name in packages]
+    if loaded:
+        print(f"FAIL: imported at startup: {', '.join(loaded)}")
+        failed = True
+    if import_ms > args.max_import_ms:
+        print(f"FAIL: import took longer than {args.max_import_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
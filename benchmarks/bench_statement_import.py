@@ -0,0 +1,92 @@
+"""Rows per second of statement imports, with round-trip and credit checks.
+
+Exports one user's expenses with the app's own CSV export and imports the
+file for a second user, then imports a bank-style statement with signed
+amounts (money out negative, salary and refunds positive) twice. Exits with
+status 1 if the round trip loses or changes expenses, if a credit is
+imported, or if the re-import inserts anything.
+
+Usage: python benchmarks/bench_statement_import.py [--rows 200000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_connections import populate
+from expense_exporter import export_csv
+from statement_importer import import_statement
+
+def user_totals(connection, username):
+    """(count, total paise) of a user's expenses"""
+    return connection.execute("""
+        SELECT COUNT(*), SUM(amount_paise)
+        FROM expenses
+        WHERE user_id = (SELECT id FROM users WHERE username = ?)
+    """, (username,)).fetchone()
+
+def write_statement(path, rows):
+    """A signed-amount bank statement; returns (debits, credits) written"""
+    rng = random.Random(7)
+    debits = credits = 0
+    with open(path, 'w', newline='') as f:
+        f.write("Txn Date,Narration,Amount\n")
+        for i in range(rows):
+            day = f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2023"
+            if i % 20 == 0:
+                f.write(f"{day},Salary credit {i},{rng.randint(20000, 90000)}.00\n")
+                credits += 1
+            else:
+                f.write(f"{day},POS purchase {i},-{rng.randint(100, 999999) / 100:.2f}\n")
+                debits += 1
+    return debits, credits
+
+def report(name, summary):
+    print(f"{name:<22} {summary['read']:>8} {summary['inserted']:>9} {summary['duplicates']:>10} "
+          f"{summary['credits']:>8} {summary['rows_per_sec']:>10.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        populate(db_path, args.rows, users=1)
+        connection = sqlite3.connect(db_path)
+        connection.executemany(
+            "INSERT INTO users (username, password, income) VALUES (?, 'x', 0)", [("copy",), ("bank",)]
+        )
+        connection.commit()
+
+        print(f"{'import':<22} {'read':>8} {'inserted':>9} {'duplicates':>10} {'credits':>8} {'rows/sec':>10}")
+        export_path = os.path.join(tmp, "export.csv")
+        export_csv(connection, export_path, "user0")
+        report("export round trip", import_statement(connection, export_path, "copy"))
+        if user_totals(connection, "copy") != user_totals(connection, "user0"):
+            failures.append("the exported expenses did not all come back unchanged")
+
+        statement_path = os.path.join(tmp, "statement.csv")
+        debits, credits = write_statement(statement_path, args.rows)
+        first = import_statement(connection, statement_path, "bank")
+        report("signed statement", first)
+        if first['credits'] != credits or first['inserted'] != debits:
+            failures.append(f"expected {debits} debits and {credits} credits")
+        again = import_statement(connection, statement_path, "bank")
+        report("re-import", again)
+        if again['inserted']:
+            failures.append("re-importing the statement inserted rows")
+        connection.close()
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Compare the text expense layout (schema 7) with integer-encoded storage v2.
+
+Builds a schema 7 database, copies it and runs the one-shot migration to v2
+on the copy, then reports each file's size after VACUUM and the time of
+GROUP BY queries over the raw expenses table in both layouts, plus how far
+the float total drifts from the exact sum of paise.
+
+Usage: python benchmarks/bench_storage_v2.py [--rows 5000000] [--users 10] [--dir PATH]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_connections import populate
+from db_migrations import migrate
+
+# (name, schema 7 query, v2 query); both return the same groups. v2 groups
+# by integer day first, so the month is worked out once per day, not per row
+QUERIES = [
+    ('total by category', """
+        SELECT category, SUM(amount) FROM expenses GROUP BY category
+    """, """
+        SELECT category_id, SUM(amount_paise) FROM expenses GROUP BY category_id
+    """),
+    ('daily totals, all users', """
+        SELECT username, date, SUM(amount) FROM expenses GROUP BY username, date
+    """, """
+        SELECT user_id, day, SUM(amount_paise) FROM expenses GROUP BY user_id, day
+    """),
+    ('one user by month and category', """
+        SELECT strftime('%Y-%m', date) AS month, category, SUM(amount)
+        FROM expenses WHERE username = 'user0' GROUP BY month, category
+    """, """
+        SELECT strftime('%Y-%m', day + 2440587.5) AS month, category_id, SUM(total_paise)
+        FROM (
+            SELECT category_id, day, SUM(amount_paise) AS total_paise
+            FROM expenses WHERE user_id = (SELECT id FROM users WHERE username = 'user0')
+            GROUP BY category_id, day
+        )
+        GROUP BY month, category_id
+    """),
+    ('one user by day, one year', """
+        SELECT date, SUM(amount) FROM expenses
+        WHERE username = 'user0' AND date >= '2022-01-01' AND date < '2023-01-01'
+        GROUP BY date
+    """, """
+        SELECT day, SUM(amount_paise) FROM expenses
+        WHERE user_id = (SELECT id FROM users WHERE username = 'user0')
+          AND day >= julianday('2022-01-01') - 2440587.5 AND day < julianday('2023-01-01') - 2440587.5
+        GROUP BY day
+    """),
+]
+
+def timed(connection, sql, runs):
+    """(median ms, rows) of a query over runs runs"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        rows = connection.execute(sql).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), len(rows)
+
+def vacuumed_size(db_path):
+    """File size in MiB after VACUUM"""
+    connection = sqlite3.connect(db_path)
+    connection.execute("VACUUM")
+    connection.close()
+    return os.path.getsize(db_path) / 2**20
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000000)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--dir', help="directory for the test databases (default: system temp)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        v1_path, v2_path = os.path.join(tmp, "v1.db"), os.path.join(tmp, "v2.db")
+        print(f"Populating {args.rows} expenses for {args.users} users...")
+        populate(v1_path, args.rows, users=args.users, schema_version=7)
+        shutil.copyfile(v1_path, v2_path)
+
+        connection = sqlite3.connect(v2_path)
+        started = time.perf_counter()
+        migrate(connection)
+        migrate_seconds = time.perf_counter() - started
+        connection.close()
+        print(f"one-shot migration to v2: {migrate_seconds:.1f} s")
+
+        v1_size, v2_size = vacuumed_size(v1_path), vacuumed_size(v2_path)
+        print(f"file size after VACUUM: schema 7 {v1_size:.1f} MiB, v2 {v2_size:.1f} MiB "
+              f"({100 * (1 - v2_size / v1_size):.0f}% smaller)")
+
+        v1, v2 = sqlite3.connect(v1_path), sqlite3.connect(v2_path)
+        print(f"{'GROUP BY':<32} {'groups':>8} {'schema 7':>10} {'v2':>10}  (median ms)")
+        for name, v1_sql, v2_sql in QUERIES:
+            # Warm the page cache so both read from memory
+            v1.execute(v1_sql).fetchall()
+            v2.execute(v2_sql).fetchall()
+            v1_ms, groups = timed(v1, v1_sql, args.runs)
+            v2_ms, v2_groups = timed(v2, v2_sql, args.runs)
+            assert groups == v2_groups, (name, groups, v2_groups)
+            print(f"{name:<32} {groups:>8} {v1_ms:>10.1f} {v2_ms:>10.1f}")
+
+        float_total = v1.execute("SELECT SUM(amount) FROM expenses").fetchone()[0]
+        paise_total = v2.execute("SELECT SUM(amount_paise) FROM expenses").fetchone()[0]
+        print(f"grand total: REAL {float_total!r}, paise {paise_total / 100:.2f} "
+              f"(drift {abs(float_total * 100 - paise_total):.4f} paise)")
+        v1.close()
+        v2.close()
+
+if __name__ == "__main__":
+    main()
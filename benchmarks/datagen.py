@@ -0,0 +1,190 @@
+"""Deterministic synthetic data for the benchmark suite, at any scale.
+
+generate() fills users, expenses, recurring_expenses and budget_goals of a
+fresh database from one seed, so the same arguments always give the same
+rows. The data is skewed the way real use is:
+
+- users: activity follows a power law, so the busiest user has many times
+  the median user's expenses
+- categories: Food and Transport are most of the rows, Other is rare
+- dates: five years ending on END, denser towards the end
+- amounts: log-normal around a typical amount per category
+
+Expenses are bulk-loaded with the summary triggers and expense indexes
+dropped and recreated afterwards, then the summary tables are rebuilt and
+due recurring expenses are created with recurring_scheduler.catch_up.
+
+Usage: python benchmarks/datagen.py PATH [--rows 1000000] [--users N] [--seed 42]
+"""
+import argparse
+import itertools
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aggregates
+import storage
+from db_migrations import migrate
+from expense_service import hash_password
+from recurring_scheduler import catch_up
+
+# Last day of the generated history; fixed so the data never depends on today
+END = date(2025, 12, 31)
+DAYS = 5 * 365
+
+# Every generated user has this password
+PASSWORD = "password"
+
+# (relative frequency, typical amount in rupees, descriptions) per category
+CATEGORIES = {
+    'Food': (40, 250, ["Swiggy order", "Zomato dinner", "Groceries", "Lunch", "Coffee", "Bakery"]),
+    'Transport': (22, 150, ["Uber ride", "Ola to office", "Metro card recharge", "Petrol", "Auto"]),
+    'Utilities': (15, 1500, ["Electricity bill", "Mobile recharge", "Broadband", "Water bill", "Gas cylinder"]),
+    'Entertainment': (13, 600, ["Movie tickets", "Netflix", "Concert", "Books", "Gaming"]),
+    'Other': (10, 400, ["Pharmacy", "Gift", "Haircut", "Stationery", "Donation"]),
+}
+
+FREQUENCIES = (('Monthly', 70), ('Weekly', 20), ('Yearly', 10))
+
+# Exponent of the user activity power law; larger is more skewed
+USER_SKEW = 0.8
+
+BATCH = 50000
+
+def default_users(rows):
+    """About one user per thousand expenses, between 10 and 10000"""
+    return max(10, min(10000, rows // 1000))
+
+def _expenses(rng, rows, user_ids, category_ids):
+    """Yield (user_id, day, category_id, amount_paise, description)"""
+    user_weights = list(itertools.accumulate(1 / (rank + 1) ** USER_SKEW for rank in range(len(user_ids))))
+    categories = list(CATEGORIES.items())
+    category_weights = list(itertools.accumulate(weight for _, (weight, _, _) in categories))
+    end = storage.day_number(END.isoformat())
+    for _ in range(rows):
+        user = rng.choices(user_ids, cum_weights=user_weights)[0]
+        name, (_, typical, descriptions) = rng.choices(categories, cum_weights=category_weights)[0]
+        # Density grows linearly towards END
+        day = end - int(DAYS * (1 - math.sqrt(rng.random())))
+        amount = min(max(rng.lognormvariate(math.log(typical), 0.8), 1), 200000)
+        yield user, day, category_ids[name], int(round(amount * 100)), rng.choice(descriptions)
+
+def _without(connection, table, kind):
+    """Drop table's triggers or indexes (kind) and return the SQL to recreate them"""
+    rows = connection.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = ? AND tbl_name = ? AND sql IS NOT NULL",
+        (kind, table)
+    ).fetchall()
+    for name, _ in rows:
+        connection.execute(f"DROP {kind.upper()} {name}")
+    return [sql for _, sql in rows]
+
+def generate(db_path, rows, users=None, seed=42, progress=None):
+    """Fill a fresh database and return counts of what was made
+
+    progress(done, rows) is called after every batch of expenses.
+    """
+    users = users or default_users(rows)
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    connection = sqlite3.connect(db_path)
+    migrate(connection)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("PRAGMA synchronous = OFF")
+
+    password = hash_password(PASSWORD)
+    connection.executemany(
+        "INSERT INTO users (username, password, income) VALUES (?, ?, ?)",
+        ((f"user{i}", password, rng.randrange(20000, 300000, 1000)) for i in range(users))
+    )
+    user_ids = [row[0] for row in connection.execute("SELECT id FROM users ORDER BY id")]
+    category_ids = {name: storage.category_id(connection, name) for name in CATEGORIES}
+
+    recreate = _without(connection, 'expenses', 'trigger') + _without(connection, 'expenses', 'index')
+    expenses = _expenses(rng, rows, user_ids, category_ids)
+    done = 0
+    while done < rows:
+        batch = list(itertools.islice(expenses, BATCH))
+        connection.executemany(
+            "INSERT INTO expenses (user_id, day, category_id, amount_paise, description) VALUES (?, ?, ?, ?, ?)",
+            batch
+        )
+        done += len(batch)
+        if progress:
+            progress(done, rows)
+    for sql in recreate:
+        connection.execute(sql)
+    aggregates.rebuild(connection)
+
+    # Up to three schedules per user, started in the last year so catch-up stays small
+    frequencies = [name for name, _ in FREQUENCIES]
+    frequency_weights = [weight for _, weight in FREQUENCIES]
+    schedules = []
+    for i in range(users):
+        for _ in range(rng.choice((0, 0, 1, 1, 2, 3))):
+            category = rng.choice(list(CATEGORIES))
+            start = (END - timedelta(days=rng.randrange(365))).isoformat()
+            schedules.append((
+                f"user{i}", round(CATEGORIES[category][1] * rng.uniform(0.5, 3), 2),
+                rng.choices(frequencies, frequency_weights)[0],
+                rng.choice(CATEGORIES[category][2]), category, start, start
+            ))
+    connection.executemany("""
+        INSERT INTO recurring_expenses (username, amount, frequency, description, category, start_date, next_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, schedules)
+
+    # Budgets for about half the users, near their typical monthly spend
+    goals = []
+    for i in range(users):
+        if rng.random() < 0.5:
+            for category in rng.sample(list(CATEGORIES), rng.randint(1, 4)):
+                goals.append((f"user{i}", category, float(rng.randrange(1000, 20000, 500))))
+    connection.executemany("INSERT INTO budget_goals (username, category, amount) VALUES (?, ?, ?)", goals)
+    connection.commit()
+
+    recurring = catch_up(connection, today=END.isoformat())['inserted']
+    connection.execute("ANALYZE")
+    connection.commit()
+    connection.close()
+    return {
+        'rows': rows, 'users': users, 'seed': seed, 'recurring_expenses': len(schedules),
+        'recurring_inserted': recurring, 'budget_goals': len(goals),
+        'seconds': round(time.perf_counter() - started, 1),
+    }
+
+def pick_users(connection):
+    """{'heavy': busiest username, 'typical': median username by expense count}"""
+    counts = connection.execute("""
+        SELECT username FROM monthly_category_totals
+        GROUP BY username
+        ORDER BY SUM(count) DESC, username
+    """).fetchall()
+    return {'heavy': counts[0][0], 'typical': counts[len(counts) // 2][0]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help="database file to create")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--users', type=int, help="default: about one per thousand rows")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if os.path.exists(args.path):
+        parser.error(f"{args.path} already exists")
+
+    def progress(done, rows):
+        print(f"\r{done}/{rows} expenses", end='', file=sys.stderr, flush=True)
+
+    summary = generate(args.path, args.rows, args.users, args.seed, progress)
+    print(file=sys.stderr)
+    print(summary)
+
+if __name__ == "__main__":
+    main()
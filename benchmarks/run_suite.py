@@ -0,0 +1,190 @@
+"""Time the app's real code paths on generated data and write JSON results.
+
+Each case calls the same ExpenseService, ExpensePager and MonthTotals code
+the desktop runs for one screen, headless, on a database from datagen.py.
+List, aggregate and calendar cases run for the busiest user; exports run
+for the median user so they stay practical at 10M rows. Every case runs
+once to warm the caches, then --runs timed times; fast cases are repeated
+within each run so a run is long enough to time reliably.
+
+Results go to a JSON file with the data parameters and environment, and
+--compare prints the change against an earlier results file, so a
+performance change can be checked run to run on the same data.
+
+Usage: python benchmarks/run_suite.py [--rows 100000] [--seed 42] [--runs 5]
+                                      [--db PATH] [--out results.json] [--compare OLD.json]
+                                      [--cases login list_load ...]
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import query_profiler
+from datagen import END, PASSWORD, generate, pick_users
+from db_pool import ConnectionPool
+from expense_pager import ExpensePager
+from expense_service import ExpenseService
+from month_calendar import MonthTotals
+
+def login(ctx):
+    return ctx['service'].authenticate(ctx['heavy'], PASSWORD)
+
+def list_load(ctx):
+    return len(ExpensePager(ctx['pool'], ctx['heavy']).fetch_next())
+
+def category_totals(ctx):
+    return len(ctx['service'].category_totals(ctx['heavy']))
+
+def monthly_totals(ctx):
+    return len(ctx['service'].monthly_totals(ctx['heavy']))
+
+def calendar_month(ctx):
+    # A new MonthTotals each time, so the month is read rather than cached
+    return len(MonthTotals(ctx['service'].daily_totals).get(ctx['heavy'], END.year, END.month))
+
+def export_xlsx(ctx):
+    return ctx['service'].export(ctx['typical'], os.path.join(ctx['tmp'], "export.xlsx"))
+
+def export_pdf(ctx):
+    return ctx['service'].export(ctx['typical'], os.path.join(ctx['tmp'], "export.pdf"))
+
+# Shortest time a timed run of a case should take
+MIN_RUN_MS = 50
+
+# name -> case(ctx), which returns a row count or result to sanity-check
+CASES = {
+    'login': login,
+    'list_load': list_load,
+    'category_totals': category_totals,
+    'monthly_totals': monthly_totals,
+    'calendar_month': calendar_month,
+    'export_xlsx': export_xlsx,
+    'export_pdf': export_pdf,
+}
+
+def git_commit():
+    """The checked-out commit, or None outside a git work tree"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def data_counts(connection):
+    """Rows per generated table, to tell whether two runs used the same data"""
+    return {
+        table: connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ('users', 'expenses', 'recurring_expenses', 'budget_goals')
+    }
+
+def _sample(case, ctx, loops):
+    """Milliseconds per call over loops calls"""
+    started = time.perf_counter()
+    for _ in range(loops):
+        case(ctx)
+    return (time.perf_counter() - started) * 1000 / loops
+
+def run_case(case, ctx, runs):
+    """{'median_ms', 'min_ms', 'max_ms', 'runs', 'loops', 'result'} of a case
+
+    Fast cases are called loops times per run, enough for a run to take
+    MIN_RUN_MS, so timer resolution and scheduling noise do not dominate.
+    """
+    result = case(ctx)
+    loops = 1
+    while loops < 100000 and _sample(case, ctx, loops) * loops < MIN_RUN_MS:
+        loops *= 10
+    timings = [_sample(case, ctx, loops) for _ in range(runs)]
+    return {
+        'median_ms': round(statistics.median(timings), 4),
+        'min_ms': round(min(timings), 4),
+        'max_ms': round(max(timings), 4),
+        'runs': runs,
+        'loops': loops,
+        'result': result,
+    }
+
+def compare(old, new):
+    """Print each case's median against an earlier results file"""
+    print(f"\n{'case':<18} {'before ms':>10} {'after ms':>10} {'change':>8}")
+    for name, result in new['results'].items():
+        before = old['results'].get(name)
+        if before is None:
+            print(f"{name:<18} {'-':>10} {result['median_ms']:>10.3f}")
+            continue
+        change = 100 * (result['median_ms'] / before['median_ms'] - 1) if before['median_ms'] else 0
+        print(f"{name:<18} {before['median_ms']:>10.3f} {result['median_ms']:>10.3f} {change:>+7.1f}%")
+    if old.get('data') != new.get('data'):
+        print("note: the two runs used different data parameters")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000, help="expenses to generate (1k to 10M)")
+    parser.add_argument('--users', type=int, help="default: about one per thousand rows")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--db', help="reuse this generated database, creating it first if missing")
+    parser.add_argument('--out', default='results.json', help="JSON results file")
+    parser.add_argument('--compare', metavar='OLD', help="results file of an earlier run")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    args = parser.parse_args()
+
+    # Keep the suite's statements out of the app's slow-query log
+    query_profiler.SLOW_QUERY_MS = float('inf')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, "suite.db")
+        if not os.path.exists(db_path):
+            print(f"Generating {args.rows} expenses (seed {args.seed})...", file=sys.stderr)
+            generated = generate(db_path, args.rows, args.users, args.seed)
+            print(f"generated in {generated['seconds']} s", file=sys.stderr)
+        connection = sqlite3.connect(db_path)
+        data = data_counts(connection)
+        users = pick_users(connection)
+        connection.close()
+
+        pool = ConnectionPool(db_path)
+        ctx = dict(users, service=ExpenseService(pool), pool=pool, tmp=tmp)
+        results = {}
+        print(f"{'case':<18} {'median ms':>10} {'min ms':>10} {'max ms':>10}")
+        for name in args.cases:
+            results[name] = run_case(CASES[name], ctx, args.runs)
+            result = results[name]
+            print(f"{name:<18} {result['median_ms']:>10.3f} {result['min_ms']:>10.3f} {result['max_ms']:>10.3f}",
+                  flush=True)
+        pool.close_all()
+
+    output = {
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'data': data,
+        'users': users,
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'results': results,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), output)
+
+if __name__ == "__main__":
+    main()
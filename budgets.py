@@ -0,0 +1,121 @@
+"""Budget goals compared with what has been spent this month.
+
+month_status() answers "how much of each budget is used" with one query:
+budget_goals joined to monthly_category_totals on its primary key, so the
+cost depends on the number of goals, not the number of expenses.
+
+BudgetTracker caches that answer per user as running totals. Adding an
+expense then updates one category's total in memory and reports an alert
+when it crosses WARNING_SHARE of its budget or the budget itself, without
+reading the expenses again.
+
+Usage: python budgets.py --user USERNAME [--month YYYY-MM] [--db PATH]
+"""
+import argparse
+import sqlite3
+import threading
+from datetime import date
+
+# Share of a budget at which a warning is raised
+WARNING_SHARE = 0.8
+
+def current_month():
+    """This month as YYYY-MM"""
+    return date.today().isoformat()[:7]
+
+def month_status(connection, username, month=None):
+    """[(category, budget, spent)] for every goal the user has, in category order"""
+    return connection.execute("""
+        SELECT b.category, b.amount, COALESCE(t.total_paise, 0) / 100.0
+        FROM budget_goals b
+        LEFT JOIN monthly_category_totals t
+            ON t.username = b.username AND t.month = ? AND t.category = b.category
+        WHERE b.username = ?
+        ORDER BY b.category
+    """, (month or current_month(), username)).fetchall()
+
+def describe(category, budget, spent):
+    """Status dict for one goal"""
+    return {
+        'category': category,
+        'budget': budget,
+        'spent': spent,
+        'remaining': budget - spent,
+        'share': spent / budget if budget else 0.0,
+    }
+
+def crossed(budget, before, after):
+    """'exceeded', 'warning' or None for spend moving from before to after"""
+    if not budget:
+        return None
+    if before <= budget < after:
+        return 'exceeded'
+    if before < budget * WARNING_SHARE <= after <= budget:
+        return 'warning'
+    return None
+
+
+class BudgetTracker:
+    """Per-user running month-to-date totals for budgeted categories"""
+
+    def __init__(self):
+        # username -> (month, {category: [budget, spent]})
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def load(self, connection, username):
+        """Make sure this month's totals are cached for the user"""
+        month = current_month()
+        with self._lock:
+            entry = self._entries.get(username)
+        if entry is None or entry[0] != month:
+            totals = {
+                category: [budget, spent]
+                for category, budget, spent in month_status(connection, username, month)
+            }
+            with self._lock:
+                self._entries[username] = (month, totals)
+
+    def record(self, username, category, amount, expense_date):
+        """Add a new expense to the cached totals; returns an alert dict or None
+
+        load() must have been called for the user this month, before the
+        expense was inserted.
+        """
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[0] != expense_date[:7] or category not in entry[1]:
+                return None
+            totals = entry[1][category]
+            budget, before = totals
+            totals[1] = before + amount
+        level = crossed(budget, before, before + amount)
+        if level is None:
+            return None
+        alert = describe(category, budget, before + amount)
+        alert['level'] = level
+        return alert
+
+    def invalidate(self, username):
+        """Forget a user's totals after changes not made through record()"""
+        with self._lock:
+            self._entries.pop(username, None)
+
+if __name__ == "__main__":
+    from db_config import DB_PATH, ensure_database
+
+    parser = argparse.ArgumentParser(description="Compare budget goals with this month's spending")
+    parser.add_argument('--user', required=True)
+    parser.add_argument('--month', help="YYYY-MM, default this month")
+    parser.add_argument('--db', default=DB_PATH, help="database file")
+    args = parser.parse_args()
+
+    ensure_database(args.db)
+    connection = sqlite3.connect(args.db)
+    try:
+        rows = month_status(connection, args.user, args.month)
+    finally:
+        connection.close()
+    for category, budget, spent in rows:
+        status = describe(category, budget, spent)
+        print(f"{category:<16}{spent:>12.2f} of {budget:>10.2f}  ({status['share'] * 100:.0f}%)")
@@ -0,0 +1,154 @@
+"""Suggest an expense category from its description.
+
+A CategoryIndex maps each description token to how often it appeared under
+each category in the user's own history. A suggestion scores every category
+by summing, over the description's tokens, the share of that token's uses
+that fell in the category, so distinctive words ("uber", "netflix") outvote
+common ones ("payment"). Only the description's own tokens are looked up, so
+a suggestion costs a few dictionary reads whatever the size of the history.
+
+The index is built with one pass over the user's expenses and then kept
+current with add() and remove() as expenses change.
+
+Usage: python categorizer.py --user USERNAME DESCRIPTION [--db PATH]
+"""
+import argparse
+import bisect
+import re
+import sqlite3
+
+import storage
+
+TOKEN = re.compile(r"[a-z][a-z0-9]+")
+
+# A partly typed last word is matched against known words with this prefix
+MIN_PREFIX = 3
+
+def tokenize(description):
+    """Distinct lower-case words of two or more characters, in order"""
+    return list(dict.fromkeys(TOKEN.findall((description or '').lower())))
+
+
+class CategoryIndex:
+    """Token -> {category: count} built from (description, category) pairs"""
+
+    def __init__(self):
+        self.tokens = {}
+        self.categories = {}
+        self._sorted_tokens = []
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def add(self, description, category, count=1):
+        """Count description's tokens under category"""
+        for token in self._count(description, category, count):
+            bisect.insort(self._sorted_tokens, token)
+
+    def add_many(self, rows):
+        """add() each (description, category, count), sorting new words once at the end"""
+        for description, category, count in rows:
+            self._count(description, category, count)
+        self._sorted_tokens = sorted(self.tokens)
+
+    def _count(self, description, category, count):
+        """Update the counts; returns the tokens seen for the first time"""
+        if not category:
+            return []
+        # One shared string per category keeps the per-token dicts small
+        category = self.categories.setdefault(category, category)
+        new_tokens = []
+        for token in tokenize(description):
+            counts = self.tokens.get(token)
+            if counts is None:
+                counts = self.tokens[token] = {}
+                new_tokens.append(token)
+            counts[category] = counts.get(category, 0) + count
+        return new_tokens
+
+    def remove(self, description, category, count=1):
+        """Undo add() for an expense that was deleted"""
+        for token in tokenize(description):
+            counts = self.tokens.get(token)
+            if counts is None or category not in counts:
+                continue
+            counts[category] -= count
+            if counts[category] <= 0:
+                del counts[category]
+            if not counts:
+                del self.tokens[token]
+                index = bisect.bisect_left(self._sorted_tokens, token)
+                del self._sorted_tokens[index]
+
+    def _prefix_counts(self, prefix):
+        """Summed counts of every known token starting with prefix"""
+        merged = {}
+        index = bisect.bisect_left(self._sorted_tokens, prefix)
+        # Cap the scan so a short prefix cannot touch the whole vocabulary
+        for token in self._sorted_tokens[index:index + 50]:
+            if not token.startswith(prefix):
+                break
+            for category, count in self.tokens[token].items():
+                merged[category] = merged.get(category, 0) + count
+        return merged
+
+    def scores(self, description, partial=False):
+        """{category: score}; with partial the last word may be unfinished"""
+        words = tokenize(description)
+        scores = {}
+        for position, token in enumerate(words):
+            counts = self.tokens.get(token)
+            if counts is None and partial and position == len(words) - 1 and len(token) >= MIN_PREFIX:
+                counts = self._prefix_counts(token)
+            if not counts:
+                continue
+            uses = sum(counts.values())
+            for category, count in counts.items():
+                scores[category] = scores.get(category, 0.0) + count / uses
+        return scores
+
+    def suggest(self, description, partial=False):
+        """(category, confidence between 0 and 1), or (None, 0.0) if no word is known"""
+        scores = self.scores(description, partial)
+        if not scores:
+            return None, 0.0
+        category = max(scores, key=scores.get)
+        return category, scores[category] / sum(scores.values())
+
+    def categorize(self, description):
+        """The suggested category or None, for statement_importer's categorize hook"""
+        return self.suggest(description)[0]
+
+
+def build_index(connection, username):
+    """CategoryIndex over all of the user's described expenses"""
+    index = CategoryIndex()
+    # Identical descriptions are counted once each by SQLite, not by Python
+    index.add_many(connection.execute(f"""
+        SELECT e.description, c.name, COUNT(*)
+        FROM {storage.EXPENSE_TABLES}
+        WHERE e.user_id = {storage.USER_ID} AND e.description IS NOT NULL AND e.description != ''
+        GROUP BY e.description, e.category_id
+    """, (username,)))
+    return index
+
+if __name__ == "__main__":
+    from db_config import DB_PATH, ensure_database
+
+    parser = argparse.ArgumentParser(description="Suggest a category for an expense description")
+    parser.add_argument('description')
+    parser.add_argument('--user', required=True)
+    parser.add_argument('--db', default=DB_PATH, help="database file")
+    args = parser.parse_args()
+
+    ensure_database(args.db)
+    connection = sqlite3.connect(args.db)
+    try:
+        index = build_index(connection, args.user)
+    finally:
+        connection.close()
+    category, confidence = index.suggest(args.description)
+    if category is None:
+        print("No suggestion: none of these words appear in your history")
+    else:
+        print(f"{category} ({confidence * 100:.0f}% confident)")
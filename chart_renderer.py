@@ -0,0 +1,172 @@
+"""Reusable chart slots for the Insights screen.
+
+Each slot owns one matplotlib Figure and one Tk canvas for the life of the
+app. Revisiting a chart updates the existing artists in place instead of
+building a new figure, and nothing goes through pyplot, so no figures pile up
+in pyplot's global registry. Tk is only imported when a chart is attached to
+a window, so batch jobs can draw the same charts headless with Agg.
+"""
+import math
+
+from matplotlib.figure import Figure
+
+
+class ChartSlot:
+    """One Figure and canvas reused every time its chart is shown"""
+
+    def __init__(self, root, figsize=(8, 6)):
+        self.root = root
+        self.figure = Figure(figsize=figsize, tight_layout=True)
+        self.ax = self.figure.add_subplot()
+        self.canvas = None
+        self.data = None
+
+    def attach(self, parent_frame):
+        """Show the canvas inside parent_frame
+
+        The canvas widget is a child of the root window and is only packed
+        into the screen's frame, so it survives when that screen is destroyed.
+        """
+        if self.canvas is None:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.canvas = FigureCanvasTkAgg(self.figure, master=self.root)
+        widget = self.canvas.get_tk_widget()
+        widget.pack(in_=parent_frame, fill='both', expand=True)
+        widget.lift()
+
+    def draw(self):
+        """Redraw after the artists changed"""
+        if self.canvas is not None:
+            self.canvas.draw_idle()
+        else:
+            self.figure.canvas.draw_idle()
+
+
+class PieChart(ChartSlot):
+    """Pie chart whose wedges are moved rather than recreated"""
+
+    def __init__(self, root, title, figsize=(8, 6)):
+        super().__init__(root, figsize)
+        self.title = title
+        self._wedges = []
+        self._labels = []
+        self._percents = []
+
+    def update(self, labels, values):
+        """Show new data; returns False if it was already on screen"""
+        labels = list(labels)
+        values = [float(value) for value in values]
+        if self.data == (labels, values):
+            return False
+
+        total = sum(values)
+        if len(self._wedges) == len(values) and total > 0:
+            # Same number of slices: re-angle the existing wedges and texts
+            theta = 0.0
+            for wedge, label_text, percent_text, label, value in zip(
+                self._wedges, self._labels, self._percents, labels, values
+            ):
+                theta2 = theta + 360.0 * value / total
+                wedge.set_theta1(theta)
+                wedge.set_theta2(theta2)
+                middle = math.radians((theta + theta2) / 2)
+                x, y = math.cos(middle), math.sin(middle)
+                label_text.set_text(label)
+                label_text.set_position((1.1 * x, 1.1 * y))
+                label_text.set_horizontalalignment('left' if x > 0 else 'right')
+                percent_text.set_text(f"{100.0 * value / total:.1f}%")
+                percent_text.set_position((0.6 * x, 0.6 * y))
+                theta = theta2
+        else:
+            self.ax.clear()
+            self._wedges, self._labels, self._percents = self.ax.pie(
+                values, labels=labels, autopct='%1.1f%%'
+            )
+            self.ax.set_title(self.title)
+
+        self.data = (labels, values)
+        self.draw()
+        return True
+
+
+class LineChart(ChartSlot):
+    """Line chart whose single line is updated with set_data"""
+
+    def __init__(self, root, title, xlabel, ylabel, figsize=(8, 6)):
+        super().__init__(root, figsize)
+        (self._line,) = self.ax.plot([], [], marker='o')
+        self.ax.set_title(title)
+        self.ax.set_xlabel(xlabel)
+        self.ax.set_ylabel(ylabel)
+
+    def update(self, labels, values):
+        """Show new data; returns False if it was already on screen"""
+        labels = list(labels)
+        values = [float(value) for value in values]
+        if self.data == (labels, values):
+            return False
+
+        positions = list(range(len(labels)))
+        self._line.set_data(positions, values)
+        self.ax.set_xticks(positions)
+        self.ax.set_xticklabels(labels, rotation=45)
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+        self.data = (labels, values)
+        self.draw()
+        return True
+
+
+class ForecastChart(ChartSlot):
+    """Actual monthly totals followed by a dashed forecast line"""
+
+    def __init__(self, root, title, xlabel, ylabel, figsize=(8, 6)):
+        super().__init__(root, figsize)
+        (self._actual,) = self.ax.plot([], [], marker='o', label="Actual")
+        (self._forecast,) = self.ax.plot([], [], marker='o', linestyle='--', label="Forecast")
+        self.ax.set_title(title)
+        self.ax.set_xlabel(xlabel)
+        self.ax.set_ylabel(ylabel)
+        self.ax.legend()
+
+    def update(self, labels, actual, forecast):
+        """Show len(actual) months of history then len(forecast) forecast months
+
+        The forecast line starts at the last actual point so the two join up.
+        Returns False if the data was already on screen.
+        """
+        labels = list(labels)
+        actual = [float(value) for value in actual]
+        forecast = [float(value) for value in forecast]
+        if self.data == (labels, actual, forecast):
+            return False
+
+        positions = list(range(len(labels)))
+        self._actual.set_data(positions[:len(actual)], actual)
+        joined = actual[-1:] + forecast
+        start = len(actual) - len(actual[-1:])
+        self._forecast.set_data(positions[start:start + len(joined)], joined)
+        self.ax.set_xticks(positions)
+        self.ax.set_xticklabels(labels, rotation=45)
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+        self.data = (labels, actual, forecast)
+        self.draw()
+        return True
+
+
+class ChartRenderer:
+    """Registry of chart slots, created on first use"""
+
+    def __init__(self, root):
+        self.root = root
+        self._slots = {}
+
+    def slot(self, name, factory):
+        """Return the slot called name, creating it with factory(root) once"""
+        slot = self._slots.get(name)
+        if slot is None:
+            slot = self._slots[name] = factory(self.root)
+        return slot
@@ -2,12 +2,67 @@ import os
 import sqlite3
 import sys
 
+from db_migrations import migrate
+
 # Define the path to the data directory
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
 
 # Define the database path
 DB_PATH = os.path.join(DATA_DIR, 'expense_tracker.db')
 
+# Connection settings, from the most durable to the fastest. All use
+# write-ahead logging so readers never block the writer or each other.
+#   safe:     every commit is fsynced before it returns
+#   balanced: the WAL is fsynced at checkpoints; a power cut can lose the
+#             last few commits but never corrupts the database
+#   fast:     no fsyncs at all; for imports and benchmarks on data you can rebuild
+DB_PROFILES = {
+    'safe': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -8192,           # KiB, so 8 MiB
+        'mmap_size': 0,
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': 1000,    # pages
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -32768,
+        'mmap_size': 128 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': 1000,
+    },
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -65536,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'wal_autocheckpoint': 4000,
+    },
+}
+
+# Profile used by the app; set EXPENSE_TRACKER_DB_PROFILE to override
+DB_PROFILE = os.environ.get('EXPENSE_TRACKER_DB_PROFILE', 'balanced')
+
+def apply_profile(connection, profile=None):
+    """Apply a DB_PROFILES entry to a freshly opened connection"""
+    profile = profile or DB_PROFILE
+    if profile not in DB_PROFILES:
+        raise ValueError(f"Unknown database profile {profile!r}, expected one of {', '.join(DB_PROFILES)}")
+    for pragma, value in DB_PROFILES[profile].items():
+        connection.execute(f"PRAGMA {pragma} = {value}")
+    return connection
+
+def maintain(connection):
+    """Fold the WAL back into the database and refresh planner statistics
+
+    Run now and then on an idle connection, and before closing the app.
+    """
+    connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+    connection.execute("PRAGMA optimize")
+
 def get_db_path():
     # Get the directory where the executable/script is located
     if getattr(sys, 'frozen', False):
@@ -21,65 +76,32 @@ def get_db_path():
     
     return os.path.join(data_dir, 'expense_tracker.db')
 
-def initialize_database():
-    """Create database and tables if they don't exist"""
-    connection = sqlite3.connect(DB_PATH)
-    cursor = connection.cursor()
-    
-    # Create users table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            username TEXT PRIMARY KEY,
-            password TEXT NOT NULL,
-            income REAL DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # Create expenses table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS expenses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT,
-            date DATE NOT NULL,
-            category TEXT NOT NULL,
-            amount REAL NOT NULL,
-            description TEXT,
-            receipt_image BLOB,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (username) REFERENCES users(username)
-        )
-    """)
-    
-    # Create recurring expenses table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS recurring_expenses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT,
-            amount REAL,
-            frequency TEXT,
-            description TEXT,
-            next_date DATE,
-            FOREIGN KEY (username) REFERENCES users(username)
-        )
-    """)
-    
-    # Create budget goals table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS budget_goals (
-            username TEXT,
-            category TEXT,
-            amount REAL,
-            PRIMARY KEY (username, category),
-            FOREIGN KEY (username) REFERENCES users(username)
-        )
-    """)
-    
-    connection.commit()
-    connection.close()
+# Database paths whose schema has already been applied in this process
+_initialized_paths = set()
+
+def initialize_database(connection=None):
+    """Create database and tables if they don't exist, then apply pending migrations"""
+    owns_connection = connection is None
+    if owns_connection:
+        connection = sqlite3.connect(DB_PATH)
+    migrate(connection)
+    if owns_connection:
+        connection.close()
+
+def ensure_database(db_path=DB_PATH):
+    """Apply the schema once per process instead of before every connection"""
+    if db_path in _initialized_paths:
+        return
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    connection = sqlite3.connect(db_path)
+    try:
+        initialize_database(connection)
+    finally:
+        connection.close()
+    _initialized_paths.add(db_path)
 
 def get_db_connection():
-    initialize_database()  # Ensure database exists
+    ensure_database()  # Ensure database exists
     try:
         connection = sqlite3.connect(DB_PATH)
         connection.row_factory = sqlite3.Row
@@ -0,0 +1,637 @@
+"""Versioned schema migrations tracked with PRAGMA user_version.
+
+Each migration runs in its own transaction and bumps user_version, so a
+database only ever applies the steps it has not seen yet.
+"""
+import hashlib
+import os
+import sqlite3
+import sys
+
+import aggregates
+import storage
+
+def _columns(cursor, table):
+    """Return the column names of a table"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cursor.fetchall()}
+
+def _base_schema(cursor):
+    """Create the tables and bring older layouts up to the same columns"""
+    # Create users table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            password TEXT NOT NULL,
+            income REAL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Create expenses table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT,
+            date DATE NOT NULL,
+            category TEXT NOT NULL,
+            amount REAL NOT NULL,
+            description TEXT,
+            receipt_image BLOB,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (username) REFERENCES users(username)
+        )
+    """)
+
+    # Create recurring expenses table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS recurring_expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT,
+            amount REAL,
+            frequency TEXT,
+            description TEXT,
+            next_date DATE,
+            FOREIGN KEY (username) REFERENCES users(username)
+        )
+    """)
+
+    # Create budget goals table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS budget_goals (
+            username TEXT,
+            category TEXT,
+            amount REAL,
+            PRIMARY KEY (username, category),
+            FOREIGN KEY (username) REFERENCES users(username)
+        )
+    """)
+
+    # Databases created by db_setup.py or older desktop builds lack some columns.
+    # ALTER TABLE cannot add a CURRENT_TIMESTAMP default, so created_at stays NULL there.
+    if 'created_at' not in _columns(cursor, 'users'):
+        cursor.execute("ALTER TABLE users ADD COLUMN created_at TIMESTAMP")
+    expense_columns = _columns(cursor, 'expenses')
+    if 'receipt_image' not in expense_columns:
+        cursor.execute("ALTER TABLE expenses ADD COLUMN receipt_image BLOB")
+    if 'created_at' not in expense_columns:
+        cursor.execute("ALTER TABLE expenses ADD COLUMN created_at TIMESTAMP")
+
+def _expense_indexes(cursor):
+    """Covering indexes for the per-user list, trend, calendar and category queries"""
+    # List screen, monthly trend and calendar: WHERE username = ? ORDER BY / GROUP BY date
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_expenses_user_date
+        ON expenses (username, date, amount)
+    """)
+    # Category distribution and budget comparisons
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_expenses_user_category_date
+        ON expenses (username, category, date, amount)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_recurring_next_date
+        ON recurring_expenses (next_date)
+    """)
+    cursor.execute("ANALYZE")
+
+def _keyset_index(cursor):
+    """Order the date index by (date, id) so list pages can seek instead of sort"""
+    cursor.execute("DROP INDEX IF EXISTS idx_expenses_user_date")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_expenses_user_date_id
+        ON expenses (username, date, id, amount)
+    """)
+
+def _summary_tables(cursor):
+    """Daily and monthly-per-category totals maintained by triggers"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_totals (
+            username TEXT NOT NULL,
+            date TEXT NOT NULL,
+            total REAL NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (username, date)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS monthly_category_totals (
+            username TEXT NOT NULL,
+            month TEXT NOT NULL,
+            category TEXT NOT NULL,
+            total REAL NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (username, month, category)
+        ) WITHOUT ROWID
+    """)
+
+    # Add a row's amount to its day and month buckets
+    add_row = """
+        INSERT INTO daily_totals (username, date, total, count)
+        VALUES (NEW.username, COALESCE(NEW.date, ''), NEW.amount, 1)
+        ON CONFLICT (username, date) DO UPDATE
+        SET total = total + excluded.total, count = count + 1;
+
+        INSERT INTO monthly_category_totals (username, month, category, total, count)
+        VALUES (NEW.username, COALESCE(substr(NEW.date, 1, 7), ''),
+                COALESCE(NEW.category, ''), NEW.amount, 1)
+        ON CONFLICT (username, month, category) DO UPDATE
+        SET total = total + excluded.total, count = count + 1;
+    """
+    # Take it back out, dropping buckets that become empty
+    remove_row = """
+        UPDATE daily_totals
+        SET total = total - OLD.amount, count = count - 1
+        WHERE username = OLD.username AND date = COALESCE(OLD.date, '');
+
+        DELETE FROM daily_totals
+        WHERE username = OLD.username AND date = COALESCE(OLD.date, '') AND count <= 0;
+
+        UPDATE monthly_category_totals
+        SET total = total - OLD.amount, count = count - 1
+        WHERE username = OLD.username
+          AND month = COALESCE(substr(OLD.date, 1, 7), '')
+          AND category = COALESCE(OLD.category, '');
+
+        DELETE FROM monthly_category_totals
+        WHERE username = OLD.username
+          AND month = COALESCE(substr(OLD.date, 1, 7), '')
+          AND category = COALESCE(OLD.category, '')
+          AND count <= 0;
+    """
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_totals_insert
+        AFTER INSERT ON expenses
+        WHEN NEW.username IS NOT NULL AND NEW.amount IS NOT NULL
+        BEGIN {add_row} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_totals_delete
+        AFTER DELETE ON expenses
+        WHEN OLD.username IS NOT NULL AND OLD.amount IS NOT NULL
+        BEGIN {remove_row} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_totals_update_old
+        AFTER UPDATE OF username, date, category, amount ON expenses
+        WHEN OLD.username IS NOT NULL AND OLD.amount IS NOT NULL
+        BEGIN {remove_row} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_totals_update_new
+        AFTER UPDATE OF username, date, category, amount ON expenses
+        WHEN NEW.username IS NOT NULL AND NEW.amount IS NOT NULL
+        BEGIN {add_row} END
+    """)
+
+    # Backfill from the expenses already stored
+    cursor.execute("""
+        INSERT INTO daily_totals (username, date, total, count)
+        SELECT username, COALESCE(date, ''), SUM(amount), COUNT(*)
+        FROM expenses
+        GROUP BY username, COALESCE(date, '')
+    """)
+    cursor.execute("""
+        INSERT INTO monthly_category_totals (username, month, category, total, count)
+        SELECT username, COALESCE(substr(date, 1, 7), ''), COALESCE(category, ''),
+               SUM(amount), COUNT(*)
+        FROM expenses
+        GROUP BY username, COALESCE(substr(date, 1, 7), ''), COALESCE(category, '')
+    """)
+
+def _recurring_schedule(cursor):
+    """Anchor recurring expenses to a start date and link the expenses they create"""
+    columns = _columns(cursor, 'recurring_expenses')
+    if 'category' not in columns:
+        cursor.execute("ALTER TABLE recurring_expenses ADD COLUMN category TEXT DEFAULT 'Other'")
+    # Occurrence k falls on a date computed from start_date, so short months
+    # never pull later occurrences earlier
+    if 'start_date' not in columns:
+        cursor.execute("ALTER TABLE recurring_expenses ADD COLUMN start_date DATE")
+    if 'occurrences' not in columns:
+        cursor.execute("ALTER TABLE recurring_expenses ADD COLUMN occurrences INTEGER NOT NULL DEFAULT 0")
+    cursor.execute("UPDATE recurring_expenses SET start_date = next_date WHERE start_date IS NULL")
+
+    if 'recurring_id' not in _columns(cursor, 'expenses'):
+        cursor.execute("ALTER TABLE expenses ADD COLUMN recurring_id INTEGER")
+    # At most one expense per schedule and date, however often catch-up runs
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_expenses_recurring
+        ON expenses (recurring_id, date)
+        WHERE recurring_id IS NOT NULL
+    """)
+
+def _forecast_models(cursor):
+    """Fitted per-category forecast models, kept between runs"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS forecast_models (
+            username TEXT NOT NULL,
+            category TEXT NOT NULL,
+            first_month INTEGER NOT NULL,
+            trained_through INTEGER NOT NULL,
+            trained_total REAL NOT NULL,
+            state TEXT NOT NULL,
+            PRIMARY KEY (username, category)
+        ) WITHOUT ROWID
+    """)
+
+def _deleted_expenses(cursor):
+    """Journal of deleted expenses for undo, see deletion_journal"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS deleted_expenses (
+            id INTEGER PRIMARY KEY,
+            batch INTEGER NOT NULL,
+            deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            username TEXT,
+            date DATE,
+            category TEXT,
+            amount REAL,
+            description TEXT,
+            receipt_image BLOB,
+            created_at TIMESTAMP,
+            recurring_id INTEGER
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_deleted_expenses_user_batch
+        ON deleted_expenses (username, batch)
+    """)
+
+def _storage_v2(cursor):
+    """Integer-encoded expenses: user ids, a categories table, day numbers and paise
+
+    See storage for the layout. Rows are copied into new tables in one pass;
+    usernames that only appear on expenses get a user row that cannot log in,
+    so no expense is dropped. A date SQLite cannot parse becomes a NULL day.
+    """
+    cursor.execute("""
+        CREATE TABLE users_v2 (
+            id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL,
+            income REAL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO users_v2 (username, password, income, created_at)
+        SELECT username, password, income, created_at
+        FROM users
+        WHERE username IS NOT NULL
+        ORDER BY rowid
+    """)
+    cursor.execute("""
+        INSERT INTO users_v2 (username, password)
+        SELECT username, '' FROM expenses WHERE username IS NOT NULL
+        UNION
+        SELECT username, '' FROM deleted_expenses WHERE username IS NOT NULL
+        EXCEPT
+        SELECT username, '' FROM users_v2
+    """)
+    cursor.execute("DROP TABLE users")
+    cursor.execute("ALTER TABLE users_v2 RENAME TO users")
+
+    cursor.execute("""
+        CREATE TABLE categories (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO categories (name)
+        SELECT category FROM expenses WHERE category IS NOT NULL
+        UNION
+        SELECT category FROM deleted_expenses WHERE category IS NOT NULL
+    """)
+
+    # Encoded columns of an old expenses (or deleted_expenses) row o
+    encoded = f"""
+        u.id, {storage.day_sql('o.date')}, c.id, CAST(round(o.amount * 100) AS INTEGER)
+    """
+    lookups = """
+        LEFT JOIN users u ON u.username = o.username
+        LEFT JOIN categories c ON c.name = o.category
+    """
+    # AUTOINCREMENT must not hand out ids of deleted expenses that undo can restore
+    sequence = cursor.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'expenses'"
+    ).fetchone()
+    cursor.execute("""
+        CREATE TABLE expenses_v2 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER REFERENCES users(id),
+            day INTEGER,
+            category_id INTEGER REFERENCES categories(id),
+            amount_paise INTEGER,
+            description TEXT,
+            receipt_image BLOB,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            recurring_id INTEGER
+        )
+    """)
+    cursor.execute(f"""
+        INSERT INTO expenses_v2
+            (id, user_id, day, category_id, amount_paise,
+             description, receipt_image, created_at, recurring_id)
+        SELECT o.id, {encoded}, o.description, o.receipt_image, o.created_at, o.recurring_id
+        FROM expenses o {lookups}
+        ORDER BY o.id
+    """)
+    # Also drops the old indexes and summary triggers
+    cursor.execute("DROP TABLE expenses")
+    cursor.execute("ALTER TABLE expenses_v2 RENAME TO expenses")
+    if sequence:
+        cursor.execute(
+            "UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'expenses'", sequence
+        )
+
+    cursor.execute("""
+        CREATE TABLE deleted_expenses_v2 (
+            id INTEGER PRIMARY KEY,
+            batch INTEGER NOT NULL,
+            deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            user_id INTEGER,
+            day INTEGER,
+            category_id INTEGER,
+            amount_paise INTEGER,
+            description TEXT,
+            receipt_image BLOB,
+            created_at TIMESTAMP,
+            recurring_id INTEGER
+        )
+    """)
+    cursor.execute(f"""
+        INSERT INTO deleted_expenses_v2
+            (id, batch, deleted_at, user_id, day, category_id, amount_paise,
+             description, receipt_image, created_at, recurring_id)
+        SELECT o.id, o.batch, o.deleted_at, {encoded},
+               o.description, o.receipt_image, o.created_at, o.recurring_id
+        FROM deleted_expenses o {lookups}
+    """)
+    cursor.execute("DROP TABLE deleted_expenses")
+    cursor.execute("ALTER TABLE deleted_expenses_v2 RENAME TO deleted_expenses")
+    cursor.execute("""
+        CREATE INDEX idx_deleted_expenses_user_batch
+        ON deleted_expenses (user_id, batch)
+    """)
+
+    # Same access paths as before, on the integer columns
+    cursor.execute("""
+        CREATE INDEX idx_expenses_user_day_id
+        ON expenses (user_id, day, id, amount_paise)
+    """)
+    cursor.execute("""
+        CREATE INDEX idx_expenses_user_category_day
+        ON expenses (user_id, category_id, day, amount_paise)
+    """)
+    cursor.execute("""
+        CREATE UNIQUE INDEX idx_expenses_recurring
+        ON expenses (recurring_id, day)
+        WHERE recurring_id IS NOT NULL
+    """)
+
+    # Summary tables keep their text keys but total whole paise
+    cursor.execute("DROP TABLE daily_totals")
+    cursor.execute("DROP TABLE monthly_category_totals")
+    cursor.execute("""
+        CREATE TABLE daily_totals (
+            username TEXT NOT NULL,
+            date TEXT NOT NULL,
+            total_paise INTEGER NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (username, date)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE monthly_category_totals (
+            username TEXT NOT NULL,
+            month TEXT NOT NULL,
+            category TEXT NOT NULL,
+            total_paise INTEGER NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (username, month, category)
+        ) WITHOUT ROWID
+    """)
+
+    _summary_triggers(cursor)
+    aggregates.rebuild(cursor.connection)
+    cursor.execute("ANALYZE")
+
+def _summary_triggers(cursor):
+    """Triggers that keep daily_totals and monthly_category_totals in step with expenses
+
+    An expense whose user_id has no users row has no username to total
+    under, so it is left out, as aggregates.rebuild leaves it out.
+    """
+    for name in ('insert', 'delete', 'update_old', 'update_new'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_expenses_totals_{name}")
+
+    # Bucket keys of a row r (NEW or OLD), as the summary tables spell them
+    def keys(r):
+        return {
+            'username': f"(SELECT username FROM users WHERE id = {r}.user_id)",
+            'date': f"COALESCE({storage.date_sql(f'{r}.day')}, '')",
+            'month': f"COALESCE(substr({storage.date_sql(f'{r}.day')}, 1, 7), '')",
+            'category': f"COALESCE((SELECT name FROM categories WHERE id = {r}.category_id), '')",
+        }
+    new, old = keys('NEW'), keys('OLD')
+    add_row = f"""
+        INSERT INTO daily_totals (username, date, total_paise, count)
+        SELECT {new['username']}, {new['date']}, NEW.amount_paise, 1
+        WHERE {new['username']} IS NOT NULL
+        ON CONFLICT (username, date) DO UPDATE
+        SET total_paise = total_paise + excluded.total_paise, count = count + 1;
+
+        INSERT INTO monthly_category_totals (username, month, category, total_paise, count)
+        SELECT {new['username']}, {new['month']}, {new['category']}, NEW.amount_paise, 1
+        WHERE {new['username']} IS NOT NULL
+        ON CONFLICT (username, month, category) DO UPDATE
+        SET total_paise = total_paise + excluded.total_paise, count = count + 1;
+    """
+    remove_row = f"""
+        UPDATE daily_totals
+        SET total_paise = total_paise - OLD.amount_paise, count = count - 1
+        WHERE username = {old['username']} AND date = {old['date']};
+
+        DELETE FROM daily_totals
+        WHERE username = {old['username']} AND date = {old['date']} AND count <= 0;
+
+        UPDATE monthly_category_totals
+        SET total_paise = total_paise - OLD.amount_paise, count = count - 1
+        WHERE username = {old['username']}
+          AND month = {old['month']}
+          AND category = {old['category']};
+
+        DELETE FROM monthly_category_totals
+        WHERE username = {old['username']}
+          AND month = {old['month']}
+          AND category = {old['category']}
+          AND count <= 0;
+    """
+    cursor.execute(f"""
+        CREATE TRIGGER trg_expenses_totals_insert
+        AFTER INSERT ON expenses
+        WHEN NEW.user_id IS NOT NULL AND NEW.amount_paise IS NOT NULL
+        BEGIN {add_row} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER trg_expenses_totals_delete
+        AFTER DELETE ON expenses
+        WHEN OLD.user_id IS NOT NULL AND OLD.amount_paise IS NOT NULL
+        BEGIN {remove_row} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER trg_expenses_totals_update_old
+        AFTER UPDATE OF user_id, day, category_id, amount_paise ON expenses
+        WHEN OLD.user_id IS NOT NULL AND OLD.amount_paise IS NOT NULL
+        BEGIN {remove_row} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER trg_expenses_totals_update_new
+        AFTER UPDATE OF user_id, day, category_id, amount_paise ON expenses
+        WHEN NEW.user_id IS NOT NULL AND NEW.amount_paise IS NOT NULL
+        BEGIN {add_row} END
+    """)
+
+def _receipts(cursor):
+    """Receipt images in their own table, see receipts"""
+    # image comes last: reading any other column never touches its overflow pages
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS receipts (
+            id INTEGER PRIMARY KEY,
+            sha256 TEXT NOT NULL UNIQUE,
+            format TEXT,
+            width INTEGER,
+            height INTEGER,
+            size INTEGER NOT NULL,
+            thumbnail BLOB,
+            image BLOB NOT NULL
+        )
+    """)
+    for table in ('expenses', 'deleted_expenses'):
+        if 'receipt_id' not in _columns(cursor, table):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN receipt_id INTEGER")
+        # Lets receipts.prune check references without scanning every expense
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{table}_receipt
+            ON {table} (receipt_id)
+            WHERE receipt_id IS NOT NULL
+        """)
+
+    # Images stored inline by older builds move to the new table; their
+    # thumbnails are made the first time they are shown
+    for table in ('expenses', 'deleted_expenses'):
+        cursor.execute(f"SELECT id FROM {table} WHERE receipt_image IS NOT NULL")
+        for (expense_id,) in cursor.fetchall():
+            image = cursor.execute(
+                f"SELECT receipt_image FROM {table} WHERE id = ?", (expense_id,)
+            ).fetchone()[0]
+            sha256 = hashlib.sha256(image).hexdigest()
+            cursor.execute("""
+                INSERT OR IGNORE INTO receipts (sha256, size, image) VALUES (?, ?, ?)
+            """, (sha256, len(image), image))
+            cursor.execute(f"""
+                UPDATE {table}
+                SET receipt_id = (SELECT id FROM receipts WHERE sha256 = ?), receipt_image = NULL
+                WHERE id = ?
+            """, (sha256, expense_id))
+
+def _expense_versions(cursor):
+    """Per-user counter bumped by every change to the user's expenses"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS expense_versions (
+            user_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    def bump(r):
+        return f"""
+            INSERT INTO expense_versions (user_id, version) VALUES ({r}.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        """
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_version_insert
+        AFTER INSERT ON expenses
+        WHEN NEW.user_id IS NOT NULL
+        BEGIN {bump('NEW')} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_version_delete
+        AFTER DELETE ON expenses
+        WHEN OLD.user_id IS NOT NULL
+        BEGIN {bump('OLD')} END
+    """)
+    # Moving an expense to another user changes both users' expenses
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_version_update_old
+        AFTER UPDATE OF user_id, day, category_id, amount_paise ON expenses
+        WHEN OLD.user_id IS NOT NULL
+        BEGIN {bump('OLD')} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_version_update_new
+        AFTER UPDATE OF user_id, day, category_id, amount_paise ON expenses
+        WHEN NEW.user_id IS NOT NULL AND NEW.user_id IS NOT OLD.user_id
+        BEGIN {bump('NEW')} END
+    """)
+
+def _sort_day_index(cursor):
+    """Keyset index for the expense list that also covers expenses without a day"""
+    # The expression must match expense_pager's date sort
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_expenses_user_sort_day
+        ON expenses (user_id, COALESCE(day, -2147483648), id)
+    """)
+
+# (version, description, step) in the order they must be applied
+MIGRATIONS = [
+    (1, "Base schema", _base_schema),
+    (2, "Covering indexes on expenses", _expense_indexes),
+    (3, "Keyset index for the paged expense list", _keyset_index),
+    (4, "Trigger-maintained daily and monthly summary tables", _summary_tables),
+    (5, "Recurring expense schedules", _recurring_schedule),
+    (6, "Persisted forecast models", _forecast_models),
+    (7, "Undo journal for deleted expenses", _deleted_expenses),
+    (8, "Integer-encoded expense storage (v2)", _storage_v2),
+    (9, "Receipt images outside the expenses table", _receipts),
+    (10, "Per-user expense change counter", _expense_versions),
+    (11, "Keyset index for expenses with or without a day", _sort_day_index),
+    (12, "Summary triggers that skip expenses without a user", _summary_triggers),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_version(connection):
+    """Return the schema version stored in the database"""
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(connection, target=LATEST_VERSION):
+    """Apply every pending migration up to target and return the new version"""
+    version = get_version(connection)
+    for number, description, step in MIGRATIONS:
+        if number <= version or number > target:
+            continue
+        cursor = connection.cursor()
+        try:
+            cursor.execute("BEGIN")
+            step(cursor)
+            # PRAGMA does not accept bound parameters
+            cursor.execute(f"PRAGMA user_version = {int(number)}")
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        version = number
+    return version
+
+if __name__ == "__main__":
+    from db_config import DB_PATH, DATA_DIR
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    connection = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
+    try:
+        before = get_version(connection)
+        after = migrate(connection)
+        print(f"Schema version {before} -> {after}")
+    finally:
+        connection.close()
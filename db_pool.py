@@ -0,0 +1,116 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from queue import LifoQueue, Empty, Full
+
+from db_config import DB_PATH, apply_profile, ensure_database, maintain
+import query_profiler
+from query_profiler import ProfiledConnection
+
+
+class ConnectionPool:
+    """Keep long-lived SQLite connections and lend them out on demand"""
+
+    def __init__(self, db_path=DB_PATH, max_size=4, profile=None):
+        self.db_path = db_path
+        query_profiler.use_database(db_path)
+        self.max_size = max_size
+        # A db_config.DB_PROFILES name; None means db_config.DB_PROFILE
+        self.profile = profile
+        self._idle = LifoQueue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def initialize(self):
+        """Apply the schema once for this database"""
+        ensure_database(self.db_path)
+
+    def _open(self):
+        """Open a new connection that may be handed between threads
+
+        Its statements are timed by query_profiler.
+        """
+        connection = sqlite3.connect(self.db_path, check_same_thread=False, factory=ProfiledConnection)
+        apply_profile(connection, self.profile)
+        with self._lock:
+            self.opened += 1
+        return connection
+
+    def acquire(self):
+        """Take an idle connection, or open one if none is free"""
+        self.initialize()
+        try:
+            connection = self._idle.get_nowait()
+        except Empty:
+            return self._open()
+        with self._lock:
+            self.reused += 1
+        return connection
+
+    def release(self, connection):
+        """Return a connection to the pool, closing it if the pool is full"""
+        try:
+            self._idle.put_nowait(connection)
+        except Full:
+            connection.close()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commit on success and roll back on error"""
+        connection = self.acquire()
+        try:
+            yield connection
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            self.release(connection)
+
+    def maintain(self):
+        """Checkpoint the WAL and run PRAGMA optimize on a pooled connection"""
+        connection = self.acquire()
+        try:
+            maintain(connection)
+        finally:
+            self.release(connection)
+
+    def stats(self):
+        """Return how many connections were opened and how often they were reused"""
+        with self._lock:
+            return {
+                'opened': self.opened,
+                'reused': self.reused,
+                'idle': self._idle.qsize(),
+            }
+
+    def close_all(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Empty:
+                break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_path=DB_PATH):
+    """Get the shared pool for a database path"""
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = ConnectionPool(db_path)
+        return pool
+
+def connection(db_path=DB_PATH):
+    """Borrow a connection from the shared pool"""
+    return get_pool(db_path).connection()
+
+def close_all():
+    """Close the idle connections of every shared pool"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
@@ -1,37 +1,14 @@
 import sqlite3
 from db_config import DB_PATH
+from db_migrations import migrate
 
 def create_tables():
     try:
         connection = sqlite3.connect(DB_PATH)
-        cursor = connection.cursor()
         
-        # Create users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                username TEXT PRIMARY KEY,
-                password TEXT NOT NULL,
-                income REAL DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create expenses table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS expenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT,
-                date DATE NOT NULL,
-                category TEXT NOT NULL,
-                amount REAL NOT NULL,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (username) REFERENCES users(username)
-            )
-        """)
-        
-        connection.commit()
-        print("Tables created successfully!")
+        # Same versioned schema the desktop app and db_config use
+        version = migrate(connection)
+        print(f"Tables created successfully! (schema version {version})")
             
     except Exception as e:
         print(f"Error: {e}")
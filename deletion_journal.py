@@ -0,0 +1,96 @@
+"""Deleted expenses kept for undo.
+
+delete() moves expenses, selected by primary key, into deleted_expenses
+under a new batch number, so one multi-select delete is one batch. restore()
+moves a batch back with its original ids. Only the newest UNDO_LIMIT batches
+per user are kept.
+
+Rows really leave the expenses table, so every other query, index and the
+summary-table triggers behave exactly as for a hard delete.
+"""
+import json
+
+import storage
+
+# Delete batches per user that can be undone
+UNDO_LIMIT = 20
+
+COLUMNS = ("id, user_id, day, category_id, amount_paise, description, receipt_image, "
+           "receipt_id, created_at, recurring_id")
+
+# A journalled expense d as (id, date, category, amount, description)
+_SHOWN = f"""
+    SELECT d.id, {storage.date_sql('d.day')}, c.name, d.amount_paise / 100.0, d.description
+    FROM deleted_expenses d
+    LEFT JOIN categories c ON c.id = d.category_id
+"""
+
+def delete(connection, username, ids, keep=UNDO_LIMIT):
+    """Move the user's expenses with these ids to the journal
+
+    Returns (batch, [(id, date, category, amount, description)]) for the
+    rows that were found.
+    """
+    params = {'user_id': storage.user_id(connection, username), 'ids': json.dumps(list(ids))}
+    params['batch'] = connection.execute(
+        "SELECT COALESCE(MAX(batch), 0) + 1 FROM deleted_expenses WHERE user_id = ?", (params['user_id'],)
+    ).fetchone()[0]
+    # The unary + keeps the planner on the primary key: with an index on
+    # user_id it would otherwise walk all of the user's rows
+    connection.execute(f"""
+        INSERT OR REPLACE INTO deleted_expenses (batch, {COLUMNS})
+        SELECT :batch, {COLUMNS}
+        FROM expenses
+        WHERE +user_id = :user_id AND id IN (SELECT value FROM json_each(:ids))
+    """, params)
+    connection.execute("""
+        DELETE FROM expenses
+        WHERE +user_id = :user_id AND id IN (SELECT value FROM json_each(:ids))
+    """, params)
+    rows = connection.execute(f"""
+        {_SHOWN}
+        WHERE d.user_id = :user_id AND d.batch = :batch
+    """, params).fetchall()
+    connection.execute(
+        "DELETE FROM deleted_expenses WHERE user_id = ? AND batch <= ?",
+        (params['user_id'], params['batch'] - keep)
+    )
+    return params['batch'], rows
+
+def restore(connection, username, batch=None):
+    """Put a batch back, the newest if batch is None
+
+    Returns the restored [(id, date, category, amount, description)].
+    """
+    user_id = storage.user_id(connection, username)
+    if batch is None:
+        batch = connection.execute(
+            "SELECT MAX(batch) FROM deleted_expenses WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+        if batch is None:
+            return []
+    rows = connection.execute(f"""
+        {_SHOWN}
+        WHERE d.user_id = ? AND d.batch = ?
+        ORDER BY d.id
+    """, (user_id, batch)).fetchall()
+    connection.execute(f"""
+        INSERT INTO expenses ({COLUMNS})
+        SELECT {COLUMNS}
+        FROM deleted_expenses
+        WHERE user_id = ? AND batch = ?
+    """, (user_id, batch))
+    connection.execute(
+        "DELETE FROM deleted_expenses WHERE user_id = ? AND batch = ?", (user_id, batch)
+    )
+    return rows
+
+def batches(connection, username):
+    """[(batch, deleted_at, count, total)], newest first"""
+    return connection.execute(f"""
+        SELECT batch, MAX(deleted_at), COUNT(*), SUM(amount_paise) / 100.0
+        FROM deleted_expenses
+        WHERE user_id = {storage.USER_ID}
+        GROUP BY batch
+        ORDER BY batch DESC
+    """, (username,)).fetchall()
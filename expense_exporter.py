@@ -0,0 +1,104 @@
+"""Streaming export of expenses to CSV or Excel.
+
+Rows are read from a cursor in fixed-size batches and written straight to
+the output (a csv writer or a write-only openpyxl workbook), so memory stays
+flat no matter how long the user's history is.
+"""
+import csv
+
+import storage
+
+BATCH_SIZE = 5000
+
+HEADERS = ["Date", "Category", "Amount", "Description"]
+
+# Excel's hard limit per sheet, including the header row
+EXCEL_MAX_ROWS = 1048576
+
+def filter_clause(username, start_date=None, end_date=None, category=None):
+    """Build the WHERE clause (over expenses e) and parameters shared by the count and the export"""
+    conditions = [f"e.user_id = {storage.USER_ID}"]
+    params = [username]
+    if start_date:
+        conditions.append(f"e.day >= {storage.day_sql('?')}")
+        params.append(start_date)
+    if end_date:
+        conditions.append(f"e.day <= {storage.day_sql('?')}")
+        params.append(end_date)
+    if category:
+        conditions.append(f"e.category_id = {storage.CATEGORY_ID}")
+        params.append(category)
+    return " AND ".join(conditions), params
+
+def count_expenses(connection, username, start_date=None, end_date=None, category=None):
+    """Number of rows an export with these filters will write"""
+    where, params = filter_clause(username, start_date, end_date, category)
+    return connection.execute(f"SELECT COUNT(*) FROM expenses e WHERE {where}", params).fetchone()[0]
+
+def iter_batches(connection, username, start_date=None, end_date=None, category=None,
+                 batch_size=BATCH_SIZE):
+    """Yield lists of (date, category, amount, description), newest first"""
+    where, params = filter_clause(username, start_date, end_date, category)
+    cursor = connection.execute(f"""
+        SELECT {storage.date_sql('e.day')}, c.name, e.amount_paise / 100.0, e.description
+        FROM {storage.EXPENSE_TABLES}
+        WHERE {where}
+        ORDER BY e.day DESC, e.id DESC
+    """, params)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield rows
+
+def _export(connection, username, write_batch, filters, progress):
+    """Feed every batch to write_batch, reporting progress; returns rows written"""
+    total = count_expenses(connection, username, **filters) if progress else 0
+    written = 0
+    for rows in iter_batches(connection, username, **filters):
+        write_batch(rows)
+        written += len(rows)
+        if progress:
+            progress(written / total if total else 1.0, f"Exported {written} of {total} rows")
+    return written
+
+def export_csv(connection, path, username, start_date=None, end_date=None, category=None,
+               progress=None):
+    """Write the user's expenses to a CSV file and return the row count"""
+    filters = {'start_date': start_date, 'end_date': end_date, 'category': category}
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        return _export(connection, username, writer.writerows, filters, progress)
+
+def export_excel(connection, path, username, start_date=None, end_date=None, category=None,
+                 progress=None):
+    """Write the user's expenses to an .xlsx file and return the row count
+
+    Uses a write-only workbook, which streams rows to disk. Histories longer
+    than one sheet allows continue on further sheets.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    state = {'sheet': None, 'rows': 0}
+
+    def new_sheet():
+        number = len(workbook.worksheets) + 1
+        state['sheet'] = workbook.create_sheet(title="Expenses" if number == 1 else f"Expenses {number}")
+        state['sheet'].append(HEADERS)
+        state['rows'] = 1
+
+    def write_batch(rows):
+        for row in rows:
+            if state['sheet'] is None or state['rows'] >= EXCEL_MAX_ROWS:
+                new_sheet()
+            state['sheet'].append(row)
+            state['rows'] += 1
+
+    filters = {'start_date': start_date, 'end_date': end_date, 'category': category}
+    written = _export(connection, username, write_batch, filters, progress)
+    if state['sheet'] is None:
+        new_sheet()
+    workbook.save(path)
+    return written
@@ -0,0 +1,151 @@
+"""Windowed data source for the expense list.
+
+Rows are fetched a page at a time with keyset pagination on (sort column, id),
+so each page costs the same no matter how deep the user has scrolled. Rows
+missing the sort value (expenses converted without a valid date, say) sort
+below all others, as NULLs do in SQLite, so paging carries on through them.
+"""
+import storage
+
+# Stands in for a missing day or amount; below any stored value
+MISSING = -2147483648
+
+
+class ExpensePager:
+    """Page through one user's expenses with sorting and filtering done in SQL"""
+
+    # Sort keys mapped to a trusted expression, its position in a fetched row,
+    # the conversion from that shown value to the stored one and the stored
+    # value of a missing one. The date expression matches idx_expenses_user_sort_day.
+    SORT_COLUMNS = {
+        'date': (f'COALESCE(e.day, {MISSING})', 1, storage.day_number, MISSING),
+        'category': ("COALESCE(c.name, '')", 2, None, ''),
+        'amount': (f'COALESCE(e.amount_paise, {MISSING})', 3, storage.to_paise, MISSING),
+    }
+
+    def __init__(self, pool, username, page_size=200):
+        self.pool = pool
+        self.username = username
+        self.page_size = page_size
+        self.sort = 'date'
+        self.descending = True
+        self.category = None
+        self.start_date = None
+        self.end_date = None
+        self.search = None
+        self.reset()
+
+    def reset(self):
+        """Start again from the first page"""
+        self._last_key = None
+        self.exhausted = False
+        self.loaded = 0
+
+    def set_sort(self, sort, descending=True):
+        """Change the sort column and rewind"""
+        if sort not in self.SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort}")
+        self.sort = sort
+        self.descending = descending
+        self.reset()
+
+    def set_filters(self, category=None, start_date=None, end_date=None, search=None):
+        """Change the filters and rewind; empty values mean no filter"""
+        self.category = category or None
+        self.start_date = start_date or None
+        self.end_date = end_date or None
+        self.search = search or None
+        self.reset()
+
+    def next_query(self):
+        """Build the SQL and parameters for the next page"""
+        column, _, stored, missing = self.SORT_COLUMNS[self.sort]
+        conditions = [f"e.user_id = {storage.USER_ID}"]
+        params = [self.username]
+
+        if self.category:
+            conditions.append(f"e.category_id = {storage.CATEGORY_ID}")
+            params.append(self.category)
+        if self.start_date:
+            conditions.append(f"e.day >= {storage.day_sql('?')}")
+            params.append(self.start_date)
+        if self.end_date:
+            conditions.append(f"e.day <= {storage.day_sql('?')}")
+            params.append(self.end_date)
+        if self.search:
+            conditions.append("e.description LIKE ?")
+            params.append(f"%{self.search}%")
+
+        # Keyset: continue strictly after the last row of the previous page.
+        # Spelled out, as SQLite only seeks an expression index this way.
+        if self._last_key is not None:
+            operator = "<" if self.descending else ">"
+            present, value, last_id = self._last_key
+            if not present:
+                value = missing
+            elif stored:
+                value = stored(value)
+            conditions.append(f"{column} {operator}= ? AND ({column} {operator} ? OR e.id {operator} ?)")
+            params.extend((value, value, last_id))
+
+        direction = "DESC" if self.descending else "ASC"
+        sql = f"""
+            SELECT {storage.EXPENSE_COLUMNS}
+            FROM {storage.EXPENSE_TABLES}
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {column} {direction}, e.id {direction}
+            LIMIT ?
+        """
+        params.append(self.page_size)
+        return sql, params
+
+    def fetch_page(self, query):
+        """Run a query from next_query; safe to call from a worker thread"""
+        sql, params = query
+        with self.pool.connection() as connection:
+            return connection.execute(sql, params).fetchall()
+
+    def advance(self, rows):
+        """Move past a page returned by fetch_page"""
+        if len(rows) < self.page_size:
+            self.exhausted = True
+        if rows:
+            self._last_key = self.sort_key(rows[-1])
+            self.loaded += len(rows)
+
+    def sort_key(self, row):
+        """(has sort value, sort value, id) of an (id, date, category, amount, description) row
+
+        Orders rows as the SQL does, with missing values lowest.
+        """
+        value = row[self.SORT_COLUMNS[self.sort][1]]
+        return (value is not None, value, row[0])
+
+    def accepts(self, row):
+        """True if a row belongs among the pages loaded so far
+
+        Lets a restored row be put back into the list without reloading it.
+        """
+        _, date, category, _, description = row
+        if self.category and category != self.category:
+            return False
+        # Rows without a date never match a date filter in SQL
+        if self.start_date and (date is None or date < self.start_date):
+            return False
+        if self.end_date and (date is None or date > self.end_date):
+            return False
+        # LIKE is case-insensitive for ASCII
+        if self.search and self.search.lower() not in (description or '').lower():
+            return False
+        if self.exhausted or self._last_key is None:
+            return self.exhausted
+        key = self.sort_key(row)
+        return key > self._last_key if self.descending else key < self._last_key
+
+    def fetch_next(self):
+        """Return the next page of (id, date, category, amount, description) rows"""
+        if self.exhausted:
+            return []
+        rows = self.fetch_page(self.next_query())
+        self.advance(rows)
+        return rows
@@ -0,0 +1,546 @@
+"""Expense store operations with no dependency on Tk.
+
+The desktop app and the command line (python -m expense_tracker) both call
+ExpenseService, so every operation can also run in batch jobs, on a server
+without a display, or under a benchmark. Invalid input raises ServiceError
+with a message suitable for showing to the user.
+"""
+import hashlib
+import threading
+from datetime import datetime
+
+import aggregates
+import budgets
+import deletion_journal
+import forecasting
+import receipts
+import storage
+from categorizer import build_index
+from expense_exporter import export_csv, export_excel, filter_clause
+from recurring_scheduler import catch_up, occurrence_date
+
+CATEGORIES = ['Food', 'Transport', 'Entertainment', 'Utilities', 'Other']
+
+FREQUENCIES = ['Weekly', 'Monthly', 'Yearly']
+
+EXPORT_FORMATS = ('csv', 'xlsx', 'pdf')
+
+
+class ServiceError(Exception):
+    """Raised when a request cannot be carried out"""
+
+
+def hash_password(password):
+    """SHA-256 hex digest, as stored in users.password"""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+def parse_amount(value):
+    """Return value as a float, rejecting non-numbers and non-positive amounts"""
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        raise ServiceError("Please enter a valid amount")
+    if amount <= 0:
+        raise ServiceError("Amount must be greater than 0")
+    return amount
+
+def parse_date(value):
+    """Return value if it is a YYYY-MM-DD date"""
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise ServiceError("Dates must be in YYYY-MM-DD format")
+    return value
+
+
+class ExpenseService:
+    """Users, expenses, budgets, recurring expenses and exports"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        # Created on first use so numpy is only imported when needed
+        self._expense_arrays = None
+        # username -> CategoryIndex, kept current as expenses are added and removed
+        self._category_indexes = {}
+        self.budgets = budgets.BudgetTracker()
+        self._lock = threading.Lock()
+
+    # Users
+
+    def register(self, username, password):
+        """Create a user with no income"""
+        if not username or not password:
+            raise ServiceError("Please fill in all fields!")
+        with self.pool.connection() as connection:
+            exists = connection.execute(
+                "SELECT 1 FROM users WHERE username = ?", (username,)
+            ).fetchone()
+            if exists:
+                raise ServiceError("Username already exists!")
+            connection.execute(
+                "INSERT INTO users (username, password, income) VALUES (?, ?, ?)",
+                (username, hash_password(password), 0)
+            )
+
+    def authenticate(self, username, password):
+        """True if the username and password match"""
+        with self.pool.connection() as connection:
+            user = connection.execute(
+                "SELECT 1 FROM users WHERE username = ? AND password = ?",
+                (username, hash_password(password))
+            ).fetchone()
+        return user is not None
+
+    def list_users(self):
+        """All usernames, in order"""
+        with self.pool.connection() as connection:
+            return [row[0] for row in connection.execute("SELECT username FROM users ORDER BY username")]
+
+    def get_income(self, username):
+        """The user's monthly income, 0.0 if unset"""
+        with self.pool.connection() as connection:
+            result = connection.execute(
+                "SELECT income FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        return float(result[0]) if result and result[0] else 0.0
+
+    def set_income(self, username, income):
+        """Update the user's monthly income"""
+        try:
+            income = float(income)
+        except (TypeError, ValueError):
+            raise ServiceError("Please enter a valid amount")
+        if income < 0:
+            raise ServiceError("Income cannot be negative")
+        with self.pool.connection() as connection:
+            connection.execute("UPDATE users SET income = ? WHERE username = ?", (income, username))
+        return income
+
+    # Expenses
+
+    def add_expense(self, username, amount, category, description='', date=None):
+        """Record an expense; returns {'id', 'budget_alert'}
+
+        budget_alert is None unless this expense took its category past the
+        warning level or over its monthly budget, see budgets.crossed.
+        """
+        amount = parse_amount(amount)
+        if not category:
+            raise ServiceError("Please select a category")
+        date = parse_date(date) if date else datetime.now().strftime('%Y-%m-%d')
+        with self.pool.connection() as connection:
+            user_id = storage.user_id(connection, username)
+            if user_id is None:
+                raise ServiceError(f"No such user: {username}")
+            # Loads this month's totals once; later adds only update them
+            self.budgets.load(connection, username)
+            cursor = connection.execute("""
+                INSERT INTO expenses (user_id, day, category_id, amount_paise, description)
+                VALUES (?, ?, ?, ?, ?)
+            """, (user_id, storage.day_number(date), storage.category_id(connection, category),
+                  storage.to_paise(amount), description))
+        with self._lock:
+            index = self._category_indexes.get(username)
+        if index is not None:
+            index.add(description, category)
+        return {
+            'id': cursor.lastrowid,
+            'budget_alert': self.budgets.record(username, category, amount, date),
+        }
+
+    def list_expenses(self, username, start_date=None, end_date=None, category=None, limit=None):
+        """Newest expenses first, as dicts"""
+        where, params = filter_clause(username, start_date, end_date, category)
+        query = f"""
+            SELECT {storage.EXPENSE_COLUMNS}
+            FROM {storage.EXPENSE_TABLES}
+            WHERE {where}
+            ORDER BY e.day DESC, e.id DESC
+        """
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self.pool.connection() as connection:
+            rows = connection.execute(query, params).fetchall()
+        return [
+            {'id': id, 'date': date, 'category': category, 'amount': amount, 'description': description}
+            for id, date, category, amount, description in rows
+        ]
+
+    def get_expense(self, username, expense_id):
+        """One expense as a dict, by id"""
+        with self.pool.connection() as connection:
+            row = connection.execute(f"""
+                SELECT {storage.EXPENSE_COLUMNS}
+                FROM {storage.EXPENSE_TABLES}
+                WHERE e.id = ? AND e.user_id = {storage.USER_ID}
+            """, (expense_id, username)).fetchone()
+        if row is None:
+            raise ServiceError("Expense not found")
+        return dict(zip(('id', 'date', 'category', 'amount', 'description'), row))
+
+    def update_expense(self, username, expense_id, amount=None, category=None,
+                       description=None, date=None):
+        """Change the given fields of one expense; returns it as a dict"""
+        changes = {}
+        if amount is not None:
+            changes['amount'] = parse_amount(amount)
+        if category is not None:
+            if not category:
+                raise ServiceError("Please select a category")
+            changes['category'] = category
+        if description is not None:
+            changes['description'] = description
+        if date is not None:
+            changes['date'] = parse_date(date)
+        old = self.get_expense(username, expense_id)
+        if changes:
+            with self.pool.connection() as connection:
+                stored = {}
+                if 'amount' in changes:
+                    stored['amount_paise'] = storage.to_paise(changes['amount'])
+                if 'category' in changes:
+                    stored['category_id'] = storage.category_id(connection, changes['category'])
+                if 'description' in changes:
+                    stored['description'] = changes['description']
+                if 'date' in changes:
+                    stored['day'] = storage.day_number(changes['date'])
+                assignments = ", ".join(f"{column} = ?" for column in stored)
+                connection.execute(
+                    f"UPDATE expenses SET {assignments} WHERE id = ? AND user_id = {storage.USER_ID}",
+                    (*stored.values(), expense_id, username)
+                )
+            with self._lock:
+                index = self._category_indexes.get(username)
+            if index is not None:
+                index.remove(old['description'], old['category'])
+                index.add(changes.get('description', old['description']),
+                          changes.get('category', old['category']))
+            self.budgets.invalidate(username)
+        return dict(old, **changes)
+
+    def delete_expenses(self, username, ids):
+        """Delete expenses by id into the undo journal; returns {'deleted', 'batch'}
+
+        All ids are removed with one statement and form one undo batch.
+        """
+        try:
+            ids = [int(expense_id) for expense_id in ids]
+        except (TypeError, ValueError):
+            raise ServiceError("Expense ids must be whole numbers")
+        if not ids:
+            raise ServiceError("Please select an expense to remove")
+        with self.pool.connection() as connection:
+            batch, rows = deletion_journal.delete(connection, username, ids)
+            # Receipts of deletes too old to undo
+            receipts.prune(connection)
+        with self._lock:
+            index = self._category_indexes.get(username)
+        if index is not None:
+            for _, _, category, _, description in rows:
+                index.remove(description, category)
+        self.budgets.invalidate(username)
+        return {'deleted': len(rows), 'batch': batch}
+
+    def undo_delete(self, username, batch=None):
+        """Restore the newest (or the given) delete batch; returns the restored expenses"""
+        with self.pool.connection() as connection:
+            rows = deletion_journal.restore(connection, username, batch)
+        with self._lock:
+            index = self._category_indexes.get(username)
+        if index is not None:
+            for _, _, category, _, description in rows:
+                index.add(description, category)
+        self.budgets.invalidate(username)
+        return [
+            {'id': id, 'date': date, 'category': category, 'amount': amount, 'description': description}
+            for id, date, category, amount, description in rows
+        ]
+
+    def list_deleted(self, username):
+        """Delete batches that can still be undone, newest first"""
+        with self.pool.connection() as connection:
+            rows = deletion_journal.batches(connection, username)
+        return [
+            {'batch': batch, 'deleted_at': deleted_at, 'count': count, 'total': total}
+            for batch, deleted_at, count, total in rows
+        ]
+
+    def clear_expenses(self, username):
+        """Delete all of the user's expenses; returns how many were removed"""
+        with self.pool.connection() as connection:
+            cursor = connection.execute(
+                f"DELETE FROM expenses WHERE user_id = {storage.USER_ID}", (username,)
+            )
+            receipts.prune(connection)
+        self.forget_category_index(username)
+        self.budgets.invalidate(username)
+        return cursor.rowcount
+
+    # Receipts
+
+    def _receipt_id(self, connection, username, expense_id):
+        """The expense's receipt id; raises unless the expense has a receipt"""
+        row = connection.execute(
+            f"SELECT receipt_id FROM expenses WHERE id = ? AND user_id = {storage.USER_ID}",
+            (expense_id, username)
+        ).fetchone()
+        if row is None:
+            raise ServiceError("Expense not found")
+        if row[0] is None:
+            raise ServiceError("This expense has no receipt")
+        return row[0]
+
+    def attach_receipt(self, username, expense_id, path):
+        """Store an image file as the expense's receipt, replacing any other; returns its details"""
+        self.get_expense(username, expense_id)
+        with self.pool.connection() as connection:
+            try:
+                receipt_id, _ = receipts.store(connection, path)
+            except receipts.ReceiptError as e:
+                raise ServiceError(str(e))
+            connection.execute(
+                f"UPDATE expenses SET receipt_id = ? WHERE id = ? AND user_id = {storage.USER_ID}",
+                (receipt_id, expense_id, username)
+            )
+            receipts.prune(connection)
+            return receipts.describe(connection, receipt_id)
+
+    def detach_receipt(self, username, expense_id):
+        """Remove the expense's receipt"""
+        with self.pool.connection() as connection:
+            self._receipt_id(connection, username, expense_id)
+            connection.execute("UPDATE expenses SET receipt_id = NULL WHERE id = ?", (expense_id,))
+            receipts.prune(connection)
+
+    def receipt_info(self, username, expense_id):
+        """{'id', 'sha256', 'format', 'width', 'height', 'size'} of the expense's receipt"""
+        with self.pool.connection() as connection:
+            return receipts.describe(connection, self._receipt_id(connection, username, expense_id))
+
+    def receipt_thumbnail(self, username, expense_id):
+        """JPEG thumbnail bytes of the expense's receipt"""
+        with self.pool.connection() as connection:
+            return receipts.thumbnail(connection, self._receipt_id(connection, username, expense_id))
+
+    def receipt_image(self, username, expense_id):
+        """The original bytes of the expense's receipt"""
+        with self.pool.connection() as connection:
+            return receipts.read(connection, self._receipt_id(connection, username, expense_id))
+
+    def save_receipt(self, username, expense_id, path):
+        """Copy the expense's receipt to a file; returns bytes written"""
+        written = 0
+        with self.pool.connection() as connection:
+            receipt_id = self._receipt_id(connection, username, expense_id)
+            with open(path, 'wb') as f:
+                for chunk in receipts.iter_chunks(connection, receipt_id):
+                    f.write(chunk)
+                    written += len(chunk)
+        return written
+
+    # Categorization
+
+    def category_index(self, username):
+        """The user's CategoryIndex, built from their history on first use"""
+        with self._lock:
+            index = self._category_indexes.get(username)
+        if index is None:
+            with self.pool.connection() as connection:
+                index = build_index(connection, username)
+            with self._lock:
+                index = self._category_indexes.setdefault(username, index)
+        return index
+
+    def forget_category_index(self, username):
+        """Drop a user's index after changes it was not told about"""
+        with self._lock:
+            self._category_indexes.pop(username, None)
+
+    def suggest_category(self, username, description):
+        """{'category', 'confidence'} learned from the user's own descriptions"""
+        category, confidence = self.category_index(username).suggest(description)
+        return {'category': category, 'confidence': confidence}
+
+    # Aggregates
+
+    def category_totals(self, username):
+        """[(category, total)] over the user's whole history"""
+        with self.pool.connection() as connection:
+            return aggregates.category_totals(connection, username)
+
+    def monthly_totals(self, username):
+        """[(YYYY-MM, total)] in month order"""
+        with self.pool.connection() as connection:
+            return aggregates.monthly_totals(connection, username)
+
+    def daily_totals(self, username, start_date, end_date):
+        """{YYYY-MM-DD: total} for start_date <= date < end_date"""
+        with self.pool.connection() as connection:
+            return aggregates.daily_totals(connection, username, start_date, end_date)
+
+    def insights(self, username):
+        """Full-history spending statistics, see analytics.recommendations"""
+        from analytics import ExpenseArrayCache, recommendations
+
+        with self._lock:
+            if self._expense_arrays is None:
+                self._expense_arrays = ExpenseArrayCache()
+        income = self.get_income(username)
+        with self.pool.connection() as connection:
+            arrays = self._expense_arrays.get(connection, username)
+        return recommendations(arrays, income)
+
+    def forecast(self, username, months_ahead=3, today=None):
+        """Per-category spending forecast, see forecasting.forecast"""
+        if months_ahead < 1:
+            raise ServiceError("Months to forecast must be at least 1")
+        with self.pool.connection() as connection:
+            return forecasting.forecast(connection, username, months_ahead, today=today)
+
+    # Budget goals
+
+    def set_budget(self, username, category, amount):
+        """Set the monthly budget for a category"""
+        amount = parse_amount(amount)
+        if not category:
+            raise ServiceError("Please select category")
+        with self.pool.connection() as connection:
+            connection.execute("""
+                INSERT OR REPLACE INTO budget_goals (username, category, amount)
+                VALUES (?, ?, ?)
+            """, (username, category, amount))
+        self.budgets.invalidate(username)
+
+    def delete_budget(self, username, category):
+        """Remove the budget for a category"""
+        with self.pool.connection() as connection:
+            connection.execute(
+                "DELETE FROM budget_goals WHERE username = ? AND category = ?",
+                (username, category)
+            )
+        self.budgets.invalidate(username)
+
+    def list_budgets(self, username):
+        """{category: monthly budget}"""
+        with self.pool.connection() as connection:
+            rows = connection.execute(
+                "SELECT category, amount FROM budget_goals WHERE username = ?", (username,)
+            ).fetchall()
+        return dict(rows)
+
+    def budget_status(self, username, month=None):
+        """Each goal with its spend in month (default this month), as dicts"""
+        if month:
+            parse_date(f"{month}-01")
+        with self.pool.connection() as connection:
+            rows = budgets.month_status(connection, username, month)
+        return [budgets.describe(category, budget, spent) for category, budget, spent in rows]
+
+    # Recurring expenses
+
+    def add_recurring(self, username, amount, frequency, description='', category='Other'):
+        """Schedule a recurring expense and return its first due date
+
+        Today counts as the first occurrence, so the first expense is created
+        one period from now.
+        """
+        amount = parse_amount(amount)
+        if frequency not in FREQUENCIES:
+            raise ServiceError("Please select frequency")
+        start_date = datetime.now().strftime('%Y-%m-%d')
+
+        with self.pool.connection() as connection:
+            next_date = occurrence_date(connection, start_date, frequency, 1)
+            connection.execute("""
+                INSERT INTO recurring_expenses
+                (username, amount, frequency, description, category, start_date, occurrences, next_date)
+                VALUES (?, ?, ?, ?, ?, ?, 1, ?)
+            """, (username, amount, frequency, description, category or 'Other', start_date, next_date))
+        return next_date
+
+    def run_recurring(self, today=None):
+        """Create every recurring expense due by today, for all users"""
+        with self.pool.connection() as connection:
+            summary = catch_up(connection, today)
+        for username in summary['usernames']:
+            self.forget_category_index(username)
+            self.budgets.invalidate(username)
+        return summary
+
+    def list_recurring(self, username):
+        """The user's recurring expenses, soonest first, as dicts"""
+        with self.pool.connection() as connection:
+            rows = connection.execute("""
+                SELECT id, amount, frequency, description, category, next_date
+                FROM recurring_expenses
+                WHERE username = ?
+                ORDER BY next_date
+            """, (username,)).fetchall()
+        return [
+            {'id': id, 'amount': amount, 'frequency': frequency,
+             'description': description, 'category': category, 'next_date': next_date}
+            for id, amount, frequency, description, category, next_date in rows
+        ]
+
+    # Import and export
+
+    def import_statement(self, username, path, file_format=None, mapping=None,
+                         debits_only=True, categorize=False, progress=None):
+        """Import a CSV or OFX bank statement; returns the importer's summary dict
+
+        With categorize, rows without a category get the one suggested by
+        the user's CategoryIndex instead of the importer's default.
+        """
+        from statement_importer import StatementError, import_statement
+
+        hook = self.category_index(username).categorize if categorize else None
+        with self.pool.connection() as connection:
+            try:
+                summary = import_statement(
+                    connection, path, username, file_format=file_format, mapping=mapping,
+                    debits_only=debits_only, categorize=hook, progress=progress
+                )
+            except StatementError as e:
+                raise ServiceError(str(e))
+        self.forget_category_index(username)
+        self.budgets.invalidate(username)
+        return summary
+
+    def export(self, username, path, file_format=None, start_date=None, end_date=None,
+               category=None, progress=None):
+        """Write the user's expenses to path as csv, xlsx or pdf; returns rows written"""
+        file_format = (file_format or path.rsplit('.', 1)[-1]).lower()
+        if file_format not in EXPORT_FORMATS:
+            raise ServiceError(f"Unsupported export format: {file_format}")
+        for value in (start_date, end_date):
+            if value:
+                parse_date(value)
+        filters = {'start_date': start_date, 'end_date': end_date, 'category': category}
+
+        with self.pool.connection() as connection:
+            if file_format == 'pdf':
+                from pdf_report import build_report
+                return build_report(connection, path, username, progress=progress, **filters)['rows']
+            export = export_csv if file_format == 'csv' else export_excel
+            return export(connection, path, username, progress=progress, **filters)
+
+    def report_all(self, out_dir, workers=None, start_date=None, end_date=None, category=None,
+                   progress=None):
+        """Write a PDF statement and trend chart for every user into out_dir
+
+        Returns the per-user results from batch_reports.run.
+        """
+        import batch_reports
+
+        for value in (start_date, end_date):
+            if value:
+                parse_date(value)
+        # Borrowing a connection migrates the database and puts it in WAL
+        # mode before the read-only workers open it
+        with self.pool.connection():
+            pass
+        return batch_reports.run(
+            self.pool.db_path, out_dir, workers=workers, start_date=start_date,
+            end_date=end_date, category=category, progress=progress
+        )
@@ -0,0 +1,287 @@
+"""Command-line interface to the expense store, with JSON output.
+
+Runs without Tk, so it works in scripts, cron jobs and on servers:
+
+    python -m expense_tracker users
+    python -m expense_tracker add --user alice --amount 250 --category Food
+    python -m expense_tracker list --user alice --from 2024-01-01 --limit 20
+    python -m expense_tracker summary --user alice --by month
+    python -m expense_tracker budget --user alice --set Food 5000
+    python -m expense_tracker recurring --user alice --add 999 Monthly "Gym"
+    python -m expense_tracker run-recurring
+    python -m expense_tracker import --user alice statement.csv
+    python -m expense_tracker export --user alice report.pdf --category Food
+    python -m expense_tracker report-all statements/ --from 2024-06-01 --to 2024-06-30
+    python -m expense_tracker query-log --top 5
+
+Every command prints one JSON document. Errors are printed as
+{"error": "..."} on stderr with exit status 1.
+"""
+import argparse
+import getpass
+import json
+import sqlite3
+import sys
+import time
+
+import query_profiler
+from db_config import DB_PATH, DB_PROFILE, DB_PROFILES
+from db_pool import ConnectionPool
+from expense_service import CATEGORIES, FREQUENCIES, EXPORT_FORMATS, ExpenseService, ServiceError
+
+def add_filters(parser):
+    """Date-range and category options shared by list, export and report-all"""
+    parser.add_argument('--from', dest='start_date', metavar='YYYY-MM-DD')
+    parser.add_argument('--to', dest='end_date', metavar='YYYY-MM-DD')
+    parser.add_argument('--category', choices=CATEGORIES)
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m expense_tracker',
+        description="Manage expenses without the desktop app"
+    )
+    parser.add_argument('--db', default=DB_PATH, help="database file")
+    parser.add_argument('--profile', choices=list(DB_PROFILES), default=DB_PROFILE,
+                        help="durability vs speed settings, see db_config.DB_PROFILES")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    register = commands.add_parser('register', help="create a user")
+    register.add_argument('--user', required=True)
+    register.add_argument('--password', help="default: prompt")
+
+    commands.add_parser('users', help="list usernames")
+
+    add = commands.add_parser('add', help="record an expense")
+    add.add_argument('--user', required=True)
+    add.add_argument('--amount', required=True)
+    add.add_argument('--category', required=True, choices=CATEGORIES)
+    add.add_argument('--description', default='')
+    add.add_argument('--date', metavar='YYYY-MM-DD', help="default: today")
+
+    edit = commands.add_parser('edit', help="change an expense by id")
+    edit.add_argument('--user', required=True)
+    edit.add_argument('id', type=int)
+    edit.add_argument('--amount')
+    edit.add_argument('--category', choices=CATEGORIES)
+    edit.add_argument('--description')
+    edit.add_argument('--date', metavar='YYYY-MM-DD')
+
+    delete = commands.add_parser('delete', help="delete expenses by id (undo with the undo command)")
+    delete.add_argument('--user', required=True)
+    delete.add_argument('ids', type=int, nargs='+')
+
+    undo = commands.add_parser('undo', help="restore deleted expenses, or list what can be restored")
+    undo.add_argument('--user', required=True)
+    undo.add_argument('--batch', type=int, help="default: the most recent delete")
+    undo.add_argument('--list', action='store_true', help="only list the deletes that can be undone")
+
+    receipt = commands.add_parser('receipt', help="attach, save or describe an expense's receipt image")
+    receipt.add_argument('--user', required=True)
+    receipt.add_argument('id', type=int)
+    action = receipt.add_mutually_exclusive_group()
+    action.add_argument('--attach', metavar='IMAGE', help="store this image as the receipt")
+    action.add_argument('--save', metavar='PATH', help="write the original image here")
+    action.add_argument('--thumbnail', metavar='PATH', help="write the JPEG thumbnail here")
+    action.add_argument('--detach', action='store_true', help="remove the receipt")
+
+    listing = commands.add_parser('list', help="list expenses, newest first")
+    listing.add_argument('--user', required=True)
+    listing.add_argument('--limit', type=int)
+    add_filters(listing)
+
+    summary = commands.add_parser('summary', help="totals by category, month or day")
+    summary.add_argument('--user', required=True)
+    summary.add_argument('--by', choices=['category', 'month', 'day'], default='category')
+    summary.add_argument('--from', dest='start_date', metavar='YYYY-MM-DD', help="--by day only")
+    summary.add_argument('--to', dest='end_date', metavar='YYYY-MM-DD', help="--by day only, exclusive")
+
+    insights = commands.add_parser('insights', help="full-history spending statistics")
+    insights.add_argument('--user', required=True)
+
+    suggest = commands.add_parser('suggest', help="suggest a category for a description")
+    suggest.add_argument('--user', required=True)
+    suggest.add_argument('description')
+
+    forecast = commands.add_parser('forecast', help="forecast spending per category")
+    forecast.add_argument('--user', required=True)
+    forecast.add_argument('--months', type=int, default=3, help="months to forecast, from this one")
+
+    income = commands.add_parser('income', help="show or set monthly income")
+    income.add_argument('--user', required=True)
+    income.add_argument('--set', dest='amount')
+
+    budget = commands.add_parser('budget', help="budget goals against spending, or set or delete one")
+    budget.add_argument('--user', required=True)
+    budget.add_argument('--month', metavar='YYYY-MM', help="spending in this month, default the current one")
+    budget.add_argument('--set', nargs=2, metavar=('CATEGORY', 'AMOUNT'))
+    budget.add_argument('--delete', metavar='CATEGORY')
+
+    recurring = commands.add_parser('recurring', help="show or add recurring expenses")
+    recurring.add_argument('--user', required=True)
+    recurring.add_argument('--add', nargs=3, metavar=('AMOUNT', 'FREQUENCY', 'DESCRIPTION'),
+                           help=f"FREQUENCY is one of {', '.join(FREQUENCIES)}")
+    recurring.add_argument('--category', choices=CATEGORIES, default='Other', help="for --add")
+
+    run_recurring = commands.add_parser('run-recurring', help="create due recurring expenses for all users")
+    run_recurring.add_argument('--today', metavar='YYYY-MM-DD', help="default: today")
+
+    statement = commands.add_parser('import', help="import a CSV or OFX bank statement")
+    statement.add_argument('--user', required=True)
+    statement.add_argument('path')
+    statement.add_argument('--format', choices=['csv', 'ofx'], help="default: detect from the file")
+    statement.add_argument('--categorize', action='store_true',
+                           help="suggest categories for rows without one from your history")
+    statement.add_argument('--include-credits', action='store_true',
+                           help="also import money in, such as salary and refunds")
+
+    export = commands.add_parser('export', help="write expenses to csv, xlsx or pdf")
+    export.add_argument('--user', required=True)
+    export.add_argument('path')
+    export.add_argument('--format', choices=EXPORT_FORMATS, help="default: from the file extension")
+    add_filters(export)
+
+    report_all = commands.add_parser('report-all', help="write a PDF and trend chart for every user")
+    report_all.add_argument('out_dir')
+    report_all.add_argument('--workers', type=int, help="processes to use, default: one per CPU")
+    add_filters(report_all)
+
+    query_log = commands.add_parser('query-log', help="per-screen timings and slowest queries from the query log")
+    query_log.add_argument('--top', type=int, default=10, help="slow queries to show")
+    query_log.add_argument('--log', help="log file, default: the one next to --db")
+
+    return parser
+
+def run(service, args):
+    """Carry out one command and return its JSON-serialisable result"""
+    if args.command == 'query-log':
+        return query_profiler.summarize_log(args.log, args.top)
+
+    if args.command == 'register':
+        password = args.password if args.password is not None else getpass.getpass()
+        service.register(args.user, password)
+        return {'registered': args.user}
+
+    if args.command == 'users':
+        return service.list_users()
+
+    if args.command == 'add':
+        return service.add_expense(args.user, args.amount, args.category, args.description, args.date)
+
+    if args.command == 'edit':
+        return service.update_expense(
+            args.user, args.id, args.amount, args.category, args.description, args.date
+        )
+
+    if args.command == 'delete':
+        return service.delete_expenses(args.user, args.ids)
+
+    if args.command == 'undo':
+        if args.list:
+            return service.list_deleted(args.user)
+        return service.undo_delete(args.user, args.batch)
+
+    if args.command == 'receipt':
+        if args.attach:
+            return service.attach_receipt(args.user, args.id, args.attach)
+        if args.save:
+            return {'path': args.save, 'bytes': service.save_receipt(args.user, args.id, args.save)}
+        if args.thumbnail:
+            with open(args.thumbnail, 'wb') as f:
+                f.write(service.receipt_thumbnail(args.user, args.id))
+            return {'path': args.thumbnail}
+        if args.detach:
+            service.detach_receipt(args.user, args.id)
+            return {'detached': args.id}
+        return service.receipt_info(args.user, args.id)
+
+    if args.command == 'list':
+        return service.list_expenses(
+            args.user, args.start_date, args.end_date, args.category, args.limit
+        )
+
+    if args.command == 'summary':
+        if args.by == 'category':
+            return dict(service.category_totals(args.user))
+        if args.by == 'month':
+            return dict(service.monthly_totals(args.user))
+        if not args.start_date or not args.end_date:
+            raise ServiceError("--by day needs --from and --to")
+        return service.daily_totals(args.user, args.start_date, args.end_date)
+
+    if args.command == 'insights':
+        return service.insights(args.user)
+
+    if args.command == 'suggest':
+        return service.suggest_category(args.user, args.description)
+
+    if args.command == 'forecast':
+        return service.forecast(args.user, args.months)
+
+    if args.command == 'income':
+        if args.amount is not None:
+            service.set_income(args.user, args.amount)
+        return {'income': service.get_income(args.user)}
+
+    if args.command == 'budget':
+        if args.set:
+            service.set_budget(args.user, *args.set)
+        if args.delete:
+            service.delete_budget(args.user, args.delete)
+        return service.budget_status(args.user, args.month)
+
+    if args.command == 'recurring':
+        if args.add:
+            amount, frequency, description = args.add
+            service.add_recurring(args.user, amount, frequency.capitalize(), description, args.category)
+        return service.list_recurring(args.user)
+
+    if args.command == 'run-recurring':
+        return service.run_recurring(args.today)
+
+    if args.command == 'import':
+        return service.import_statement(args.user, args.path, args.format,
+                                        debits_only=not args.include_credits, categorize=args.categorize)
+
+    if args.command == 'export':
+        written = service.export(
+            args.user, args.path, args.format,
+            start_date=args.start_date, end_date=args.end_date, category=args.category
+        )
+        return {'path': args.path, 'rows': written}
+
+    if args.command == 'report-all':
+        started = time.perf_counter()
+        results = service.report_all(
+            args.out_dir, args.workers,
+            start_date=args.start_date, end_date=args.end_date, category=args.category
+        )
+        seconds = time.perf_counter() - started
+        return {
+            'out_dir': args.out_dir,
+            'users': len(results),
+            'failed': {result['user']: result['error'] for result in results if 'error' in result},
+            'seconds': round(seconds, 2),
+            'users_per_sec': round(len(results) / seconds, 1) if seconds else None,
+        }
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    pool = ConnectionPool(args.db, max_size=1, profile=args.profile)
+    try:
+        service = ExpenseService(pool)
+        if args.command == 'query-log':
+            result = run(service, args)
+        else:
+            # Each command's queries are profiled like a desktop screen's
+            with query_profiler.screen(f"cli {args.command}"):
+                result = run(service, args)
+    except (ServiceError, OSError, sqlite3.Error, ValueError) as e:
+        print(json.dumps({'error': str(e)}), file=sys.stderr)
+        return 1
+    finally:
+        pool.close_all()
+    print(json.dumps(result, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
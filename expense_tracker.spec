@@ -10,16 +10,17 @@ a = Analysis(
         ('db_config.py', '.'),        # Include configuration file
     ],
     hiddenimports=[
-        'numpy',
-        'matplotlib',
-        'sklearn.linear_model',
-        'sklearn.preprocessing',
+        # Imported inside functions so the login window opens sooner
+        'matplotlib.backends.backend_tkagg',
+        'openpyxl',
+        'reportlab.pdfgen.canvas',
+        'reportlab.platypus',
         'sqlite3',
     ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['sklearn'],  # Never used by the app
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
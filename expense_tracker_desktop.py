@@ -2,22 +2,18 @@ import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
 from datetime import datetime
 import sqlite3
-import hashlib
 import sys
 import os
 from db_config import DB_PATH
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from datetime import datetime, timedelta
-import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
-from PIL import Image
-import io
-import pandas as pd
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+from db_pool import get_pool
+import query_profiler
+from expense_pager import ExpensePager
+from task_executor import TaskExecutor
+from insights_cache import InsightsCache
+from month_calendar import CalendarGrid, MonthTotals, shift_month
+from expense_service import ExpenseService, ServiceError
+# matplotlib, openpyxl and reportlab are imported where they are used, so the
+# login window does not wait for them
 import ttkbootstrap as ttk  # Replace tkinter.ttk with ttkbootstrap
 from ttkbootstrap.constants import *  # Import ttkbootstrap constants
 from ttkbootstrap.style import Style
@@ -27,6 +23,12 @@ OCEAN_BLUE = "#0077BE"     # For buttons and accents
 LIGHT_GREY = "#F5F5F5"     # For hover effects
 WHITE = "#FFFFFF"          # For background
 
+# How often due recurring expenses are created while the app is open
+RECURRING_CHECK_MS = 60 * 60 * 1000
+
+# How often the WAL is checkpointed and planner statistics refreshed
+MAINTENANCE_MS = 15 * 60 * 1000
+
 class ExpenseTrackerApp:
     def __init__(self, root):
         # Create custom theme
@@ -108,6 +110,13 @@ class ExpenseTrackerApp:
         self.root.geometry("800x600")
         self.root.configure(bg=WHITE)  # Set root background to white
         
+        # Debug menu with the per-screen query timings
+        menubar = tk.Menu(self.root)
+        debug_menu = tk.Menu(menubar, tearoff=0)
+        debug_menu.add_command(label="Query Profile...", command=self.show_query_profile)
+        menubar.add_cascade(label="Debug", menu=debug_menu)
+        self.root.config(menu=menubar)
+        
         # Main container with white background
         self.main_container = ttk.Frame(
             self.root,
@@ -129,11 +138,31 @@ class ExpenseTrackerApp:
         # Create data directory if it doesn't exist
         os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
         
+        # Shared pool of long-lived connections
+        self.db = get_pool(DB_PATH)
+        self.service = ExpenseService(self.db)
+        
+        # Background workers for queries, charts and exports
+        self.tasks = TaskExecutor(self.root)
+        
+        # Rendered Insights tabs, per user, until their expenses change
+        self.insights_cache = InsightsCache()
+        
+        # Daily totals of recently viewed calendar months, per user
+        self.month_totals = MonthTotals(self.service.daily_totals)
+        
+        # One figure and canvas per chart, reused across visits (see get_charts)
+        self.charts = None
+        
         # Initialize database if it doesn't exist
         self.initialize_database()
         
         self.current_user = None
         
+        # Catch up on recurring expenses now and then every hour
+        self.run_recurring_expenses()
+        self.root.after(MAINTENANCE_MS, self.maintain_database)
+        
         # Initially show login frame
         self.show_login_frame()
 
@@ -245,7 +274,8 @@ class ExpenseTrackerApp:
             ("🎯 Budget Goals", self.set_budget_goals),
             ("📤 Export", self.export_expenses),
             ("➗ Split Expense", self.split_expense),
-            ("📅 Budget Calendar", self.show_budget_calendar)
+            ("📅 Budget Calendar", self.show_budget_calendar),
+            ("📥 Import Statement", self.import_statement)
         ]
         
         for i, (text, command) in enumerate(feature_buttons):
@@ -339,52 +369,39 @@ class ExpenseTrackerApp:
 
     def fade_out_widgets(self):
         """Clear all widgets from main container"""
+        # Results for the screen being left have nowhere to go
+        self.tasks.cancel_group('screen')
+        self.tasks.cancel_group('expense_page')
         for widget in self.main_container.winfo_children():
             widget.destroy()
 
     def initialize_database(self):
-        """Initialize database with required tables if they don't exist"""
+        """Apply the database schema once at startup"""
         try:
-            connection = sqlite3.connect(DB_PATH)
-            cursor = connection.cursor()
-            
-            # Create users table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    username TEXT PRIMARY KEY,
-                    password TEXT NOT NULL,
-                    income REAL DEFAULT 0
-                )
-            ''')
-            
-            # Create expenses table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS expenses (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT,
-                    date DATE,
-                    category TEXT,
-                    amount REAL,
-                    description TEXT,
-                    FOREIGN KEY (username) REFERENCES users(username)
-                )
-            ''')
-            
-            connection.commit()
+            self.db.initialize()
         except Exception as e:
             messagebox.showerror("Database Error", f"Failed to initialize database: {str(e)}")
-        finally:
-            if connection:
-                connection.close()
 
-    def get_db_connection(self):
-        """Get database connection"""
-        try:
-            connection = sqlite3.connect(DB_PATH)
-            return connection
-        except Exception as e:
-            messagebox.showerror("Database Error", str(e))
-            return None
+    def run_recurring_expenses(self):
+        """Create due recurring expenses in the background and schedule the next run"""
+        def work(task):
+            return self.service.run_recurring()
+        
+        def on_done(summary):
+            for username in summary['usernames']:
+                self.insights_cache.invalidate(username)
+                self.month_totals.invalidate(username)
+        
+        def on_error(e):
+            messagebox.showerror("Error", f"Failed to create recurring expenses: {str(e)}")
+        
+        self.tasks.submit(work, on_done=on_done, on_error=on_error)
+        self.root.after(RECURRING_CHECK_MS, self.run_recurring_expenses)
+
+    def maintain_database(self):
+        """Checkpoint the WAL in the background and schedule the next run"""
+        self.tasks.submit(lambda task: self.db.maintain())
+        self.root.after(MAINTENANCE_MS, self.maintain_database)
 
     def login(self):
         """Handle login"""
@@ -392,16 +409,9 @@ class ExpenseTrackerApp:
         password = self.password_var.get()
         
         try:
-            connection = self.get_db_connection()
-            cursor = connection.cursor()
-            
-            hashed_password = hashlib.sha256(password.encode()).hexdigest()
-            cursor.execute(
-                "SELECT * FROM users WHERE username = ? AND password = ?",
-                (username, hashed_password)
-            )
-            
-            if cursor.fetchone():
+            with query_profiler.screen('login'):
+                authenticated = self.service.authenticate(username, password)
+            if authenticated:
                 self.current_user = username
                 self.show_main_frame()
             else:
@@ -409,45 +419,26 @@ class ExpenseTrackerApp:
                 
         except Exception as e:
             messagebox.showerror("Database Error", str(e))
-        finally:
-            if connection:
-                connection.close()
 
     def register(self):
         """Handle registration"""
         username = self.reg_username_var.get()
         password = self.reg_password_var.get()
         
-        if not username or not password:
-            messagebox.showerror("Error", "Please fill in all fields!")
-            return
-        
         try:
-            connection = self.get_db_connection()
-            cursor = connection.cursor()
-            
-            # Check if username exists
-            cursor.execute("SELECT username FROM users WHERE username = ?", (username,))
-            if cursor.fetchone():
-                messagebox.showerror("Error", "Username already exists!")
-                return
-            
-            # Insert new user
-            hashed_password = hashlib.sha256(password.encode()).hexdigest()
-            cursor.execute(
-                "INSERT INTO users (username, password, income) VALUES (?, ?, ?)",
-                (username, hashed_password, 0)
-            )
-            connection.commit()
-            
+            self.service.register(username, password)
             messagebox.showinfo("Success", "Registration successful! Please login.")
             self.show_login_frame()
             
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except Exception as e:
             messagebox.showerror("Database Error", str(e))
-        finally:
-            if connection:
-                connection.close()
+
+    def expenses_changed(self):
+        """Drop cached views that depend on the current user's expenses"""
+        self.insights_cache.invalidate(self.current_user)
+        self.month_totals.invalidate(self.current_user)
 
     def logout(self):
         """Handle logout"""
@@ -481,6 +472,37 @@ class ExpenseTrackerApp:
         ttk.Label(expense_frame, text="Description:", style="Custom.TLabel").pack(pady=5)
         self.description_var = tk.StringVar()
         ttk.Entry(expense_frame, textvariable=self.description_var, style="Custom.TEntry").pack(pady=5)
+        suggestion_label = ttk.Label(expense_frame, text="", style="Custom.TLabel")
+        suggestion_label.pack()
+        
+        # Suggest a category from the user's history as the description is typed
+        username = self.current_user
+        category_index = None
+        suggested = {'category': None}
+        
+        def on_description_changed(*args):
+            if category_index is None:
+                return
+            category, confidence = category_index.suggest(self.description_var.get(), partial=True)
+            # Only replace a category the user has not picked themselves
+            if self.category_var.get() in ('', suggested['category']):
+                self.category_var.set(category or '')
+                suggested['category'] = category
+            suggestion_label.configure(
+                text=f"Suggested: {category} ({confidence * 100:.0f}%)" if category else ""
+            )
+        
+        def on_index_ready(index):
+            nonlocal category_index
+            category_index = index
+            on_description_changed()
+        
+        self.description_var.trace_add('write', on_description_changed)
+        self.tasks.submit(
+            lambda task: self.service.category_index(username),
+            on_done=on_index_ready,
+            group='screen'
+        )
         
         # Date
         ttk.Label(expense_frame, text="Date:", style="Custom.TLabel").pack(pady=5)
@@ -508,29 +530,28 @@ class ExpenseTrackerApp:
     def add_expense(self):
         """Add a new expense to the database"""
         try:
-            amount = float(self.amount_var.get())
-            category = self.category_var.get()
-            description = self.description_var.get()
-            date = self.date_var.get()
-            
-            if amount <= 0:
-                messagebox.showerror("Error", "Amount must be greater than 0")
-                return
-            
-            if not category:
-                messagebox.showerror("Error", "Please select a category")
-                return
-            
-            connection = self.get_db_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("""
-                INSERT INTO expenses (username, date, category, amount, description)
-                VALUES (?, ?, ?, ?, ?)
-            """, (self.current_user, date, category, amount, description))
+            result = self.service.add_expense(
+                self.current_user,
+                self.amount_var.get(),
+                self.category_var.get(),
+                self.description_var.get(),
+                self.date_var.get()
+            )
+            self.expenses_changed()
             
-            connection.commit()
-            messagebox.showinfo("Success", "Expense added successfully!")
+            alert = result['budget_alert']
+            if alert:
+                if alert['level'] == 'exceeded':
+                    heading = f"You are ₹{-alert['remaining']:.2f} over your {alert['category']} budget"
+                else:
+                    heading = f"You have used {alert['share'] * 100:.0f}% of your {alert['category']} budget"
+                messagebox.showwarning(
+                    "Budget Alert",
+                    f"{heading} this month.\n"
+                    f"Spent ₹{alert['spent']:.2f} of ₹{alert['budget']:.2f}."
+                )
+            else:
+                messagebox.showinfo("Success", "Expense added successfully!")
             
             # Clear the fields
             self.amount_var.set("")
@@ -538,13 +559,10 @@ class ExpenseTrackerApp:
             self.description_var.set("")
             self.date_var.set(datetime.now().strftime("%Y-%m-%d"))
             
-        except ValueError:
-            messagebox.showerror("Error", "Please enter a valid amount")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to add expense: {str(e)}")
-        finally:
-            if connection:
-                connection.close()
 
     def show_expenses_list(self):
         """Show the list of expenses"""
@@ -558,23 +576,63 @@ class ExpenseTrackerApp:
         )
         expenses_frame.pack(fill='both', expand=True, padx=10, pady=5)
         
-        # Create Treeview
+        # Rows are paged in from SQL as the list scrolls
+        self.expense_pager = ExpensePager(self.db, self.current_user)
+        self.expense_page_loading = False
+        
+        # Filters
+        filter_frame = ttk.Frame(expenses_frame, style="Custom.TFrame")
+        filter_frame.pack(side='top', fill='x', pady=(0, 5))
+        
+        ttk.Label(filter_frame, text="Category:", style="Custom.TLabel").pack(side='left', padx=5)
+        self.filter_category_var = tk.StringVar()
+        ttk.Combobox(
+            filter_frame,
+            textvariable=self.filter_category_var,
+            values=['', 'Food', 'Transport', 'Entertainment', 'Utilities', 'Other'],
+            width=15
+        ).pack(side='left', padx=5)
+        
+        ttk.Label(filter_frame, text="Search:", style="Custom.TLabel").pack(side='left', padx=5)
+        self.filter_search_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.filter_search_var, style="Custom.TEntry").pack(side='left', padx=5)
+        
+        ttk.Button(
+            filter_frame,
+            text="Filter",
+            command=self.apply_expense_filters,
+            style="Custom.TButton"
+        ).pack(side='left', padx=5)
+        
+        # Create Treeview; each item's iid is its expense id
         self.expenses_tree = ttk.Treeview(
             expenses_frame,
             columns=('Date', 'Category', 'Amount', 'Description'),
             show='headings',
+            selectmode='extended',
             style="Custom.Treeview"
         )
-        
-        # Configure columns
-        self.expenses_tree.heading('Date', text='Date')
-        self.expenses_tree.heading('Category', text='Category')
-        self.expenses_tree.heading('Amount', text='Amount')
+        self.expense_rows = {}
+        self.expenses_tree.bind("<Delete>", lambda e: self.remove_expense())
+        self.expenses_tree.bind("<Control-z>", lambda e: self.undo_delete())
+        self.expenses_tree.bind("<Double-1>", lambda e: self.edit_expense())
+        
+        # Configure columns; clicking a sortable heading sorts in SQL
+        self.expenses_tree.heading('Date', text='Date', command=lambda: self.sort_expenses('date'))
+        self.expenses_tree.heading('Category', text='Category', command=lambda: self.sort_expenses('category'))
+        self.expenses_tree.heading('Amount', text='Amount', command=lambda: self.sort_expenses('amount'))
         self.expenses_tree.heading('Description', text='Description')
         
         # Add scrollbar
         scrollbar = ttk.Scrollbar(expenses_frame, orient="vertical", command=self.expenses_tree.yview)
-        self.expenses_tree.configure(yscrollcommand=scrollbar.set)
+        
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            # Fetch the next page once the view nears the end of what is loaded
+            if float(last) > 0.9:
+                self.load_more_expenses()
+        
+        self.expenses_tree.configure(yscrollcommand=on_scroll)
         
         # Pack treeview and scrollbar
         self.expenses_tree.pack(side='left', fill='both', expand=True)
@@ -587,6 +645,20 @@ class ExpenseTrackerApp:
         button_frame = ttk.Frame(self.main_container, style="Custom.TFrame")
         button_frame.pack(fill='x', padx=10, pady=5)
         
+        ttk.Button(
+            button_frame,
+            text="Edit Selected",
+            command=self.edit_expense,
+            style="Custom.TButton"
+        ).pack(side='left', padx=5)
+        
+        ttk.Button(
+            button_frame,
+            text="Receipt",
+            command=self.show_receipt,
+            style="Custom.TButton"
+        ).pack(side='left', padx=5)
+        
         ttk.Button(
             button_frame,
             text="Remove Selected",
@@ -594,6 +666,13 @@ class ExpenseTrackerApp:
             style="Custom.TButton"
         ).pack(side='left', padx=5)
         
+        ttk.Button(
+            button_frame,
+            text="Undo Remove",
+            command=self.undo_delete,
+            style="Custom.TButton"
+        ).pack(side='left', padx=5)
+        
         ttk.Button(
             button_frame,
             text="Clear All",
@@ -607,62 +686,337 @@ class ExpenseTrackerApp:
             command=self.show_main_frame,
             style="Custom.TButton"
         ).pack(side='right', padx=5)
+        
+        self.expense_status_label = ttk.Label(button_frame, text="", style="Custom.TLabel")
+        self.expense_status_label.pack(side='right', padx=10)
 
     def load_expenses(self):
-        """Load expenses from database into treeview"""
+        """Reload the expense list from its first page"""
+        # Drop any page still in flight for the old sort/filter
+        self.tasks.cancel_group('expense_page')
+        self.expense_page_loading = False
+        
         # Clear existing items
-        for item in self.expenses_tree.get_children():
-            self.expenses_tree.delete(item)
+        self.expenses_tree.delete(*self.expenses_tree.get_children())
+        self.expense_rows.clear()
+        self.expense_pager.reset()
+        self.load_more_expenses()
+
+    def load_more_expenses(self):
+        """Fetch the next page of expenses in the background and append it"""
+        pager = self.expense_pager
+        if pager.exhausted or self.expense_page_loading:
+            return
+        self.expense_page_loading = True
         
-        try:
-            connection = self.get_db_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("""
-                SELECT date, category, amount, description 
-                FROM expenses 
-                WHERE username = ?
-                ORDER BY date DESC
-            """, (self.current_user,))
-            
-            for row in cursor.fetchall():
-                self.expenses_tree.insert('', 'end', values=row)
-                
-        except Exception as e:
+        def on_done(rows):
+            self.expense_page_loading = False
+            pager.advance(rows)
+            for row in rows:
+                self.expenses_tree.insert('', 'end', iid=str(row[0]), values=row[1:])
+                self.expense_rows[str(row[0])] = tuple(row)
+        
+        def on_error(e):
+            self.expense_page_loading = False
             messagebox.showerror("Error", f"Failed to load expenses: {str(e)}")
-        finally:
-            if connection:
-                connection.close()
+        
+        self.tasks.submit(
+            lambda task, query: pager.fetch_page(query),
+            pager.next_query(),
+            on_done=on_done,
+            on_error=on_error,
+            group='expense_page',
+            screen='list load'
+        )
+
+    def sort_expenses(self, column):
+        """Sort the expense list by column, toggling direction on repeated clicks"""
+        pager = self.expense_pager
+        descending = not pager.descending if pager.sort == column else True
+        pager.set_sort(column, descending)
+        self.load_expenses()
+
+    def apply_expense_filters(self):
+        """Reload the expense list with the selected filters"""
+        self.expense_pager.set_filters(
+            category=self.filter_category_var.get(),
+            search=self.filter_search_var.get().strip()
+        )
+        self.load_expenses()
 
     def remove_expense(self):
-        """Remove selected expense"""
-        selected_item = self.expenses_tree.selection()
-        if not selected_item:
+        """Remove the selected expenses; they can be restored with Undo"""
+        selected = self.expenses_tree.selection()
+        if not selected:
             messagebox.showwarning("Warning", "Please select an expense to remove")
             return
         
-        if messagebox.askyesno("Confirm", "Are you sure you want to remove this expense?"):
+        prompt = ("Are you sure you want to remove this expense?" if len(selected) == 1
+                  else f"Are you sure you want to remove these {len(selected)} expenses?")
+        if messagebox.askyesno("Confirm", prompt):
+            try:
+                # One DELETE for the whole selection, by primary key
+                result = self.service.delete_expenses(self.current_user, selected)
+                self.expenses_changed()
+                
+                self.expenses_tree.delete(*selected)
+                for iid in selected:
+                    self.expense_rows.pop(iid, None)
+                self.expense_status_label.configure(
+                    text=f"Removed {result['deleted']} expense(s). Press Undo Remove to restore."
+                )
+                
+            except ServiceError as e:
+                messagebox.showerror("Error", str(e))
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to remove expense: {str(e)}")
+
+    def undo_delete(self):
+        """Restore the most recently removed expenses into the list"""
+        try:
+            restored = self.service.undo_delete(self.current_user)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to restore expenses: {str(e)}")
+            return
+        if not restored:
+            self.expense_status_label.configure(text="Nothing to undo")
+            return
+        self.expenses_changed()
+        
+        # Put each row back where the current sort puts it, if it is in the
+        # loaded part of the list; rows further down arrive with later pages
+        pager = self.expense_pager
+        for expense in restored:
+            row = (expense['id'], expense['date'], expense['category'],
+                   expense['amount'], expense['description'])
+            if not pager.accepts(row):
+                continue
+            key = pager.sort_key(row)
+            position = 'end'
+            for index, iid in enumerate(self.expenses_tree.get_children()):
+                other = pager.sort_key(self.expense_rows[iid])
+                if (other < key) if pager.descending else (other > key):
+                    position = index
+                    break
+            self.expenses_tree.insert('', position, iid=str(row[0]), values=row[1:])
+            self.expense_rows[str(row[0])] = row
+        self.expense_status_label.configure(text=f"Restored {len(restored)} expense(s)")
+
+    def edit_expense(self):
+        """Edit the selected expense in a small form"""
+        selected = self.expenses_tree.selection()
+        if len(selected) != 1:
+            messagebox.showwarning("Warning", "Please select one expense to edit")
+            return
+        iid = selected[0]
+        _, date, category, amount, description = self.expense_rows[iid]
+        
+        edit_window = tk.Toplevel(self.root)
+        edit_window.title("Edit Expense")
+        edit_window.geometry("400x420")
+        edit_window.configure(bg=WHITE)
+        
+        frame = ttk.LabelFrame(
+            edit_window,
+            text="✏️ Edit Expense",
+            padding="15",
+            style="Custom.TLabelframe"
+        )
+        frame.pack(fill='both', expand=True, padx=10, pady=5)
+        
+        ttk.Label(frame, text="Amount:", style="Custom.TLabel").pack(pady=5)
+        amount_var = tk.StringVar(value=str(amount))
+        ttk.Entry(frame, textvariable=amount_var, style="Custom.TEntry").pack(pady=5)
+        
+        ttk.Label(frame, text="Category:", style="Custom.TLabel").pack(pady=5)
+        category_var = tk.StringVar(value=category)
+        categories = ['Food', 'Transport', 'Entertainment', 'Utilities', 'Other']
+        ttk.Combobox(frame, textvariable=category_var, values=categories).pack(pady=5)
+        
+        ttk.Label(frame, text="Description:", style="Custom.TLabel").pack(pady=5)
+        description_var = tk.StringVar(value=description or "")
+        ttk.Entry(frame, textvariable=description_var, style="Custom.TEntry").pack(pady=5)
+        
+        ttk.Label(frame, text="Date:", style="Custom.TLabel").pack(pady=5)
+        date_var = tk.StringVar(value=date)
+        ttk.Entry(frame, textvariable=date_var, style="Custom.TEntry").pack(pady=5)
+        
+        def save():
             try:
-                connection = self.get_db_connection()
-                cursor = connection.cursor()
+                expense = self.service.update_expense(
+                    self.current_user, int(iid),
+                    amount=amount_var.get(),
+                    category=category_var.get(),
+                    description=description_var.get(),
+                    date=date_var.get()
+                )
+                self.expenses_changed()
                 
-                # Get the values of the selected item
-                values = self.expenses_tree.item(selected_item)['values']
+                row = (expense['id'], expense['date'], expense['category'],
+                       expense['amount'], expense['description'])
+                self.expense_rows[iid] = row
+                if self.expenses_tree.exists(iid):
+                    self.expenses_tree.item(iid, values=row[1:])
+                edit_window.destroy()
                 
-                cursor.execute("""
-                    DELETE FROM expenses 
-                    WHERE username = ? AND date = ? AND category = ? AND amount = ? AND description = ?
-                """, (self.current_user, values[0], values[1], values[2], values[3]))
+            except ServiceError as e:
+                messagebox.showerror("Error", str(e))
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to update expense: {str(e)}")
+        
+        ttk.Button(
+            frame,
+            text="Save",
+            command=save,
+            style="Custom.TButton"
+        ).pack(pady=10)
+
+    def show_receipt(self):
+        """Show, attach or save the receipt of the selected expense
+
+        Only the stored thumbnail is loaded when the window opens; the
+        original is read and decoded when Full Size is pressed.
+        """
+        selected = self.expenses_tree.selection()
+        if len(selected) != 1:
+            messagebox.showwarning("Warning", "Please select one expense")
+            return
+        expense_id = int(selected[0])
+        username = self.current_user
+        
+        receipt_window = tk.Toplevel(self.root)
+        receipt_window.title("Receipt")
+        receipt_window.geometry("420x420")
+        receipt_window.configure(bg=WHITE)
+        
+        frame = ttk.LabelFrame(
+            receipt_window,
+            text="🧾 Receipt",
+            padding="15",
+            style="Custom.TLabelframe"
+        )
+        frame.pack(fill='both', expand=True, padx=10, pady=5)
+        
+        image_label = ttk.Label(frame, text="Loading...", style="Custom.TLabel")
+        image_label.pack(pady=5)
+        info_label = ttk.Label(frame, text="", style="Custom.TLabel")
+        info_label.pack(pady=5)
+        
+        receipt_window.bind(
+            "<Destroy>",
+            lambda e: self.tasks.cancel_group(receipt_window) if e.widget is receipt_window else None
+        )
+        
+        def show_image(image):
+            from PIL import ImageTk
+            
+            photo = ImageTk.PhotoImage(image)
+            # Tk draws from this reference; without it the image is collected
+            image_label.image = photo
+            image_label.configure(image=photo, text="")
+        
+        def on_error(e):
+            image_label.configure(image='', text=str(e) if isinstance(e, ServiceError) else "")
+            if not isinstance(e, ServiceError):
+                messagebox.showerror("Error", f"Failed to load receipt: {str(e)}")
+        
+        def load_thumbnail():
+            def work(task):
+                from io import BytesIO
+                from PIL import Image
                 
-                connection.commit()
-                self.expenses_tree.delete(selected_item)
-                messagebox.showinfo("Success", "Expense removed successfully!")
+                info = self.service.receipt_info(username, expense_id)
+                image = Image.open(BytesIO(self.service.receipt_thumbnail(username, expense_id)))
+                image.load()
+                return info, image
+            
+            def on_done(result):
+                info, image = result
+                show_image(image)
+                info_label.configure(
+                    text=f"{info['format'] or 'Image'}, {info['width']}x{info['height']}, "
+                         f"{info['size'] / 1024:.0f} KB"
+                )
+            
+            image_label.configure(image='', text="Loading...")
+            self.tasks.submit(work, on_done=on_done, on_error=on_error, group=receipt_window)
+        
+        def full_size():
+            # Fit the screen, decoding JPEGs at a reduced scale where that is enough
+            bounds = (receipt_window.winfo_screenwidth() - 100, receipt_window.winfo_screenheight() - 150)
+            
+            def work(task):
+                from io import BytesIO
+                from PIL import Image
                 
+                image = Image.open(BytesIO(self.service.receipt_image(username, expense_id)))
+                image.draft('RGB', bounds)
+                image.thumbnail(bounds)
+                return image
+            
+            def on_done(image):
+                receipt_window.geometry("")
+                show_image(image)
+            
+            image_label.configure(image='', text="Loading...")
+            self.tasks.submit(work, on_done=on_done, on_error=on_error, group=receipt_window)
+        
+        def attach():
+            filename = filedialog.askopenfilename(
+                parent=receipt_window,
+                filetypes=[("Images", "*.jpg *.jpeg *.png *.gif *.bmp *.webp *.tif *.tiff"),
+                           ("All files", "*.*")]
+            )
+            if not filename:
+                return
+            
+            def on_done(info):
+                load_thumbnail()
+            
+            def on_attach_error(e):
+                messagebox.showerror("Error", str(e) if isinstance(e, ServiceError)
+                                     else f"Failed to attach receipt: {str(e)}")
+            
+            image_label.configure(image='', text="Saving...")
+            self.tasks.submit(
+                lambda task: self.service.attach_receipt(username, expense_id, filename),
+                on_done=on_done,
+                on_error=on_attach_error,
+                group=receipt_window
+            )
+        
+        def save_as():
+            filename = filedialog.asksaveasfilename(parent=receipt_window)
+            if not filename:
+                return
+            try:
+                self.service.save_receipt(username, expense_id, filename)
+            except ServiceError as e:
+                messagebox.showerror("Error", str(e))
             except Exception as e:
-                messagebox.showerror("Error", f"Failed to remove expense: {str(e)}")
-            finally:
-                if connection:
-                    connection.close()
+                messagebox.showerror("Error", f"Failed to save receipt: {str(e)}")
+        
+        def remove():
+            if not messagebox.askyesno("Confirm", "Remove this receipt?", parent=receipt_window):
+                return
+            try:
+                self.service.detach_receipt(username, expense_id)
+            except ServiceError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to remove receipt: {str(e)}")
+                return
+            image_label.configure(image='', text="This expense has no receipt")
+            info_label.configure(text="")
+        
+        buttons = ttk.Frame(frame, style="Custom.TFrame")
+        buttons.pack(side='bottom', pady=10)
+        for text, command in (("Attach...", attach), ("Full Size", full_size),
+                              ("Save As...", save_as), ("Remove", remove)):
+            ttk.Button(buttons, text=text, command=command, style="Custom.TButton").pack(side='left', padx=3)
+        
+        load_thumbnail()
 
     def show_income_management(self):
         """Show income management section"""
@@ -713,44 +1067,25 @@ class ExpenseTrackerApp:
     def get_user_income(self):
         """Get current user's income"""
         try:
-            connection = self.get_db_connection()
-            cursor = connection.cursor()
-            cursor.execute("SELECT income FROM users WHERE username = ?", (self.current_user,))
-            result = cursor.fetchone()
-            return float(result[0]) if result else 0.0
+            return self.service.get_income(self.current_user)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to get income: {str(e)}")
             return 0.0
-        finally:
-            if connection:
-                connection.close()
 
     def update_income(self):
         """Update user's income"""
         try:
-            new_income = float(self.new_income_var.get())
-            if new_income < 0:
-                messagebox.showerror("Error", "Income cannot be negative")
-                return
-            
-            connection = self.get_db_connection()
-            cursor = connection.cursor()
-            cursor.execute(
-                "UPDATE users SET income = ? WHERE username = ?",
-                (new_income, self.current_user)
-            )
-            connection.commit()
+            self.service.set_income(self.current_user, self.new_income_var.get())
+            # Recommendations are based on income too
+            self.expenses_changed()
             
             messagebox.showinfo("Success", "Income updated successfully!")
             self.show_income_management()  # Refresh the frame
             
-        except ValueError:
-            messagebox.showerror("Error", "Please enter a valid amount")
+        except ServiceError as e:
+            messagebox.showerror("Error", str(e))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to update income: {str(e)}")
-        finally:
-            if connection:
-                connection.close()
 
     def show_insights_window(self):
         """Show analytics and insights with AI recommendations"""
@@ -768,20 +1103,36 @@ class ExpenseTrackerApp:
         notebook = ttk.Notebook(insights_frame)
         notebook.pack(fill='both', expand=True, pady=10)
         
+        # Tabs are rendered the first time they are selected
+        pending_tabs = {}
+        
         # Category Distribution Tab
         category_frame = ttk.Frame(notebook, style="Custom.TFrame")
         notebook.add(category_frame, text="Category Distribution")
-        self.plot_category_distribution(category_frame)
+        pending_tabs[str(category_frame)] = lambda: self.plot_category_distribution(category_frame)
         
         # Monthly Trend Tab
         trend_frame = ttk.Frame(notebook, style="Custom.TFrame")
         notebook.add(trend_frame, text="Monthly Trend")
-        self.plot_monthly_trend(trend_frame)
+        pending_tabs[str(trend_frame)] = lambda: self.plot_monthly_trend(trend_frame)
+        
+        # Forecast Tab
+        forecast_frame = ttk.Frame(notebook, style="Custom.TFrame")
+        notebook.add(forecast_frame, text="Forecast")
+        pending_tabs[str(forecast_frame)] = lambda: self.show_forecast(forecast_frame)
         
         # AI Recommendations Tab
         ai_frame = ttk.Frame(notebook, style="Custom.TFrame")
         notebook.add(ai_frame, text="AI Recommendations")
-        self.show_ai_recommendations(ai_frame)
+        pending_tabs[str(ai_frame)] = lambda: self.show_ai_recommendations(ai_frame)
+        
+        def on_tab_changed(event=None):
+            render_tab = pending_tabs.pop(notebook.select(), None)
+            if render_tab:
+                render_tab()
+        
+        notebook.bind("<<NotebookTabChanged>>", on_tab_changed)
+        on_tab_changed()
         
         # Back Button
         ttk.Button(
@@ -791,20 +1142,64 @@ class ExpenseTrackerApp:
             style="Custom.TButton"
         ).pack(pady=10)
 
+    def load_in_background(self, parent_frame, work, render, error_message, cache_key=None):
+        """Run work(task) off the main loop, then render(result) into parent_frame
+
+        With a cache_key the result is kept in the Insights cache for the
+        current user, and later calls render it without running work again.
+        """
+        username = self.current_user
+        if cache_key is not None:
+            cached = self.insights_cache.get(username, cache_key)
+            if cached is not None:
+                render(cached)
+                return None
+        
+        loading_label = ttk.Label(parent_frame, text="Loading...", style="Custom.TLabel")
+        loading_label.pack(pady=20)
+        
+        def on_progress(fraction, message):
+            loading_label.configure(text=f"{message or 'Loading'}... {fraction * 100:.0f}%")
+        
+        def on_done(result):
+            loading_label.destroy()
+            if cache_key is not None:
+                self.insights_cache.put(username, cache_key, result)
+            try:
+                render(result)
+            except Exception as e:
+                messagebox.showerror("Error", f"{error_message}: {str(e)}")
+        
+        def on_error(e):
+            loading_label.destroy()
+            messagebox.showerror("Error", f"{error_message}: {str(e)}")
+        
+        return self.tasks.submit(
+            work,
+            on_done=on_done,
+            on_error=on_error,
+            on_progress=on_progress,
+            group='screen',
+            screen='insights'
+        )
+
+    def get_charts(self):
+        """Return the chart slots, importing matplotlib on first use"""
+        if self.charts is None:
+            from chart_renderer import ChartRenderer
+            self.charts = ChartRenderer(self.root)
+        return self.charts
+
     def plot_category_distribution(self, parent_frame):
         """Plot expense distribution by category"""
-        try:
-            connection = self.get_db_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("""
-                SELECT category, SUM(amount) as total
-                FROM expenses
-                WHERE username = ?
-                GROUP BY category
-            """, (self.current_user,))
-            
-            data = cursor.fetchall()
+        username = self.current_user
+        
+        def query(task):
+            # Pay for the matplotlib import on the worker, not the Tk thread
+            import chart_renderer
+            return self.service.category_totals(username)
+        
+        def render(data):
             if not data:
                 ttk.Label(
                     parent_frame,
@@ -816,37 +1211,29 @@ class ExpenseTrackerApp:
             categories = [row[0] for row in data]
             amounts = [row[1] for row in data]
             
-            # Create pie chart
-            fig, ax = plt.subplots(figsize=(8, 6))
-            ax.pie(amounts, labels=categories, autopct='%1.1f%%')
-            ax.set_title("Expense Distribution by Category")
-            
-            # Embed in tkinter
-            canvas = FigureCanvasTkAgg(fig, parent_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill='both', expand=True)
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to create chart: {str(e)}")
-        finally:
-            if connection:
-                connection.close()
+            # Update the pie chart in place and embed it in this tab
+            from chart_renderer import PieChart
+            chart = self.get_charts().slot(
+                'category_distribution',
+                lambda root: PieChart(root, "Expense Distribution by Category")
+            )
+            chart.update(categories, amounts)
+            chart.attach(parent_frame)
+        
+        self.load_in_background(
+            parent_frame, query, render, "Failed to create chart",
+            cache_key='category_distribution'
+        )
 
     def plot_monthly_trend(self, parent_frame):
         """Plot monthly expense trend"""
-        try:
-            connection = self.get_db_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("""
-                SELECT strftime('%Y-%m', date) as month, SUM(amount) as total
-                FROM expenses
-                WHERE username = ?
-                GROUP BY month
-                ORDER BY month
-            """, (self.current_user,))
-            
-            data = cursor.fetchall()
+        username = self.current_user
+        
+        def query(task):
+            import chart_renderer
+            return self.service.monthly_totals(username)
+        
+        def render(data):
             if not data:
                 ttk.Label(
                     parent_frame,
@@ -858,44 +1245,79 @@ class ExpenseTrackerApp:
             months = [row[0] for row in data]
             amounts = [row[1] for row in data]
             
-            # Create line chart
-            fig, ax = plt.subplots(figsize=(8, 6))
-            ax.plot(months, amounts, marker='o')
-            ax.set_title("Monthly Expense Trend")
-            ax.set_xlabel("Month")
-            ax.set_ylabel("Total Expenses (₹)")
-            plt.xticks(rotation=45)
-            plt.tight_layout()
+            # Update the line chart in place and embed it in this tab
+            from chart_renderer import LineChart
+            chart = self.get_charts().slot(
+                'monthly_trend',
+                lambda root: LineChart(root, "Monthly Expense Trend", "Month", "Total Expenses (₹)")
+            )
+            chart.update(months, amounts)
+            chart.attach(parent_frame)
+        
+        self.load_in_background(
+            parent_frame, query, render, "Failed to create chart",
+            cache_key='monthly_trend'
+        )
+
+    def show_forecast(self, parent_frame):
+        """Plot recent monthly totals and the forecast for the next months"""
+        username = self.current_user
+        
+        def query(task):
+            import chart_renderer
+            # Stored models are only extended when a new month has completed
+            return self.service.forecast(username)
+        
+        def render(result):
+            if not result['categories']:
+                ttk.Label(
+                    parent_frame,
+                    text="Forecasts need at least one complete month of expenses",
+                    style="Custom.TLabel"
+                ).pack(pady=20)
+                return
             
-            # Embed in tkinter
-            canvas = FigureCanvasTkAgg(fig, parent_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill='both', expand=True)
+            summary_frame = ttk.Frame(parent_frame, style="Custom.TFrame")
+            summary_frame.pack(fill='x', padx=10, pady=5)
+            for row in result['categories']:
+                change = row['monthly_change']
+                arrow = "▲" if change > 0 else "▼"
+                ttk.Label(
+                    summary_frame,
+                    text=f"{row['category']}: ₹{row['forecast'][0]:.2f} expected in {result['months'][0]} "
+                         f"(trend {arrow} ₹{abs(change):.2f}/month)",
+                    style="Custom.TLabel"
+                ).pack(anchor='w', pady=1)
             
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to create chart: {str(e)}")
-        finally:
-            if connection:
-                connection.close()
+            from chart_renderer import ForecastChart
+            chart = self.get_charts().slot(
+                'forecast',
+                lambda root: ForecastChart(root, "Expense Forecast", "Month", "Total Expenses (₹)")
+            )
+            chart.update(
+                result['history']['months'] + result['months'],
+                result['history']['totals'],
+                result['total']
+            )
+            chart.attach(parent_frame)
+        
+        self.load_in_background(
+            parent_frame, query, render, "Failed to create forecast",
+            cache_key='forecast'
+        )
 
     def show_ai_recommendations(self, parent_frame):
         """Show AI-based spending recommendations with smaller dataset requirements"""
-        try:
-            connection = self.get_db_connection()
-            cursor = connection.cursor()
-            
-            # Get recent expenses (last 10 entries)
-            cursor.execute("""
-                SELECT date, category, amount
-                FROM expenses
-                WHERE username = ?
-                ORDER BY date DESC
-                LIMIT 10
-            """, (self.current_user,))
-            
-            expenses = cursor.fetchall()
+        username = self.current_user
+        
+        def query(task):
+            # Full-history statistics from the cached expense arrays
+            return self.service.insights(username)
+        
+        def render(insights):
+            monthly_income = insights.get('monthly_income', 0.0)
             
-            if len(expenses) < 5:  # Minimum 5 entries required
+            if insights['count'] < 5:  # Minimum 5 entries required
                 ttk.Label(
                     parent_frame,
                     text="Please add at least 5 expenses for personalized recommendations.",
@@ -912,29 +1334,26 @@ class ExpenseTrackerApp:
             )
             recommendations_frame.pack(fill='x', padx=10, pady=5)
             
-            # Calculate basic statistics
-            total_spent = sum(amount for _, _, amount in expenses)
-            avg_per_expense = total_spent / len(expenses)
+            total_spent = insights['total']
             
-            # Get category breakdown
-            category_totals = {}
-            for _, category, amount in expenses:
-                category_totals[category] = category_totals.get(category, 0) + amount
-            
-            # Find highest spending category
-            highest_category = max(category_totals.items(), key=lambda x: x[1])
-            
-            # Display recent spending summary
+            # Display spending summary
             ttk.Label(
                 recommendations_frame,
-                text=f"Recent Spending Analysis (Last {len(expenses)} transactions)",
+                text=f"Spending Analysis (all {insights['count']} transactions)",
                 style="Custom.TLabel",
                 font=('Helvetica', 10, 'bold')
             ).pack(anchor='w', pady=5)
             
             ttk.Label(
                 recommendations_frame,
-                text=f"Total spent: ₹{total_spent:.2f}",
+                text=f"Total spent: ₹{total_spent:.2f} | Average expense: ₹{insights['average']:.2f}",
+                style="Custom.TLabel"
+            ).pack(anchor='w', pady=2)
+            
+            ttk.Label(
+                recommendations_frame,
+                text=f"Daily spend: ₹{insights['daily_average']:.2f} on average, "
+                     f"₹{insights['recent_daily_average']:.2f} over the last {insights['window_days']} days",
                 style="Custom.TLabel"
             ).pack(anchor='w', pady=2)
             
@@ -946,14 +1365,31 @@ class ExpenseTrackerApp:
                 font=('Helvetica', 10, 'bold')
             ).pack(anchor='w', pady=5)
             
-            for category, amount in category_totals.items():
-                percentage = (amount / total_spent) * 100
+            for row in insights['categories']:
                 ttk.Label(
                     recommendations_frame,
-                    text=f"{category}: ₹{amount:.2f} ({percentage:.1f}%)",
+                    text=f"{row['category']}: ₹{row['total']:.2f} ({row['share'] * 100:.1f}%), "
+                         f"typical ₹{row['median']:.2f}, 90% under ₹{row['p90']:.2f}",
                     style="Custom.TLabel"
                 ).pack(anchor='w', pady=1)
             
+            # Biggest changes against the previous month
+            if insights['month_over_month']:
+                ttk.Label(
+                    recommendations_frame,
+                    text=f"\nChanges in {insights['latest_month']}:",
+                    style="Custom.TLabel",
+                    font=('Helvetica', 10, 'bold')
+                ).pack(anchor='w', pady=5)
+                for row in insights['month_over_month'][:3]:
+                    arrow = "▲" if row['change'] > 0 else "▼"
+                    ttk.Label(
+                        recommendations_frame,
+                        text=f"{row['category']}: ₹{row['current']:.2f} vs ₹{row['previous']:.2f} "
+                             f"({arrow} ₹{abs(row['change']):.2f})",
+                        style="Custom.TLabel"
+                    ).pack(anchor='w', pady=1)
+            
             # Smart recommendations based on patterns
             ttk.Label(
                 recommendations_frame,
@@ -962,37 +1398,33 @@ class ExpenseTrackerApp:
                 font=('Helvetica', 10, 'bold')
             ).pack(anchor='w', pady=5)
             
-            # High expense alerts
-            high_expenses = [
-                (date, category, amount) 
-                for date, category, amount in expenses 
-                if amount > avg_per_expense * 1.5
-            ]
-            if high_expenses:
+            # Expenses far above what is usual for their category
+            if insights['outliers']:
                 ttk.Label(
                     recommendations_frame,
-                    text="⚠️ High Expense Alert:",
+                    text=f"⚠️ High Expense Alert ({insights['outlier_count']} unusual expenses):",
                     style="Custom.TLabel",
                     foreground='red'
                 ).pack(anchor='w', pady=2)
-                for date, category, amount in high_expenses:
+                for row in insights['outliers']:
                     ttk.Label(
                         recommendations_frame,
-                        text=f"• {category} on {date}: ₹{amount:.2f}",
+                        text=f"• {row['category']} on {row['date']}: ₹{row['amount']:.2f} "
+                             f"({row['z']:.1f}σ above usual)",
                         style="Custom.TLabel"
                     ).pack(anchor='w', pady=1)
             
             # Category-specific advice
-            if highest_category[1] > total_spent * 0.4:
+            highest_category = insights['categories'][0]
+            if highest_category['share'] > 0.4:
                 ttk.Label(
                     recommendations_frame,
-                    text=f"\n💡 Tip: Your {highest_category[0]} expenses are quite high "
-                         f"({(highest_category[1]/total_spent*100):.1f}% of total)",
+                    text=f"\n💡 Tip: Your {highest_category['category']} expenses are quite high "
+                         f"({highest_category['share'] * 100:.1f}% of total)",
                     style="Custom.TLabel"
                 ).pack(anchor='w', pady=2)
             
             # Budget recommendations
-            monthly_income = self.get_user_income()
             if monthly_income > 0:
                 recommended_budget = {
                     'Essential': monthly_income * 0.5,  # 50% for essentials
@@ -1036,18 +1468,17 @@ class ExpenseTrackerApp:
                     text=f"• {tip}",
                     style="Custom.TLabel"
                 ).pack(anchor='w', pady=1)
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate recommendations: {str(e)}")
-        finally:
-            if connection:
-                connection.close()
+        
+        self.load_in_background(
+            parent_frame, query, render, "Failed to generate recommendations",
+            cache_key='recommendations'
+        )
 
     def add_recurring_expense(self):
         """Add recurring expenses (monthly, weekly, etc.)"""
         recurring_window = tk.Toplevel(self.root)
         recurring_window.title("Add Recurring Expense")
-        recurring_window.geometry("400x400")
+        recurring_window.geometry("400x480")
         recurring_window.configure(bg=WHITE)
         
         frame = ttk.LabelFrame(
@@ -1074,46 +1505,24 @@ class ExpenseTrackerApp:
         frequencies = ['Weekly', 'Monthly', 'Yearly']
         ttk.Combobox(frame, textvariable=freq_var, values=frequencies).pack(pady=5)
         
+        # Category
+        ttk.Label(frame, text="Category:", style="Custom.TLabel").pack(pady=5)
+        category_var = tk.StringVar(value='Other')
+        categories = ['Food', 'Transport', 'Entertainment', 'Utilities', 'Other']
+        ttk.Combobox(frame, textvariable=category_var, values=categories).pack(pady=5)
+        
         def save_recurring():
             try:
-                amount = float(amount_var.get())
-                desc = desc_var.get()
-                freq = freq_var.get()
-                
-                if amount <= 0:
-                    messagebox.showerror("Error", "Amount must be greater than 0")
-                    return
-                    
-                if not freq:
-                    messagebox.showerror("Error", "Please select frequency")
-                    return
-                
-                connection = self.get_db_connection()
-                cursor = connection.cursor()
-                
-                next_date = datetime.now()
-                if freq == 'Weekly':
-                    next_date += timedelta(days=7)
-                elif freq == 'Monthly':
-                    next_date = next_date.replace(month=next_date.month + 1)
-                else:  # Yearly
-                    next_date = next_date.replace(year=next_date.year + 1)
-                
-                cursor.execute("""
-                    INSERT INTO recurring_expenses 
-                    (username, amount, frequency, description, next_date)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (self.current_user, amount, freq, desc, next_date.strftime('%Y-%m-%d')))
+                self.service.add_recurring(
+                    self.current_user, amount_var.get(), freq_var.get(), desc_var.get(),
+                    category_var.get()
+                )
                 
-                connection.commit()
                 messagebox.showinfo("Success", "Recurring expense added!")
                 recurring_window.destroy()
                 
             except Exception as e:
                 messagebox.showerror("Error", str(e))
-            finally:
-                if connection:
-                    connection.close()
         
         ttk.Button(
             frame,
@@ -1150,36 +1559,15 @@ class ExpenseTrackerApp:
         
         def save_goal():
             try:
-                amount = float(amount_var.get())
-                category = category_var.get()
-                
-                if amount <= 0:
-                    messagebox.showerror("Error", "Amount must be greater than 0")
-                    return
-                    
-                if not category:
-                    messagebox.showerror("Error", "Please select category")
-                    return
-                
-                connection = self.get_db_connection()
-                cursor = connection.cursor()
-                
-                cursor.execute("""
-                    INSERT OR REPLACE INTO budget_goals (username, category, amount)
-                    VALUES (?, ?, ?)
-                """, (self.current_user, category, amount))
+                self.service.set_budget(self.current_user, category_var.get(), amount_var.get())
                 
-                connection.commit()
                 messagebox.showinfo("Success", "Budget goal set!")
                 display_goals()
                 
-            except ValueError:
-                messagebox.showerror("Error", "Please enter a valid amount")
+            except ServiceError as e:
+                messagebox.showerror("Error", str(e))
             except Exception as e:
                 messagebox.showerror("Error", str(e))
-            finally:
-                if connection:
-                    connection.close()
         
         # Goals list
         goals_list = ttk.Frame(frame, style="Custom.TFrame")
@@ -1190,32 +1578,25 @@ class ExpenseTrackerApp:
                 widget.destroy()
                 
             try:
-                connection = self.get_db_connection()
-                cursor = connection.cursor()
-                cursor.execute("""
-                    SELECT category, amount 
-                    FROM budget_goals 
-                    WHERE username = ?
-                """, (self.current_user,))
+                # Every goal with this month's spend, from one query
+                goals = self.service.budget_status(self.current_user)
                 
-                for category, amount in cursor.fetchall():
+                for goal in goals:
+                    category = goal['category']
                     goal_frame = ttk.Frame(goals_list, style="Custom.TFrame")
                     goal_frame.pack(fill='x', pady=2)
                     
                     ttk.Label(
                         goal_frame,
-                        text=f"{category}: ₹{amount:.2f}",
-                        style="Custom.TLabel"
+                        text=f"{category}: ₹{goal['spent']:.2f} / ₹{goal['budget']:.2f}",
+                        style="Custom.TLabel",
+                        foreground='red' if goal['share'] > 1 else None
                     ).pack(side='left')
                     
                     def delete_goal(cat=category):
                         if messagebox.askyesno("Confirm", f"Delete budget goal for {cat}?"):
                             try:
-                                cursor.execute("""
-                                    DELETE FROM budget_goals 
-                                    WHERE username = ? AND category = ?
-                                """, (self.current_user, cat))
-                                connection.commit()
+                                self.service.delete_budget(self.current_user, cat)
                                 display_goals()
                             except Exception as e:
                                 messagebox.showerror("Error", str(e))
@@ -1227,11 +1608,14 @@ class ExpenseTrackerApp:
                         style="Custom.TButton"
                     ).pack(side='right')
                     
+                    ttk.Progressbar(
+                        goal_frame,
+                        value=min(goal['share'], 1.0) * 100,
+                        length=80
+                    ).pack(side='right', padx=5)
+                    
             except Exception as e:
                 messagebox.showerror("Error", str(e))
-            finally:
-                if connection:
-                    connection.close()
         
         ttk.Button(
             frame,
@@ -1243,10 +1627,10 @@ class ExpenseTrackerApp:
         display_goals()
 
     def export_expenses(self):
-        """Export expenses to Excel/PDF"""
+        """Export expenses to Excel/CSV/PDF"""
         export_window = tk.Toplevel(self.root)
         export_window.title("Export Expenses")
-        export_window.geometry("300x200")
+        export_window.geometry("320x440")
         export_window.configure(bg=WHITE)
         
         frame = ttk.LabelFrame(
@@ -1257,91 +1641,104 @@ class ExpenseTrackerApp:
         )
         frame.pack(fill='both', expand=True, padx=10, pady=5)
         
-        def export_to_excel():
-            try:
-                connection = self.get_db_connection()
-                query = """
-                    SELECT date, category, amount, description 
-                    FROM expenses 
-                    WHERE username = ?
-                    ORDER BY date DESC
-                """
-                df = pd.read_sql_query(query, connection, params=(self.current_user,))
-                
-                filename = filedialog.asksaveasfilename(
-                    defaultextension=".xlsx",
-                    filetypes=[("Excel files", "*.xlsx")]
-                )
+        # Progress of the running export
+        progress_var = tk.DoubleVar(value=0)
+        ttk.Progressbar(frame, variable=progress_var, maximum=1.0).pack(fill='x', pady=5)
+        status_label = ttk.Label(frame, text="", style="Custom.TLabel")
+        status_label.pack()
+        
+        # Closing the window abandons any export still running for it
+        export_window.bind(
+            "<Destroy>",
+            lambda e: self.tasks.cancel_group(export_window) if e.widget is export_window else None
+        )
+        
+        def on_progress(fraction, message):
+            progress_var.set(fraction)
+            status_label.configure(text=message)
+        
+        def on_error(e):
+            status_label.configure(text="")
+            messagebox.showerror("Error", f"Failed to export: {str(e)}")
+        
+        # Filters applied to every export
+        filter_frame = ttk.Frame(frame, style="Custom.TFrame")
+        filter_frame.pack(fill='x', pady=5)
+        start_var = tk.StringVar()
+        end_var = tk.StringVar()
+        category_var = tk.StringVar()
+        for row, (text, var) in enumerate([
+            ("From (YYYY-MM-DD):", start_var),
+            ("To (YYYY-MM-DD):", end_var),
+        ]):
+            ttk.Label(filter_frame, text=text, style="Custom.TLabel").grid(row=row, column=0, sticky='w', pady=2)
+            ttk.Entry(filter_frame, textvariable=var, width=14, style="Custom.TEntry").grid(row=row, column=1, pady=2)
+        ttk.Label(filter_frame, text="Category:", style="Custom.TLabel").grid(row=2, column=0, sticky='w', pady=2)
+        ttk.Combobox(
+            filter_frame,
+            textvariable=category_var,
+            values=['', 'Food', 'Transport', 'Entertainment', 'Utilities', 'Other'],
+            width=12
+        ).grid(row=2, column=1, pady=2)
+        
+        username = self.current_user
+        
+        def get_filters():
+            """Read the filter inputs; None if a date is malformed"""
+            filters = {
+                'start_date': start_var.get().strip() or None,
+                'end_date': end_var.get().strip() or None,
+                'category': category_var.get().strip() or None,
+            }
+            for key in ('start_date', 'end_date'):
+                if filters[key]:
+                    try:
+                        datetime.strptime(filters[key], '%Y-%m-%d')
+                    except ValueError:
+                        messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format")
+                        return None
+            return filters
+        
+        def export_table(file_format, filetypes, label):
+            """Stream the filtered expenses to a file chosen before querying"""
+            filters = get_filters()
+            if filters is None:
+                return
+            filename = filedialog.asksaveasfilename(
+                defaultextension=f".{file_format}",
+                filetypes=filetypes
+            )
+            if not filename:
+                return
+            
+            def work(task):
+                def progress(fraction, message):
+                    task.check_cancelled()
+                    task.report(fraction, message)
                 
-                if filename:
-                    df.to_excel(filename, index=False)
-                    messagebox.showinfo("Success", "Expenses exported to Excel!")
-                    
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to export: {str(e)}")
-            finally:
-                if connection:
-                    connection.close()
+                return self.service.export(username, filename, file_format, progress=progress, **filters)
+            
+            def on_done(written):
+                on_progress(1.0, f"Exported {written} rows")
+                messagebox.showinfo("Success", f"Expenses exported to {label}!")
+            
+            self.tasks.submit(
+                work,
+                on_done=on_done,
+                on_error=on_error,
+                on_progress=on_progress,
+                group=export_window,
+                screen='export'
+            )
+        
+        def export_to_excel():
+            export_table('xlsx', [("Excel files", "*.xlsx")], "Excel")
+        
+        def export_to_csv():
+            export_table('csv', [("CSV files", "*.csv")], "CSV")
         
         def export_to_pdf():
-            try:
-                connection = self.get_db_connection()
-                cursor = connection.cursor()
-                
-                cursor.execute("""
-                    SELECT date, category, amount, description 
-                    FROM expenses 
-                    WHERE username = ?
-                    ORDER BY date DESC
-                """, (self.current_user,))
-                
-                data = cursor.fetchall()
-                if not data:
-                    messagebox.showwarning("Warning", "No expenses to export")
-                    return
-                
-                filename = filedialog.asksaveasfilename(
-                    defaultextension=".pdf",
-                    filetypes=[("PDF files", "*.pdf")]
-                )
-                
-                if filename:
-                    doc = SimpleDocTemplate(filename, pagesize=letter)
-                    elements = []
-                    
-                    # Add title
-                    elements.append(Table(
-                        [["Expense Report"]],
-                        style=TableStyle([
-                            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                            ('FONTSIZE', (0, 0), (-1, -1), 16),
-                            ('BOTTOMPADDING', (0, 0), (-1, -1), 20),
-                        ])
-                    ))
-                    
-                    # Add expense data
-                    table_data = [["Date", "Category", "Amount", "Description"]] + data
-                    t = Table(table_data)
-                    t.setStyle(TableStyle([
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 12),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ]))
-                    elements.append(t)
-                    
-                    doc.build(elements)
-                    messagebox.showinfo("Success", "Expenses exported to PDF!")
-                    
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to export: {str(e)}")
-            finally:
-                if connection:
-                    connection.close()
+            export_table('pdf', [("PDF files", "*.pdf")], "PDF")
         
         ttk.Button(
             frame,
@@ -1350,6 +1747,13 @@ class ExpenseTrackerApp:
             style="Custom.TButton"
         ).pack(pady=10)
         
+        ttk.Button(
+            frame,
+            text="Export to CSV",
+            command=export_to_csv,
+            style="Custom.TButton"
+        ).pack(pady=10)
+        
         ttk.Button(
             frame,
             text="Export to PDF",
@@ -1357,6 +1761,99 @@ class ExpenseTrackerApp:
             style="Custom.TButton"
         ).pack(pady=10)
 
+    def import_statement(self):
+        """Import expenses from a CSV or OFX bank statement"""
+        import_window = tk.Toplevel(self.root)
+        import_window.title("Import Statement")
+        import_window.geometry("400x300")
+        import_window.configure(bg=WHITE)
+        
+        frame = ttk.LabelFrame(
+            import_window,
+            text="📥 Import Bank Statement",
+            padding="15",
+            style="Custom.TLabelframe"
+        )
+        frame.pack(fill='both', expand=True, padx=10, pady=5)
+        
+        include_credits_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            frame,
+            text="Also import money in (salary, refunds)",
+            variable=include_credits_var
+        ).pack(anchor='w', pady=5)
+        
+        categorize_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            frame,
+            text="Suggest categories from my history when a row has none",
+            variable=categorize_var
+        ).pack(anchor='w', pady=5)
+        
+        progress_var = tk.DoubleVar(value=0)
+        ttk.Progressbar(frame, variable=progress_var, maximum=1.0).pack(fill='x', pady=5)
+        status_label = ttk.Label(frame, text="", style="Custom.TLabel")
+        status_label.pack()
+        
+        import_window.bind(
+            "<Destroy>",
+            lambda e: self.tasks.cancel_group(import_window) if e.widget is import_window else None
+        )
+        
+        def on_progress(fraction, message):
+            progress_var.set(fraction)
+            status_label.configure(text=message)
+        
+        def choose_file():
+            filename = filedialog.askopenfilename(
+                filetypes=[("Bank statements", "*.csv *.ofx *.qfx"), ("All files", "*.*")]
+            )
+            if not filename:
+                return
+            
+            username = self.current_user
+            debits_only = not include_credits_var.get()
+            categorize = categorize_var.get()
+            
+            def work(task):
+                return self.service.import_statement(
+                    username, filename,
+                    debits_only=debits_only,
+                    categorize=categorize,
+                    progress=task.report
+                )
+            
+            def on_done(summary):
+                self.expenses_changed()
+                on_progress(1.0, f"{summary['rows_per_sec']:.0f} rows/sec")
+                messagebox.showinfo(
+                    "Import Complete",
+                    f"Imported {summary['inserted']} expenses.\n"
+                    f"Skipped {summary['duplicates']} duplicates, "
+                    f"{summary['credits']} credits and "
+                    f"{summary['skipped']} unusable lines."
+                )
+            
+            def on_error(e):
+                on_progress(0, "")
+                messagebox.showerror("Error", f"Failed to import: {str(e)}")
+            
+            on_progress(0, "Importing...")
+            self.tasks.submit(
+                work,
+                on_done=on_done,
+                on_error=on_error,
+                on_progress=on_progress,
+                group=import_window
+            )
+        
+        ttk.Button(
+            frame,
+            text="Choose File",
+            command=choose_file,
+            style="Custom.TButton"
+        ).pack(pady=10)
+
     def split_expense(self):
         """Split expenses between multiple people"""
         split_window = tk.Toplevel(self.root)
@@ -1511,6 +2008,7 @@ class ExpenseTrackerApp:
         current_date = datetime.now()
         current_month = current_date.month
         current_year = current_date.year
+        username = self.current_user
         
         month_label = ttk.Label(
             nav_frame,
@@ -1522,20 +2020,7 @@ class ExpenseTrackerApp:
         
         def update_calendar(offset):
             nonlocal current_month, current_year
-            if offset == 1:  # Next month
-                if current_month == 12:
-                    current_month = 1
-                    current_year += 1
-                else:
-                    current_month += 1
-            else:  # Previous month
-                if current_month == 1:
-                    current_month = 12
-                    current_year -= 1
-                else:
-                    current_month -= 1
-            
-            month_label.config(text=f"{datetime(current_year, current_month, 1).strftime('%B %Y')}")
+            current_year, current_month = shift_month(current_year, current_month, offset)
             display_calendar()
         
         ttk.Button(
@@ -1552,92 +2037,56 @@ class ExpenseTrackerApp:
             style="Custom.TButton"
         ).pack(side='left', padx=5)
         
-        # Calendar frame
-        calendar_frame = ttk.Frame(frame, style="Custom.TFrame")
-        calendar_frame.pack(fill='both', expand=True, pady=10)
+        status_label = ttk.Label(nav_frame, text="", style="Custom.TLabel")
+        status_label.pack(side='left', padx=10)
         
-        # Day headers
-        days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        for i, day in enumerate(days):
-            ttk.Label(
-                calendar_frame,
-                text=day,
-                style="Custom.TLabel",
-                font=('Helvetica', 10, 'bold')
-            ).grid(row=0, column=i, padx=2, pady=2)
+        # The grid is built once; each month only relabels its cells
+        grid = CalendarGrid(frame)
+        grid.frame.pack(fill='both', expand=True, pady=10)
+        
+        calendar_window.bind(
+            "<Destroy>",
+            lambda e: self.tasks.cancel_group(calendar_window) if e.widget is calendar_window else None
+        )
+        
+        def load_month(year, month):
+            def on_done(totals):
+                if (year, month) == (current_year, current_month):
+                    grid.show(year, month, totals)
+                    status_label.configure(text="")
+            
+            def on_error(e):
+                if (year, month) == (current_year, current_month):
+                    status_label.configure(text="")
+                    messagebox.showerror("Error", f"Failed to load calendar: {str(e)}")
+            
+            self.tasks.submit(
+                lambda task: self.month_totals.get(username, year, month),
+                on_done=on_done,
+                on_error=on_error,
+                group=calendar_window,
+                screen='calendar'
+            )
         
         def display_calendar():
-            # Clear previous calendar
-            for widget in calendar_frame.winfo_children():
-                if int(widget.grid_info()['row']) > 0:
-                    widget.destroy()
+            month_label.config(text=datetime(current_year, current_month, 1).strftime('%B %Y'))
+            totals = self.month_totals.cached(username, current_year, current_month)
+            grid.show(current_year, current_month, totals)
+            if totals is None:
+                status_label.configure(text="Loading...")
+                load_month(current_year, current_month)
+            else:
+                status_label.configure(text="")
             
-            # Get expenses for the month
-            try:
-                connection = self.get_db_connection()
-                cursor = connection.cursor()
-                cursor.execute("""
-                    SELECT date, SUM(amount) as total
-                    FROM expenses
-                    WHERE username = ? 
-                    AND strftime('%Y-%m', date) = ?
-                    GROUP BY date
-                """, (self.current_user, f"{current_year}-{current_month:02d}"))
-                
-                expenses = {row[0]: row[1] for row in cursor.fetchall()}
-                
-                # Calculate calendar dates
-                first_day = datetime(current_year, current_month, 1)
-                if current_month == 12:
-                    last_day = datetime(current_year + 1, 1, 1) - timedelta(days=1)
-                else:
-                    last_day = datetime(current_year, current_month + 1, 1) - timedelta(days=1)
-                
-                start_weekday = first_day.weekday()
-                
-                # Create calendar grid
-                day = 1
-                for week in range(6):
-                    for weekday in range(7):
-                        if (week == 0 and weekday < start_weekday) or day > last_day.day:
-                            ttk.Label(calendar_frame, text="", style="Custom.TLabel").grid(
-                                row=week+1, column=weekday, padx=2, pady=2
-                            )
-                        else:
-                            date_str = f"{current_year}-{current_month:02d}-{day:02d}"
-                            day_frame = ttk.Frame(calendar_frame, style="Custom.TFrame")
-                            day_frame.grid(row=week+1, column=weekday, sticky='nsew', padx=1, pady=1)
-                            
-                            # Day number
-                            ttk.Label(
-                                day_frame,
-                                text=str(day),
-                                style="Custom.TLabel",
-                                font=('Helvetica', 10, 'bold')
-                            ).pack()
-                            
-                            # Expense amount if exists
-                            if date_str in expenses:
-                                amount_label = ttk.Label(
-                                    day_frame,
-                                    text=f"₹{expenses[date_str]:.2f}",
-                                    style="Custom.TLabel"
-                                )
-                                amount_label.pack()
-                                
-                                # Color code based on amount
-                                if expenses[date_str] > 1000:
-                                    amount_label.configure(foreground='red')
-                                else:
-                                    amount_label.configure(foreground='green')
-                            
-                            day += 1
-                            
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load calendar: {str(e)}")
-            finally:
-                if connection:
-                    connection.close()
+            # Have the neighbouring months ready before they are asked for
+            for offset in (-1, 1):
+                year, month = shift_month(current_year, current_month, offset)
+                if self.month_totals.cached(username, year, month) is None:
+                    self.tasks.submit(
+                        lambda task, year=year, month=month: self.month_totals.get(username, year, month),
+                        group=calendar_window,
+                        screen='calendar'
+                    )
         
         # Display initial calendar
         display_calendar()
@@ -1646,15 +2095,9 @@ class ExpenseTrackerApp:
         """Clear all expenses for the current user"""
         if messagebox.askyesno("Confirm", "Are you sure you want to delete all expenses? This cannot be undone."):
             try:
-                connection = self.get_db_connection()
-                cursor = connection.cursor()
-                
-                cursor.execute("""
-                    DELETE FROM expenses 
-                    WHERE username = ?
-                """, (self.current_user,))
+                self.service.clear_expenses(self.current_user)
+                self.expenses_changed()
                 
-                connection.commit()
                 messagebox.showinfo("Success", "All expenses cleared successfully!")
                 
                 # Refresh the expenses list
@@ -1662,11 +2105,108 @@ class ExpenseTrackerApp:
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to clear expenses: {str(e)}")
-            finally:
-                if connection:
-                    connection.close()
+
+    def show_query_profile(self):
+        """Show per-screen timings and recent slow queries from query_profiler"""
+        profile_window = tk.Toplevel(self.root)
+        profile_window.title("Query Profile")
+        profile_window.geometry("900x600")
+        profile_window.configure(bg=WHITE)
+        
+        frame = ttk.LabelFrame(
+            profile_window,
+            text="🐞 Query Profile",
+            padding="15",
+            style="Custom.TLabelframe"
+        )
+        frame.pack(fill='both', expand=True, padx=10, pady=5)
+        
+        ttk.Label(
+            frame,
+            text=f"Slow query threshold {query_profiler.SLOW_QUERY_MS:g} ms, "
+                 f"logged to {query_profiler.LOG_PATH}",
+            style="Custom.TLabel"
+        ).pack(anchor='w')
+        
+        # Per-screen summary
+        screen_columns = ('Screen', 'Loads', 'Mean ms', 'Max ms', 'Queries', 'SQL ms', 'Rows', 'Slow')
+        screens_tree = ttk.Treeview(
+            frame, columns=screen_columns, show='headings', height=7, style="Custom.Treeview"
+        )
+        for column in screen_columns:
+            screens_tree.heading(column, text=column)
+            screens_tree.column(column, width=160 if column == 'Screen' else 80, anchor='w')
+        screens_tree.pack(fill='x', pady=10)
+        
+        # Slow queries, with the plan of the selected one below
+        ttk.Label(frame, text="Recent slow queries:", style="Custom.TLabel").pack(anchor='w')
+        slow_columns = ('Time', 'Screen', 'ms', 'Rows', 'SQL')
+        slow_tree = ttk.Treeview(
+            frame, columns=slow_columns, show='headings', height=8, style="Custom.Treeview"
+        )
+        for column in slow_columns:
+            slow_tree.heading(column, text=column)
+            slow_tree.column(column, width=500 if column == 'SQL' else 90, anchor='w')
+        slow_tree.pack(fill='both', expand=True, pady=5)
+        
+        plan_text = scrolledtext.ScrolledText(frame, height=6, wrap=tk.WORD)
+        plan_text.pack(fill='x', pady=5)
+        slow_queries = []
+        
+        def show_plan(event=None):
+            plan_text.delete('1.0', tk.END)
+            selected = slow_tree.selection()
+            if selected:
+                query = slow_queries[int(selected[0])]
+                plan = query['plan'] or ["(no plan)"]
+                plan_text.insert(tk.END, query['sql'] + "\n\n" + "\n".join(plan))
+        
+        slow_tree.bind('<<TreeviewSelect>>', show_plan)
+        
+        def refresh():
+            screens_tree.delete(*screens_tree.get_children())
+            for row in query_profiler.summary():
+                screens_tree.insert('', 'end', values=(
+                    row['screen'], row['loads'],
+                    '' if row['mean_ms'] is None else f"{row['mean_ms']:.1f}",
+                    '' if row['max_ms'] is None else f"{row['max_ms']:.1f}",
+                    row['queries'], f"{row['sql_ms']:.1f}", row['rows'], row['slow']
+                ))
+            slow_tree.delete(*slow_tree.get_children())
+            slow_queries[:] = query_profiler.recent_slow()
+            for i, query in enumerate(slow_queries):
+                slow_tree.insert('', 'end', iid=str(i), values=(
+                    query['time'][11:19], query['screen'], f"{query['ms']:.1f}", query['rows'], query['sql']
+                ))
+            show_plan()
+        
+        def reset():
+            query_profiler.reset()
+            refresh()
+        
+        button_frame = ttk.Frame(frame, style="Custom.TFrame")
+        button_frame.pack(fill='x', pady=5)
+        
+        ttk.Button(
+            button_frame,
+            text="Refresh",
+            command=refresh,
+            style="Custom.TButton"
+        ).pack(side='left', padx=5)
+        
+        ttk.Button(
+            button_frame,
+            text="Reset",
+            command=reset,
+            style="Custom.TButton"
+        ).pack(side='left', padx=5)
+        
+        refresh()
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = ExpenseTrackerApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    app.tasks.shutdown()
+    app.db.maintain()
+    app.db.close_all()
\ No newline at end of file
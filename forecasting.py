@@ -0,0 +1,212 @@
+"""Per-category monthly spending forecasts.
+
+Each category of a user gets a linear trend over its monthly totals, scaled
+by a month-of-year seasonal factor once two years of history exist. Models
+are fitted from monthly_category_totals only, so their cost depends on the
+number of months and categories, not on the number of expenses.
+
+A model is stored as running sums (the least-squares sufficient statistics
+plus per-month-of-year sums) in forecast_models. When a new month completes
+only that month is added to the sums; the whole series is refitted only if
+an already-trained month has changed, e.g. after a backdated expense or one
+moved to another month. The state keeps a signature of the trained months'
+totals to tell.
+
+Usage: python forecasting.py --user USERNAME [--months 3] [--db PATH]
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+from datetime import date
+
+def month_index(label):
+    """'YYYY-MM' -> months since year 0"""
+    return int(label[:4]) * 12 + int(label[5:7]) - 1
+
+def month_label(index):
+    """Months since year 0 -> 'YYYY-MM'"""
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+class TrendModel:
+    """Least-squares line through monthly totals, with seasonal factors"""
+
+    # Seasonal factors are only trusted with this many months of history
+    SEASONAL_MONTHS = 24
+
+    def __init__(self, first_month, state=None):
+        self.first_month = first_month
+        state = state or {}
+        self.n = state.get('n', 0)
+        self.sx = state.get('sx', 0.0)
+        self.sy = state.get('sy', 0.0)
+        self.sxx = state.get('sxx', 0.0)
+        self.sxy = state.get('sxy', 0.0)
+        self.season_sum = state.get('season_sum', [0.0] * 12)
+        self.season_count = state.get('season_count', [0] * 12)
+
+    def add(self, month, total):
+        """Fold one month's total into the running sums"""
+        x = month - self.first_month
+        self.n += 1
+        self.sx += x
+        self.sy += total
+        self.sxx += x * x
+        self.sxy += x * total
+        self.season_sum[month % 12] += total
+        self.season_count[month % 12] += 1
+
+    def coefficients(self):
+        """(intercept, slope) of the fitted line"""
+        if self.n == 0:
+            return 0.0, 0.0
+        denominator = self.n * self.sxx - self.sx * self.sx
+        if self.n < 2 or denominator == 0:
+            return self.sy / self.n, 0.0
+        slope = (self.n * self.sxy - self.sx * self.sy) / denominator
+        return (self.sy - slope * self.sx) / self.n, slope
+
+    def predict(self, month):
+        """Forecast total for a month index, never below zero"""
+        intercept, slope = self.coefficients()
+        value = intercept + slope * (month - self.first_month)
+        mean = self.sy / self.n if self.n else 0.0
+        count = self.season_count[month % 12]
+        if self.n >= self.SEASONAL_MONTHS and mean > 0 and count:
+            value *= (self.season_sum[month % 12] / count) / mean
+        # Not max(value, 0.0), which keeps -0.0
+        return value if value > 0 else 0.0
+
+    def state(self):
+        """JSON-serialisable running sums"""
+        return {
+            'n': self.n, 'sx': self.sx, 'sy': self.sy, 'sxx': self.sxx, 'sxy': self.sxy,
+            'season_sum': self.season_sum, 'season_count': self.season_count,
+        }
+
+
+def _monthly_series(connection, username, last_month):
+    """{category: {month index: total}} for complete months up to last_month"""
+    series = {}
+    for category, month, total in connection.execute("""
+        SELECT category, month, total_paise / 100.0
+        FROM monthly_category_totals
+        WHERE username = ? AND month != '' AND month <= ?
+    """, (username, month_label(last_month))):
+        series.setdefault(category, {})[month_index(month)] = total
+    return series
+
+def _signature(totals, trained_through):
+    """Digest of the {month: total} pairs up to trained_through"""
+    months = sorted((month, total) for month, total in totals.items() if month <= trained_through)
+    return hashlib.sha1(json.dumps(months).encode()).hexdigest()
+
+def update_models(connection, username, today=None):
+    """Bring the user's stored models up to the last complete month
+
+    Returns (models by category, number of models that were changed).
+    """
+    today = today or date.today().isoformat()
+    last_month = month_index(today) - 1
+    series = _monthly_series(connection, username, last_month)
+    stored = {
+        category: (first_month, trained_through, trained_total, state)
+        for category, first_month, trained_through, trained_total, state in connection.execute("""
+            SELECT category, first_month, trained_through, trained_total, state
+            FROM forecast_models
+            WHERE username = ?
+        """, (username,))
+    }
+
+    models, changed = {}, 0
+    for category, totals in series.items():
+        first_month = min(totals)
+        model, start = None, first_month
+        if category in stored:
+            stored_first, trained_through, trained_total, state = stored[category]
+            state = json.loads(state)
+            # Months already trained must be unchanged, month by month, to keep the sums
+            if stored_first == first_month and state.get('signature') == _signature(totals, trained_through):
+                model = TrendModel(first_month, state)
+                start = trained_through + 1
+        if model is None:
+            model = TrendModel(first_month)
+
+        if start <= last_month:
+            # Months with no spending count as zero
+            for month in range(start, last_month + 1):
+                model.add(month, totals.get(month, 0.0))
+            trained_total = sum(totals.values())
+            state = dict(model.state(), signature=_signature(totals, last_month))
+            connection.execute("""
+                INSERT OR REPLACE INTO forecast_models
+                (username, category, first_month, trained_through, trained_total, state)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (username, category, first_month, last_month, trained_total, json.dumps(state)))
+            changed += 1
+        models[category] = model
+
+    # Categories whose expenses are all gone
+    for category in set(stored) - set(series):
+        connection.execute(
+            "DELETE FROM forecast_models WHERE username = ? AND category = ?", (username, category)
+        )
+    connection.commit()
+    return models, changed
+
+def forecast(connection, username, months_ahead=3, history_months=12, today=None):
+    """Forecast each category for the current month and the ones after it"""
+    today = today or date.today().isoformat()
+    models, changed = update_models(connection, username, today)
+    current = month_index(today)
+    months = list(range(current, current + months_ahead))
+
+    categories = []
+    for category, model in sorted(models.items()):
+        values = [model.predict(month) for month in months]
+        categories.append({
+            'category': category or 'Uncategorized',
+            'forecast': values,
+            'monthly_change': model.coefficients()[1],
+        })
+    categories.sort(key=lambda row: -sum(row['forecast']))
+
+    history = list(range(current - history_months, current))
+    actual = dict(connection.execute("""
+        SELECT month, SUM(total_paise) / 100.0
+        FROM monthly_category_totals
+        WHERE username = ? AND month >= ? AND month < ?
+        GROUP BY month
+    """, (username, month_label(history[0]), month_label(current))).fetchall())
+
+    return {
+        'months': [month_label(month) for month in months],
+        'categories': categories,
+        'total': [sum((row['forecast'][i] for row in categories), 0.0) for i in range(months_ahead)],
+        'history': {
+            'months': [month_label(month) for month in history],
+            'totals': [actual.get(month_label(month), 0.0) for month in history],
+        },
+        'retrained': changed,
+    }
+
+if __name__ == "__main__":
+    from db_config import DB_PATH, ensure_database
+
+    parser = argparse.ArgumentParser(description="Forecast a user's monthly spending")
+    parser.add_argument('--user', required=True)
+    parser.add_argument('--months', type=int, default=3, help="months to forecast")
+    parser.add_argument('--db', default=DB_PATH, help="database file")
+    args = parser.parse_args()
+
+    ensure_database(args.db)
+    connection = sqlite3.connect(args.db)
+    try:
+        result = forecast(connection, args.user, args.months)
+    finally:
+        connection.close()
+    print(f"{'Category':<16}" + "".join(f"{month:>12}" for month in result['months']))
+    for row in result['categories']:
+        print(f"{row['category']:<16}" + "".join(f"{value:>12.2f}" for value in row['forecast']))
+    print(f"{'Total':<16}" + "".join(f"{value:>12.2f}" for value in result['total']))
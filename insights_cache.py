@@ -0,0 +1,34 @@
+"""Per-user cache for the Insights screen.
+
+Holds the query results a tab needs to redraw without querying again. Write
+paths call invalidate() for the user whose expenses changed.
+"""
+import threading
+
+
+class InsightsCache:
+    """Cache of rendered Insights tabs keyed by user and tab"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, username, key):
+        """Return the cached value, or None"""
+        with self._lock:
+            return self._entries.get(username, {}).get(key)
+
+    def put(self, username, key, value):
+        """Store a value for this user and tab"""
+        with self._lock:
+            self._entries.setdefault(username, {})[key] = value
+
+    def invalidate(self, username):
+        """Forget everything cached for a user"""
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self):
+        """Forget everything"""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,145 @@
+"""Month calendar of daily spending for the Budget Calendar window.
+
+CalendarGrid builds its weekday headers and 6x7 day cells once; showing
+another month only changes label text and colours. MonthTotals keeps the
+daily totals of recently viewed months in a small LRU cache, so paging back
+and forth is served from memory and each month is read from the database at
+most once until the user's expenses change.
+"""
+import calendar
+import threading
+from collections import OrderedDict
+
+import ttkbootstrap as ttk
+
+def shift_month(year, month, offset):
+    """(year, month) offset months away"""
+    index = year * 12 + month - 1 + offset
+    return index // 12, index % 12 + 1
+
+
+class MonthTotals:
+    """LRU cache of {day: total} per (username, year, month)
+
+    daily_totals(username, start, end) is ExpenseService.daily_totals. get()
+    may block on the database and is meant to run off the Tk thread;
+    cached() never does.
+    """
+
+    def __init__(self, daily_totals, capacity=12):
+        self._daily_totals = daily_totals
+        self.capacity = capacity
+        self.loads = 0
+        self._months = OrderedDict()
+        self._pending = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def cached(self, username, year, month):
+        """The month's totals if they are in memory, else None"""
+        key = (username, year, month)
+        with self._lock:
+            totals = self._months.get(key)
+            if totals is not None:
+                self._months.move_to_end(key)
+            return totals
+
+    def get(self, username, year, month):
+        """The month's totals, loading them if needed
+
+        Concurrent calls for the same month wait for a single load.
+        """
+        key = (username, year, month)
+        with self._lock:
+            totals = self._months.get(key)
+            if totals is not None:
+                self._months.move_to_end(key)
+                return totals
+            loading = self._pending.get(key)
+            if loading is None:
+                loading = self._pending[key] = threading.Event()
+                owner = True
+            else:
+                owner = False
+            generation = self._generation
+
+        if not owner:
+            loading.wait()
+            totals = self.cached(username, year, month)
+            if totals is not None:
+                return totals
+            # The owner failed or was invalidated; load for ourselves
+            return self.get(username, year, month)
+
+        try:
+            next_year, next_month = shift_month(year, month, 1)
+            rows = self._daily_totals(
+                username, f"{year}-{month:02d}-01", f"{next_year}-{next_month:02d}-01"
+            )
+            totals = {int(date[8:10]): total for date, total in rows.items()}
+            with self._lock:
+                self.loads += 1
+                # Totals read before an invalidate() may already be stale
+                if generation == self._generation:
+                    self._months[key] = totals
+                    while len(self._months) > self.capacity:
+                        self._months.popitem(last=False)
+            return totals
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            loading.set()
+
+    def invalidate(self, username=None):
+        """Forget one user's months, or everyone's"""
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._months if username is None or key[0] == username]:
+                del self._months[key]
+
+
+class CalendarGrid:
+    """Weekday headers and 42 day cells, reconfigured for each month"""
+
+    # Daily totals above this are shown in red
+    HIGH_SPEND = 1000
+
+    def __init__(self, parent):
+        self.frame = ttk.Frame(parent, style="Custom.TFrame")
+        for column, day in enumerate(['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']):
+            ttk.Label(
+                self.frame,
+                text=day,
+                style="Custom.TLabel",
+                font=('Helvetica', 10, 'bold')
+            ).grid(row=0, column=column, padx=2, pady=2)
+            self.frame.columnconfigure(column, weight=1, uniform='day')
+
+        self.cells = []
+        for index in range(42):
+            cell = ttk.Frame(self.frame, style="Custom.TFrame")
+            cell.grid(row=index // 7 + 1, column=index % 7, sticky='nsew', padx=1, pady=1)
+            day_label = ttk.Label(cell, text="", style="Custom.TLabel", font=('Helvetica', 10, 'bold'))
+            day_label.pack()
+            amount_label = ttk.Label(cell, text="", style="Custom.TLabel")
+            amount_label.pack()
+            self.cells.append((day_label, amount_label))
+
+    def show(self, year, month, totals=None):
+        """Show a month; totals is {day: total} or None while it loads"""
+        first_weekday, days = calendar.monthrange(year, month)
+        for index, (day_label, amount_label) in enumerate(self.cells):
+            day = index - first_weekday + 1
+            if not 1 <= day <= days:
+                day_label.configure(text="")
+                amount_label.configure(text="")
+                continue
+            day_label.configure(text=str(day))
+            total = totals.get(day) if totals else None
+            if total:
+                amount_label.configure(
+                    text=f"₹{total:.2f}",
+                    foreground='red' if total > self.HIGH_SPEND else 'green'
+                )
+            else:
+                amount_label.configure(text="")
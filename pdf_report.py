@@ -0,0 +1,208 @@
+"""Paginated PDF expense report.
+
+The report is drawn page by page onto a reportlab canvas. Expense rows are
+read from the cursor in batches and laid out as one small fixed-height table
+per page with the column headers repeated, so reportlab never has to split
+a huge table and no more than a page of rows is held at a time. Per-month and
+per-category subtotals are computed in SQL and printed before the detail.
+The only thing that grows with the report is reportlab's record of each
+finished page, which it keeps until save().
+"""
+from datetime import datetime
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Table, TableStyle
+
+import storage
+from expense_exporter import count_expenses, filter_clause, iter_batches
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+MARGIN = 50
+ROW_HEIGHT = 16
+HEADING_HEIGHT = 28
+SECTION_GAP = 20
+FOOTER_HEIGHT = 20
+
+# Longer descriptions are cut so every row stays one line high
+DESCRIPTION_CHARS = 48
+
+TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('TOPPADDING', (0, 0), (-1, -1), 1),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+])
+
+def summaries(connection, username, start_date=None, end_date=None, category=None):
+    """Return ([(month, count, total)], [(category, count, total)])
+
+    Without a date range both come from the monthly_category_totals summary
+    table; with one they are grouped from expenses.
+    """
+    if start_date or end_date:
+        where, params = filter_clause(username, start_date, end_date, category)
+        source = f"""(
+            SELECT substr({storage.date_sql('e.day')}, 1, 7) AS month, c.name AS category,
+                   e.amount_paise AS total_paise, 1 AS count
+            FROM {storage.EXPENSE_TABLES} WHERE {where}
+        )"""
+    else:
+        params = [username]
+        where = "username = ?"
+        if category:
+            where += " AND category = ?"
+            params.append(category)
+        source = f"(SELECT month, category, total_paise, count FROM monthly_category_totals WHERE {where})"
+
+    by_month = connection.execute(f"""
+        SELECT month, SUM(count), SUM(total_paise) / 100.0 FROM {source}
+        GROUP BY month ORDER BY month
+    """, params).fetchall()
+    by_category = connection.execute(f"""
+        SELECT category, SUM(count), SUM(total_paise) / 100.0 FROM {source}
+        GROUP BY category ORDER BY SUM(total_paise) DESC
+    """, params).fetchall()
+    return by_month, by_category
+
+
+class ReportCanvas:
+    """Draws sections of page-sized tables, starting new pages as needed"""
+
+    def __init__(self, path, title, subtitle):
+        self.canvas = Canvas(path, pagesize=letter, pageCompression=1)
+        self.title = title
+        self.subtitle = subtitle
+        self.page = 0
+        self.y = 0
+
+    def new_page(self):
+        """Finish the current page and start the next one"""
+        if self.page:
+            self._footer()
+            self.canvas.showPage()
+        self.page += 1
+        self.y = PAGE_HEIGHT - MARGIN
+        if self.page == 1:
+            self.canvas.setFont('Helvetica-Bold', 16)
+            self.canvas.drawCentredString(PAGE_WIDTH / 2, self.y - 16, self.title)
+            self.canvas.setFont('Helvetica', 10)
+            self.canvas.drawCentredString(PAGE_WIDTH / 2, self.y - 34, self.subtitle)
+            self.y -= 50
+
+    def rows_left(self):
+        """Table rows, header included, that still fit on this page"""
+        return int((self.y - MARGIN - FOOTER_HEIGHT) // ROW_HEIGHT)
+
+    def section(self, heading, header, widths, rows, on_page=None):
+        """Draw rows under heading, repeating the header row on every page
+
+        on_page(rows_drawn) is called after each table is drawn.
+        """
+        self._heading(heading)
+        chunk = []
+        full = False
+        drawn = 0
+        for row in rows:
+            if full:
+                self._heading(f"{heading} (continued)", new_page=True)
+                full = False
+            chunk.append(row)
+            if len(chunk) >= self.rows_left() - 1:
+                drawn += self._table(header, widths, chunk)
+                chunk = []
+                full = True
+                if on_page:
+                    on_page(drawn)
+        if chunk:
+            drawn += self._table(header, widths, chunk)
+            if on_page:
+                on_page(drawn)
+        self.y -= SECTION_GAP
+
+    def save(self):
+        """Finish the last page and write the file"""
+        if not self.page:
+            self.new_page()
+        self._footer()
+        self.canvas.save()
+
+    def _heading(self, text, new_page=False):
+        # A heading needs the table header and at least one row under it
+        if new_page or not self.page or self.y - HEADING_HEIGHT - 2 * ROW_HEIGHT < MARGIN + FOOTER_HEIGHT:
+            self.new_page()
+        self.canvas.setFont('Helvetica-Bold', 12)
+        self.canvas.drawString(MARGIN, self.y - 16, text)
+        self.y -= HEADING_HEIGHT
+
+    def _table(self, header, widths, rows):
+        table = Table([header] + rows, colWidths=widths, rowHeights=ROW_HEIGHT)
+        table.setStyle(TABLE_STYLE)
+        _, height = table.wrapOn(self.canvas, PAGE_WIDTH - 2 * MARGIN, self.y)
+        table.drawOn(self.canvas, MARGIN, self.y - height)
+        self.y -= height
+        return len(rows)
+
+    def _footer(self):
+        self.canvas.setFont('Helvetica', 8)
+        self.canvas.drawRightString(PAGE_WIDTH - MARGIN, MARGIN / 2, f"Page {self.page}")
+
+
+def build_report(connection, path, username, start_date=None, end_date=None, category=None,
+                 progress=None):
+    """Write the PDF report and return {'rows': ..., 'pages': ...}
+
+    progress(fraction, message) is called after every page of expenses.
+    """
+    filters = {'start_date': start_date, 'end_date': end_date, 'category': category}
+    total = count_expenses(connection, username, **filters)
+    if progress:
+        progress(0.0, "Computing subtotals")
+    by_month, by_category = summaries(connection, username, **filters)
+    grand_total = sum(row[2] for row in by_category)
+
+    period = f"{start_date or 'start'} to {end_date or 'today'}"
+    subtitle = f"{username} | {period}{' | ' + category if category else ''} | " \
+               f"generated {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+    report = ReportCanvas(path, "Expense Report", subtitle)
+
+    report.section(
+        "Summary", ["Expenses", "Total"], [120, 120],
+        [[f"{total}", f"{grand_total:,.2f}"]]
+    )
+    report.section(
+        "By Category", ["Category", "Expenses", "Total", "Share"], [150, 80, 100, 80],
+        (
+            [name, f"{count}", f"{amount:,.2f}",
+             f"{100.0 * amount / grand_total:.1f}%" if grand_total else "-"]
+            for name, count, amount in by_category
+        )
+    )
+    report.section(
+        "By Month", ["Month", "Expenses", "Total"], [150, 80, 100],
+        ([month, f"{count}", f"{amount:,.2f}"] for month, count, amount in by_month)
+    )
+
+    def rows():
+        for batch in iter_batches(connection, username, **filters):
+            for date, name, amount, description in batch:
+                description = description or ''
+                if len(description) > DESCRIPTION_CHARS:
+                    description = description[:DESCRIPTION_CHARS - 1] + '…'
+                yield [date, name, f"{amount:,.2f}", description]
+
+    def on_page(drawn):
+        if progress:
+            progress(drawn / total if total else 1.0, f"Page {report.page}: {drawn} of {total} rows")
+
+    report.section(
+        "Expenses", ["Date", "Category", "Amount", "Description"], [70, 90, 70, 282],
+        rows(), on_page=on_page
+    )
+    report.save()
+    return {'rows': total, 'pages': report.page}
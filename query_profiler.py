@@ -0,0 +1,327 @@
+"""Timing of every SQL statement, grouped by the screen that ran it.
+
+Connections from db_pool are ProfiledConnections. Each statement they run is
+timed from execute to its last fetched row, counting only the time spent
+inside SQLite, along with the rows it returned or changed. The totals go to
+the screen that was active on that thread when the statement started (see
+screen()). Statements slower than SLOW_QUERY_MS are written, with their
+EXPLAIN QUERY PLAN, to a rotating JSON-lines log, and so is one line per
+screen load.
+
+The desktop shows summary() under Debug > Query Profile; the command line
+prints summarize_log() with python -m expense_tracker query-log.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from db_config import DB_PATH
+
+LOG_NAME = 'query_log.jsonl'
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+# Statements at least this slow are logged with their plan; 0 logs every statement
+SLOW_QUERY_MS = float(os.environ.get('EXPENSE_TRACKER_SLOW_QUERY_MS', 50))
+
+# Set EXPENSE_TRACKER_PROFILE_QUERIES=0 to run statements unwrapped
+enabled = os.environ.get('EXPENSE_TRACKER_PROFILE_QUERIES', '1') != '0'
+
+# Statements run outside any screen() block are counted under this name
+OTHER = '(other)'
+
+# Longest SQL text kept per logged statement
+SQL_CHARS = 1000
+
+# Rows fetched at a time when a profiled cursor is iterated
+ITER_BATCH = 256
+
+_local = threading.local()
+_lock = threading.Lock()
+_screens = {}
+_recent_slow = deque(maxlen=50)
+_logger = logging.getLogger('expense_tracker.queries')
+_logger.propagate = False
+
+
+def log_path(db_path=DB_PATH):
+    """The log for statements on db_path: EXPENSE_TRACKER_QUERY_LOG if set, else next to the database"""
+    return (os.environ.get('EXPENSE_TRACKER_QUERY_LOG')
+            or os.path.join(os.path.dirname(os.path.abspath(db_path)), LOG_NAME))
+
+# Moved next to the database in use by use_database()
+LOG_PATH = log_path()
+
+def use_database(db_path):
+    """Log to the file for db_path from now on"""
+    global LOG_PATH
+    path = log_path(db_path)
+    with _lock:
+        if path == LOG_PATH:
+            return
+        LOG_PATH = path
+        for handler in list(_logger.handlers):
+            _logger.removeHandler(handler)
+            handler.close()
+
+def _log(event):
+    """Append one JSON line to the log, opening it on first use"""
+    if not _logger.handlers:
+        with _lock:
+            if not _logger.handlers:
+                os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+                handler = RotatingFileHandler(
+                    LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding='utf-8'
+                )
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                _logger.addHandler(handler)
+                _logger.setLevel(logging.INFO)
+    event['time'] = datetime.now().isoformat(timespec='milliseconds')
+    _logger.info(json.dumps(event, default=str))
+
+def _stats(screens, name):
+    """The running totals of a screen in screens, created empty if new"""
+    stats = screens.get(name)
+    if stats is None:
+        stats = screens[name] = {
+            'loads': 0, 'ms': 0.0, 'max_ms': 0.0, 'queries': 0, 'sql_ms': 0.0, 'rows': 0, 'slow': 0,
+        }
+    return stats
+
+@contextmanager
+def screen(name):
+    """Count the statements this thread runs inside the block towards screen name"""
+    outer = getattr(_local, 'screen', None)
+    frame = _local.screen = {'screen': name, 'queries': 0, 'sql_ms': 0.0, 'rows': 0, 'slow': 0}
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.screen = outer
+        ms = (time.perf_counter() - started) * 1000
+        with _lock:
+            stats = _stats(_screens, name)
+            stats['loads'] += 1
+            stats['ms'] += ms
+            stats['max_ms'] = max(stats['max_ms'], ms)
+        if enabled:
+            _log(dict(frame, event='screen', ms=round(ms, 2), sql_ms=round(frame['sql_ms'], 2)))
+
+def explain(connection, sql, parameters=()):
+    """EXPLAIN QUERY PLAN rows as 'id parent detail' strings, or None if it cannot be planned"""
+    try:
+        rows = sqlite3.Cursor(connection).execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+    except (sqlite3.Error, ValueError):
+        return None
+    return [f"{node} {parent} {detail}" for node, parent, _, detail in rows]
+
+def _finished(connection, statement):
+    """Add a finished statement to its screen's totals and log it if slow"""
+    frame = statement['frame']
+    name = frame['screen'] if frame else OTHER
+    ms = statement['ms']
+    slow = ms >= SLOW_QUERY_MS
+    with _lock:
+        stats = _stats(_screens, name)
+        stats['queries'] += 1
+        stats['sql_ms'] += ms
+        stats['rows'] += statement['rows']
+        stats['slow'] += slow
+    if frame:
+        frame['queries'] += 1
+        frame['sql_ms'] += ms
+        frame['rows'] += statement['rows']
+        frame['slow'] += slow
+    if slow and enabled:
+        event = {
+            'event': 'query',
+            'screen': name,
+            'ms': round(ms, 2),
+            'rows': statement['rows'],
+            'sql': ' '.join(statement['sql'].split())[:SQL_CHARS],
+            'plan': explain(connection, statement['sql'], statement['parameters'])
+                    if statement['parameters'] is not None else None,
+        }
+        _recent_slow.append(event)
+        _log(event)
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor that times its statement until the last row is fetched"""
+
+    _statement = None
+
+    def _start(self, sql, parameters):
+        self._finish()
+        self._statement = {
+            'sql': sql, 'parameters': parameters, 'ms': 0.0, 'rows': 0,
+            'frame': getattr(_local, 'screen', None),
+        }
+
+    def _finish(self):
+        statement, self._statement = self._statement, None
+        if statement is not None:
+            _finished(self.connection, statement)
+
+    def _timed(self, started):
+        if self._statement is not None:
+            self._statement['ms'] += (time.perf_counter() - started) * 1000
+
+    def execute(self, sql, parameters=()):
+        self._start(sql, parameters)
+        started = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        except BaseException:
+            self._statement = None
+            raise
+        self._timed(started)
+        if self.description is None:
+            self._statement['rows'] = max(self.rowcount, 0)
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        # The parameters are often a generator, so there are none to plan with
+        self._start(sql, None)
+        started = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        except BaseException:
+            self._statement = None
+            raise
+        self._timed(started)
+        self._statement['rows'] = max(self.rowcount, 0)
+        self._finish()
+        return self
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._timed(started)
+        if row is None:
+            self._finish()
+        elif self._statement is not None:
+            self._statement['rows'] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._timed(started)
+        if self._statement is not None:
+            self._statement['rows'] += len(rows)
+            if len(rows) < size:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._timed(started)
+        if self._statement is not None:
+            self._statement['rows'] += len(rows)
+            self._finish()
+        return rows
+
+    def __iter__(self):
+        # Rows are fetched a batch at a time so the timing is not paid per row
+        while True:
+            rows = self.fetchmany(ITER_BATCH)
+            yield from rows
+            if len(rows) < ITER_BATCH:
+                return
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # Statements whose rows were not all fetched, like single-row lookups
+        self._finish()
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """Connection whose statements are timed by ProfiledCursor while profiling is enabled"""
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = ProfiledCursor if enabled else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _summary_rows(screens):
+    """Per-screen totals as dicts, slowest total first"""
+    rows = []
+    for name, stats in screens.items():
+        loads = stats['loads']
+        rows.append({
+            'screen': name,
+            'loads': loads,
+            'mean_ms': round(stats['ms'] / loads, 2) if loads else None,
+            'max_ms': round(stats['max_ms'], 2) if loads else None,
+            'queries': stats['queries'],
+            'sql_ms': round(stats['sql_ms'], 2),
+            'rows': stats['rows'],
+            'slow': stats['slow'],
+        })
+    rows.sort(key=lambda row: (row['mean_ms'] or 0) * row['loads'] + row['sql_ms'], reverse=True)
+    return rows
+
+def summary():
+    """Per-screen timing in this process: loads, mean and max ms, queries, SQL ms, rows, slow"""
+    with _lock:
+        screens = {name: dict(stats) for name, stats in _screens.items()}
+    return _summary_rows(screens)
+
+def recent_slow():
+    """The latest slow statements logged by this process, newest first"""
+    with _lock:
+        return list(reversed(_recent_slow))
+
+def reset():
+    """Forget this process's totals; the log file is kept"""
+    with _lock:
+        _screens.clear()
+        _recent_slow.clear()
+
+def summarize_log(path=None, top=10):
+    """Per-screen timing and the top slowest statements from the log (default LOG_PATH) and its backups"""
+    path = path or LOG_PATH
+    screens = {}
+    slowest = []
+    paths = [f"{path}.{n}" for n in range(LOG_BACKUPS, 0, -1)] + [path]
+    for log_path in paths:
+        if not os.path.exists(log_path):
+            continue
+        with open(log_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if event.get('event') == 'screen':
+                    stats = _stats(screens, event['screen'])
+                    stats['loads'] += 1
+                    stats['ms'] += event['ms']
+                    stats['max_ms'] = max(stats['max_ms'], event['ms'])
+                    for key in ('queries', 'sql_ms', 'rows', 'slow'):
+                        stats[key] += event.get(key, 0)
+                elif event.get('event') == 'query':
+                    slowest.append(event)
+    slowest.sort(key=lambda event: event['ms'], reverse=True)
+    return {'log': path, 'screens': _summary_rows(screens), 'slowest': slowest[:top]}
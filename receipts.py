@@ -0,0 +1,148 @@
+"""Receipt images, kept out of the expenses table.
+
+Each distinct image is stored once in the receipts table, keyed by the
+SHA-256 of its bytes, and expenses point at it with receipt_id. Lists,
+exports and aggregates never read the receipts table, so image bytes never
+pass through their pages.
+
+A receipt row holds a small JPEG thumbnail, made once when the receipt is
+stored, ahead of the original, so reading the thumbnail never walks the
+original's overflow pages. Originals are streamed in and out in chunks with
+SQLite's incremental BLOB I/O and only decoded when a receipt is opened.
+
+Usage: python receipts.py [--prune] [--db PATH]
+"""
+import argparse
+import hashlib
+import io
+import sqlite3
+
+CHUNK_SIZE = 64 * 1024
+
+# Largest receipt file accepted, in bytes
+MAX_SIZE = 20 * 2**20
+
+# Bounding box of the stored thumbnails, in pixels
+THUMBNAIL_SIZE = (160, 160)
+
+
+class ReceiptError(Exception):
+    """Raised when a file cannot be stored as a receipt"""
+
+
+def file_digest(path):
+    """(SHA-256 hex digest, size in bytes) of a file, read in chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+def make_thumbnail(source):
+    """(JPEG thumbnail bytes, format, width, height) of an image file or file object"""
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(source) as image:
+            image_format, (width, height) = image.format, image.size
+            # JPEGs are decoded at a reduced scale, not in full and then shrunk
+            image.draft('RGB', THUMBNAIL_SIZE)
+            image.thumbnail(THUMBNAIL_SIZE)
+            buffer = io.BytesIO()
+            image.convert('RGB').save(buffer, 'JPEG', quality=80)
+    except (UnidentifiedImageError, OSError, ValueError):
+        raise ReceiptError("Receipts must be image files")
+    return buffer.getvalue(), image_format, width, height
+
+def store(connection, path):
+    """Store an image file unless the same bytes are already stored
+
+    Returns (receipt id, True if it was newly stored).
+    """
+    sha256, size = file_digest(path)
+    if size > MAX_SIZE:
+        raise ReceiptError(f"Receipts can be at most {MAX_SIZE // 2**20} MB")
+    row = connection.execute("SELECT id FROM receipts WHERE sha256 = ?", (sha256,)).fetchone()
+    if row:
+        return row[0], False
+
+    thumbnail, image_format, width, height = make_thumbnail(path)
+    receipt_id = connection.execute("""
+        INSERT INTO receipts (sha256, format, width, height, size, thumbnail, image)
+        VALUES (?, ?, ?, ?, ?, ?, zeroblob(?))
+    """, (sha256, image_format, width, height, size, thumbnail, size)).lastrowid
+    with open(path, 'rb') as f:
+        if hasattr(connection, 'blobopen'):
+            with connection.blobopen('receipts', 'image', receipt_id) as blob:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    blob.write(chunk)
+        else:
+            # Python before 3.11 has no incremental BLOB I/O
+            connection.execute("UPDATE receipts SET image = ? WHERE id = ?", (f.read(), receipt_id))
+    return receipt_id, True
+
+def describe(connection, receipt_id):
+    """{'id', 'sha256', 'format', 'width', 'height', 'size'} without reading the image"""
+    row = connection.execute("""
+        SELECT id, sha256, format, width, height, size
+        FROM receipts
+        WHERE id = ?
+    """, (receipt_id,)).fetchone()
+    return dict(zip(('id', 'sha256', 'format', 'width', 'height', 'size'), row)) if row else None
+
+def iter_chunks(connection, receipt_id):
+    """Yield the original image in CHUNK_SIZE pieces"""
+    if not hasattr(connection, 'blobopen'):
+        yield connection.execute("SELECT image FROM receipts WHERE id = ?", (receipt_id,)).fetchone()[0]
+        return
+    with connection.blobopen('receipts', 'image', receipt_id, readonly=True) as blob:
+        for chunk in iter(lambda: blob.read(CHUNK_SIZE), b''):
+            yield chunk
+
+def read(connection, receipt_id):
+    """The original image bytes"""
+    return b''.join(iter_chunks(connection, receipt_id))
+
+def thumbnail(connection, receipt_id):
+    """The thumbnail JPEG bytes, made and stored now if the receipt has none"""
+    stored = connection.execute(
+        "SELECT thumbnail FROM receipts WHERE id = ?", (receipt_id,)
+    ).fetchone()[0]
+    if stored is None:
+        # Receipts moved out of expenses.receipt_image by the migration
+        stored, image_format, width, height = make_thumbnail(io.BytesIO(read(connection, receipt_id)))
+        connection.execute("""
+            UPDATE receipts SET thumbnail = ?, format = ?, width = ?, height = ? WHERE id = ?
+        """, (stored, image_format, width, height, receipt_id))
+    return stored
+
+def prune(connection):
+    """Delete receipts no expense or undoable delete refers to; returns how many"""
+    return connection.execute("""
+        DELETE FROM receipts
+        WHERE NOT EXISTS (SELECT 1 FROM expenses WHERE receipt_id = receipts.id)
+          AND NOT EXISTS (SELECT 1 FROM deleted_expenses WHERE receipt_id = receipts.id)
+    """).rowcount
+
+if __name__ == "__main__":
+    from db_config import DB_PATH, ensure_database
+
+    parser = argparse.ArgumentParser(description="Show or tidy the receipt store")
+    parser.add_argument('--prune', action='store_true', help="delete receipts nothing refers to")
+    parser.add_argument('--db', default=DB_PATH, help="database file")
+    args = parser.parse_args()
+
+    ensure_database(args.db)
+    connection = sqlite3.connect(args.db)
+    try:
+        if args.prune:
+            with connection:
+                print(f"Deleted {prune(connection)} unused receipts")
+        count, size = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM receipts"
+        ).fetchone()
+        print(f"{count} receipts, {size / 2**20:.1f} MiB")
+    finally:
+        connection.close()
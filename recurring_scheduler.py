@@ -0,0 +1,142 @@
+"""Turn due recurring expenses into expenses.
+
+Occurrence k of a schedule falls on a date computed in SQL from its
+start_date: k weeks later for Weekly, or k months (12k for Yearly) later on
+the same day of the month, clamped to the last day of shorter months. So a
+schedule started on Jan 31 falls on Feb 28 (or 29), Mar 31, Apr 30, ...
+
+catch_up() generates every due occurrence for every user with one recursive
+query and writes them and the advanced schedules in a single transaction.
+Each schedule's occurrence counter moves in the same transaction as its
+expenses, and a unique index on (recurring_id, day) rejects repeats, so
+running it again, or after a crash, never adds an expense twice.
+
+Usage: python recurring_scheduler.py [--today YYYY-MM-DD] [--db PATH]
+"""
+import argparse
+import sqlite3
+import time
+from datetime import date
+
+import storage
+
+def occurrence_sql(start, frequency, k):
+    """SQL expression for the date of occurrence k of a schedule
+
+    start, frequency and k are SQL expressions (column names or parameters).
+    """
+    months = f"(CASE {frequency} WHEN 'Yearly' THEN 12 ELSE 1 END * ({k}))"
+    return f"""(CASE {frequency}
+        WHEN 'Weekly' THEN date({start}, '+' || (7 * ({k})) || ' days')
+        ELSE min(
+            date({start}, 'start of month', '+' || {months} || ' months',
+                 '+' || (CAST(strftime('%d', {start}) AS INTEGER) - 1) || ' days'),
+            date({start}, 'start of month', '+' || ({months} + 1) || ' months', '-1 day')
+        )
+    END)"""
+
+def occurrence_date(connection, start_date, frequency, k):
+    """Date of occurrence k of a schedule starting on start_date"""
+    return connection.execute(
+        f"SELECT {occurrence_sql(':start', ':frequency', ':k')}",
+        {'start': start_date, 'frequency': frequency, 'k': k}
+    ).fetchone()[0]
+
+def catch_up(connection, today=None):
+    """Create every expense due on or before today; returns a summary dict
+
+    The summary has the number of schedules advanced, expenses inserted and
+    the usernames whose expenses changed.
+    """
+    today = today or date.today().isoformat()
+    started = time.perf_counter()
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS recurring_due (
+                id INTEGER, k INTEGER, occurs TEXT
+            )
+        """)
+        connection.execute("CREATE INDEX IF NOT EXISTS temp.idx_recurring_due ON recurring_due (id, k)")
+        connection.execute("DELETE FROM recurring_due")
+        # Seed each due schedule with its pending occurrence, then step k
+        # forward until the next date would be after today. Schedules of a
+        # username with no users row are left due, so nothing is advanced
+        # past expenses that could not be inserted.
+        next_occurrence = occurrence_sql('start_date', 'frequency', 'k + 1')
+        connection.execute(f"""
+            INSERT INTO recurring_due (id, k, occurs)
+            WITH RECURSIVE due (id, start_date, frequency, k, occurs) AS (
+                SELECT id, start_date, frequency, occurrences,
+                       {occurrence_sql('start_date', 'frequency', 'occurrences')}
+                FROM recurring_expenses
+                WHERE next_date <= :today AND start_date IS NOT NULL
+                  AND username IN (SELECT username FROM users)
+                UNION ALL
+                SELECT id, start_date, frequency, k + 1, {next_occurrence}
+                FROM due
+                WHERE {next_occurrence} <= :today
+            )
+            SELECT id, k, occurs FROM due WHERE occurs <= :today
+        """, {'today': today})
+
+        connection.execute("""
+            INSERT OR IGNORE INTO categories (name)
+            SELECT DISTINCT COALESCE(r.category, 'Other')
+            FROM recurring_due d
+            JOIN recurring_expenses r ON r.id = d.id
+        """)
+        inserted = connection.execute(f"""
+            INSERT OR IGNORE INTO expenses (user_id, day, category_id, amount_paise, description, recurring_id)
+            SELECT u.id, {storage.day_sql('d.occurs')}, c.id, CAST(round(r.amount * 100) AS INTEGER),
+                   r.description, r.id
+            FROM recurring_due d
+            JOIN recurring_expenses r ON r.id = d.id
+            JOIN users u ON u.username = r.username
+            JOIN categories c ON c.name = COALESCE(r.category, 'Other')
+        """).rowcount
+        usernames = [row[0] for row in connection.execute("""
+            SELECT DISTINCT r.username
+            FROM recurring_due d
+            JOIN recurring_expenses r ON r.id = d.id
+        """)]
+
+        schedules = connection.execute("""
+            UPDATE recurring_expenses
+            SET occurrences = (SELECT MAX(k) + 1 FROM recurring_due WHERE recurring_due.id = recurring_expenses.id)
+            WHERE id IN (SELECT id FROM recurring_due)
+        """).rowcount
+        connection.execute(f"""
+            UPDATE recurring_expenses
+            SET next_date = {occurrence_sql('start_date', 'frequency', 'occurrences')}
+            WHERE id IN (SELECT id FROM recurring_due)
+        """)
+        connection.execute("DELETE FROM recurring_due")
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+
+    return {
+        'schedules': schedules,
+        'inserted': inserted,
+        'usernames': usernames,
+        'seconds': time.perf_counter() - started,
+    }
+
+if __name__ == "__main__":
+    from db_config import DB_PATH, ensure_database
+
+    parser = argparse.ArgumentParser(description="Create the recurring expenses that are due")
+    parser.add_argument('--today', help="treat this YYYY-MM-DD as today")
+    parser.add_argument('--db', default=DB_PATH, help="database file")
+    args = parser.parse_args()
+
+    ensure_database(args.db)
+    connection = sqlite3.connect(args.db)
+    try:
+        summary = catch_up(connection, args.today)
+    finally:
+        connection.close()
+    print(f"Advanced {summary['schedules']} schedules, added {summary['inserted']} expenses "
+          f"for {len(summary['usernames'])} users in {summary['seconds'] * 1000:.1f} ms")
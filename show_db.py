@@ -40,8 +40,13 @@ def display_table_contents():
             print("Columns:", " | ".join(column_names))
             print("-"*50)
             
-            # Get all rows
-            cursor.execute(f"SELECT * FROM {table_name};")
+            # Get all rows, with BLOBs (receipt images) shown by size only;
+            # length() of a BLOB does not read its content
+            selected = [
+                f"'<' || length({col[1]}) || ' bytes>'" if col[2].upper() == 'BLOB' else col[1]
+                for col in columns
+            ]
+            cursor.execute(f"SELECT {', '.join(selected)} FROM {table_name};")
             rows = cursor.fetchall()
             
             if not rows:
@@ -0,0 +1,362 @@
+"""Bulk import of bank statements (CSV or OFX) into expenses.
+
+Files are parsed as a stream and written in fixed-size batches with
+executemany into a staging table, all inside one transaction. At the end a
+single INSERT ... SELECT copies the rows into expenses, skipping rows that
+are already stored (same user, date, amount and description). Only money
+out is imported unless credits are asked for.
+
+Readers yield signed amounts with money out negative. OFX defines its
+signs, so positive amounts there are always credits. A CSV amount column
+has no fixed convention, so positives are taken as credits only if the file
+also has negative amounts. A column that is all positive, like the app's own
+CSV export, lists expenses.
+
+Usage: python statement_importer.py FILE --user USERNAME [--format csv|ofx] [--include-credits]
+"""
+import argparse
+import csv
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+from functools import lru_cache
+
+import storage
+
+BATCH_SIZE = 10000
+
+DEFAULT_CATEGORY = 'Other'
+
+# Header names recognised for each expense field, compared case-insensitively
+CSV_HEADERS = {
+    'date': ['date', 'transaction date', 'txn date', 'posting date', 'value date'],
+    'amount': ['amount', 'debit', 'withdrawal', 'withdrawal amount', 'debit amount'],
+    'description': ['description', 'narration', 'details', 'memo', 'payee', 'name'],
+    'category': ['category'],
+}
+
+# Amount headers whose values are money out written as positive numbers
+DEBIT_HEADERS = ['debit', 'withdrawal', 'withdrawal amount', 'debit amount']
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', '%d.%m.%Y', '%Y/%m/%d', '%Y%m%d')
+
+
+class StatementError(Exception):
+    """Raised when a statement cannot be understood"""
+
+
+@lru_cache(maxsize=8192)
+def parse_date(value, formats=DATE_FORMATS):
+    """Return an ISO date string, or None if the value matches no known format
+
+    Cached, because a statement repeats the same few thousand dates.
+    """
+    value = value.strip()
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+def parse_amount(value):
+    """Parse '1,234.50', '(12.00)' or '-12' into a float, or None"""
+    value = value.strip().replace(',', '').replace('₹', '').replace('$', '')
+    if not value:
+        return None
+    negative = value.startswith('(') and value.endswith(')')
+    try:
+        amount = float(value.strip('()'))
+    except ValueError:
+        return None
+    return -amount if negative else amount
+
+
+class _CountingReader:
+    """Iterate a text file while counting the characters read, for progress"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.position = 0
+
+    def __iter__(self):
+        for line in self.stream:
+            self.position += len(line)
+            yield line
+
+
+def resolve_columns(fieldnames, mapping=None):
+    """Map expense fields to CSV headers using explicit mapping, then known names"""
+    mapping = dict(mapping or {})
+    lowered = {name.strip().lower(): name for name in fieldnames if name}
+    for field, candidates in CSV_HEADERS.items():
+        if field in mapping:
+            if mapping[field] not in fieldnames:
+                raise StatementError(f"Column '{mapping[field]}' not found in file")
+            continue
+        for candidate in candidates:
+            if candidate in lowered:
+                mapping[field] = lowered[candidate]
+                break
+    for required in ('date', 'amount'):
+        if required not in mapping:
+            raise StatementError(f"Could not find a {required} column; map it explicitly")
+    return mapping
+
+def read_csv(stream, mapping=None):
+    """Yield (date, category, amount, description) rows from a CSV statement
+
+    A None in place of a row marks a line that was skipped. Amounts in a
+    debit column (see DEBIT_HEADERS) are negated, so money out is negative
+    there as it is in a signed column.
+    """
+    reader = csv.reader(stream)
+    header = next(reader, [])
+    columns = resolve_columns(header, mapping)
+    # Plain tuples by position are much cheaper than a dict per line
+    date_index = header.index(columns['date'])
+    amount_index = header.index(columns['amount'])
+    description_index = header.index(columns['description']) if 'description' in columns else None
+    category_index = header.index(columns['category']) if 'category' in columns else None
+    width = max(date_index, amount_index, description_index or 0, category_index or 0) + 1
+    sign = -1 if columns['amount'].strip().lower() in DEBIT_HEADERS else 1
+
+    for record in reader:
+        if len(record) < width:
+            yield None
+            continue
+        date = parse_date(record[date_index])
+        amount = parse_amount(record[amount_index])
+        if date is None or not amount:
+            yield None
+            continue
+        description = record[description_index].strip() if description_index is not None else ''
+        category = (record[category_index].strip() or None) if category_index is not None else None
+        yield (date, category, sign * amount, description)
+
+_OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+def read_ofx(stream):
+    """Yield rows from the <STMTTRN> blocks of an OFX 1.x (SGML) or 2.x (XML) file"""
+    transaction = None
+    buffer = ''
+    for line in stream:
+        buffer += line
+        # Keep the last, possibly unfinished, tag for the next line
+        cut = buffer.rfind('<')
+        if cut <= 0:
+            continue
+        text, buffer = buffer[:cut], buffer[cut:]
+        for closing, tag, value in _OFX_TAG.findall(text):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if not closing:
+                    transaction = {}
+                elif transaction is not None:
+                    yield _ofx_row(transaction)
+                    transaction = None
+            elif transaction is not None and not closing:
+                transaction[tag] = value.strip()
+    # A file that ends without a final tag
+    for closing, tag, value in _OFX_TAG.findall(buffer):
+        if tag.upper() == 'STMTTRN' and closing and transaction is not None:
+            yield _ofx_row(transaction)
+
+def _ofx_row(transaction):
+    """Turn one parsed <STMTTRN> into a row, or None to skip it"""
+    date = parse_date(transaction.get('DTPOSTED', '')[:8], ('%Y%m%d',))
+    amount = parse_amount(transaction.get('TRNAMT', ''))
+    if date is None or not amount:
+        return None
+    description = transaction.get('NAME') or transaction.get('MEMO') or ''
+    return (date, None, amount, description)
+
+def _flush(connection, batch):
+    """Write a batch of rows to the staging table and empty it"""
+    if batch:
+        connection.executemany(f"""
+            INSERT INTO import_staging (day, category, amount_paise, description)
+            VALUES ({storage.day_sql('?')}, ?, CAST(round(? * 100) AS INTEGER), ?)
+        """, batch)
+        batch.clear()
+
+def detect_format(path):
+    """Guess csv or ofx from the extension, then from the first bytes"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.ofx', '.qfx'):
+        return 'ofx'
+    if extension == '.csv':
+        return 'csv'
+    with open(path, encoding='utf-8', errors='replace') as f:
+        head = f.read(512).upper()
+    return 'ofx' if 'OFXHEADER' in head or '<OFX>' in head else 'csv'
+
+def import_statement(connection, path, username, file_format=None, mapping=None,
+                     debits_only=True, categorize=None, batch_size=BATCH_SIZE,
+                     progress=None):
+    """Import a statement file for username and return a summary dict
+
+    Credits (money in, see above) are skipped unless debits_only is False.
+    categorize(description) may return a category for rows that have none.
+    progress(fraction, message) is called after every batch.
+    """
+    file_format = file_format or detect_format(path)
+    user_id = storage.user_id(connection, username)
+    if user_id is None:
+        raise StatementError(f"No such user: {username}")
+    total_size = os.path.getsize(path) or 1
+    started = time.perf_counter()
+    counts = {'read': 0, 'skipped': 0, 'credits': 0}
+
+    # Bulk-load settings for this transaction only
+    saved = {
+        pragma: connection.execute(f"PRAGMA {pragma}").fetchone()[0]
+        for pragma in ('synchronous', 'cache_size', 'temp_store')
+    }
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.execute("PRAGMA cache_size = -65536")
+    connection.execute("PRAGMA temp_store = MEMORY")
+
+    try:
+        with open(path, newline='', encoding='utf-8-sig', errors='replace') as f:
+            stream = _CountingReader(f)
+            if file_format == 'ofx':
+                rows = read_ofx(stream)
+            else:
+                rows = read_csv(stream, mapping)
+
+            connection.execute("BEGIN")
+            connection.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS import_staging (
+                    day INTEGER, category TEXT, amount_paise INTEGER, description TEXT
+                )
+            """)
+            connection.execute("DELETE FROM import_staging")
+
+            batch = []
+            for row in rows:
+                if row is None:
+                    counts['skipped'] += 1
+                    continue
+                counts['read'] += 1
+                date, category, amount, description = row
+                if category is None:
+                    category = (categorize(description) if categorize else None) or DEFAULT_CATEGORY
+                batch.append((date, category, amount, description))
+                if len(batch) >= batch_size:
+                    _flush(connection, batch)
+                    if progress:
+                        progress(min(stream.position / total_size, 1.0) * 0.9,
+                                 f"Read {counts['read']} rows")
+            _flush(connection, batch)
+
+        if debits_only:
+            has_debits = connection.execute(
+                "SELECT EXISTS (SELECT 1 FROM import_staging WHERE amount_paise < 0)"
+            ).fetchone()[0]
+            if file_format == 'ofx' or has_debits:
+                counts['credits'] = connection.execute(
+                    "DELETE FROM import_staging WHERE amount_paise > 0"
+                ).rowcount
+        # Money out is stored as a positive amount
+        connection.execute("UPDATE import_staging SET amount_paise = -amount_paise WHERE amount_paise < 0")
+
+        if progress:
+            progress(0.9, "Skipping duplicates")
+        connection.execute("""
+            INSERT OR IGNORE INTO categories (name)
+            SELECT DISTINCT category FROM import_staging
+        """)
+        # Rows are matched by occurrence: the nth repeat of a date, amount and
+        # description in the file is skipped only if the user already has n
+        # such expenses, so real repeats (two coffees on one day) are kept and
+        # a re-import adds nothing. The stored counts are grouped once over
+        # the user's rows in the statement's date range.
+        cursor = connection.execute("""
+            INSERT INTO expenses (user_id, day, category_id, amount_paise, description)
+            WITH staged AS (
+                SELECT day, category, amount_paise, description,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY day, amount_paise, COALESCE(description, '') ORDER BY rowid
+                       ) AS occurrence
+                FROM import_staging
+            ),
+            stored AS (
+                SELECT day, amount_paise, COALESCE(description, '') AS description, COUNT(*) AS count
+                FROM expenses
+                WHERE user_id = :user_id
+                  AND day BETWEEN (SELECT MIN(day) FROM import_staging)
+                              AND (SELECT MAX(day) FROM import_staging)
+                GROUP BY day, amount_paise, COALESCE(description, '')
+            )
+            SELECT :user_id, s.day, c.id, s.amount_paise, s.description
+            FROM staged s
+            JOIN categories c ON c.name = s.category
+            LEFT JOIN stored e
+              ON e.day = s.day AND e.amount_paise = s.amount_paise
+             AND e.description = COALESCE(s.description, '')
+            WHERE s.occurrence > COALESCE(e.count, 0)
+        """, {'user_id': user_id})
+        # rowcount excludes rows written by the summary-table triggers
+        inserted = cursor.rowcount
+        connection.execute("DELETE FROM import_staging")
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        for pragma, value in saved.items():
+            connection.execute(f"PRAGMA {pragma} = {value}")
+
+    seconds = time.perf_counter() - started
+    return {
+        'read': counts['read'],
+        'inserted': inserted,
+        'duplicates': counts['read'] - counts['credits'] - inserted,
+        'credits': counts['credits'],
+        'skipped': counts['skipped'],
+        'seconds': seconds,
+        'rows_per_sec': counts['read'] / seconds if seconds else 0.0,
+    }
+
+if __name__ == "__main__":
+    from db_config import DB_PATH, ensure_database
+
+    parser = argparse.ArgumentParser(description="Import a CSV or OFX bank statement")
+    parser.add_argument('file', help="statement file")
+    parser.add_argument('--user', required=True, help="username to import for")
+    parser.add_argument('--format', choices=['csv', 'ofx'], help="default: detect from the file")
+    parser.add_argument('--map', action='append', default=[], metavar='FIELD=COLUMN',
+                        help="CSV column for date, amount, description or category")
+    parser.add_argument('--include-credits', action='store_true',
+                        help="also import money in, such as salary and refunds")
+    parser.add_argument('--categorize', action='store_true',
+                        help="suggest categories for rows without one from the user's history")
+    parser.add_argument('--db', default=DB_PATH, help="database file")
+    args = parser.parse_args()
+
+    mapping = dict(item.split('=', 1) for item in args.map)
+
+    ensure_database(args.db)
+    connection = sqlite3.connect(args.db)
+    try:
+        categorize = None
+        if args.categorize:
+            from categorizer import build_index
+            categorize = build_index(connection, args.user).categorize
+        summary = import_statement(
+            connection, args.file, args.user,
+            file_format=args.format, mapping=mapping, debits_only=not args.include_credits,
+            categorize=categorize
+        )
+    except StatementError as e:
+        parser.error(str(e))
+    finally:
+        connection.close()
+
+    print(f"Read {summary['read']} rows, imported {summary['inserted']}, "
+          f"skipped {summary['duplicates']} duplicates, {summary['credits']} credits "
+          f"and {summary['skipped']} unusable lines "
+          f"in {summary['seconds']:.2f}s ({summary['rows_per_sec']:.0f} rows/sec)")
@@ -0,0 +1,58 @@
+"""Storage format v2: how expenses are encoded on disk.
+
+An expenses row holds integers in every column that is filtered, grouped or
+summed: user_id points at users.id, category_id at categories.id, day counts
+days since 1970-01-01 and amount_paise is the amount in paise. Rows are
+smaller than with repeated username, category and date strings, GROUP BY
+compares integers, and sums of paise are exact.
+
+The rest of the app still speaks YYYY-MM-DD dates, category names and
+rupee amounts; the helpers and SQL fragments here convert between the two.
+"""
+from datetime import date
+
+# julianday() of 1970-01-01, which is day 0
+EPOCH_JULIAN_DAY = 2440587.5
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# An expense as (id, date, category, amount, description), selected from EXPENSE_TABLES
+EXPENSE_COLUMNS = "e.id, date(e.day + 2440587.5), c.name, e.amount_paise / 100.0, e.description"
+EXPENSE_TABLES = "expenses e LEFT JOIN categories c ON c.id = e.category_id"
+
+# Id lookups by name; SQLite runs each once per statement, so they still
+# constrain an index like a plain parameter would
+USER_ID = "(SELECT id FROM users WHERE username = ?)"
+CATEGORY_ID = "(SELECT id FROM categories WHERE name = ?)"
+
+def day_sql(value):
+    """SQL for the day number of a YYYY-MM-DD expression, NULL if it is not a date"""
+    return f"CAST(julianday(date({value})) - 2440587.5 AS INTEGER)"
+
+def date_sql(day):
+    """SQL for the YYYY-MM-DD date of a day number expression"""
+    return f"date({day} + 2440587.5)"
+
+def day_number(iso_date):
+    """Days from 1970-01-01 to a YYYY-MM-DD date"""
+    return date.fromisoformat(iso_date).toordinal() - _EPOCH_ORDINAL
+
+def iso_date(day):
+    """YYYY-MM-DD for a day number"""
+    return date.fromordinal(day + _EPOCH_ORDINAL).isoformat()
+
+def to_paise(amount):
+    """An amount in rupees as whole paise"""
+    return int(round(float(amount) * 100))
+
+def user_id(connection, username):
+    """The user's id, or None if there is no such user"""
+    row = connection.execute("SELECT id FROM users WHERE username = ?", (username,)).fetchone()
+    return row[0] if row else None
+
+def category_id(connection, name):
+    """The category's id, adding it to categories if it is new"""
+    row = connection.execute("SELECT id FROM categories WHERE name = ?", (name,)).fetchone()
+    if row:
+        return row[0]
+    return connection.execute("INSERT INTO categories (name) VALUES (?)", (name,)).lastrowid
@@ -0,0 +1,155 @@
+"""Run database, chart and export work off the Tk main loop.
+
+Work runs on a thread pool. Results, errors and progress updates are queued
+and delivered back on the Tk thread by polling with root.after, because Tk
+widgets must only be touched from the thread that created them.
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+import query_profiler
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task that noticed it was cancelled"""
+
+
+class Task:
+    """Handle passed to background work for progress reporting and cancellation"""
+
+    def __init__(self, executor, group, screen=None):
+        self._executor = executor
+        self.group = group
+        self.screen = screen
+        self._cancelled = threading.Event()
+        self.future = None
+        self.on_done = None
+        self.on_error = None
+        self.on_progress = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Drop the task's callbacks and stop it if it has not started"""
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+        # A cancelled task may never queue an outcome, so stop waiting for it
+        self._executor._forget(self)
+
+    def check_cancelled(self):
+        """Raise TaskCancelled if the task was cancelled; call between work steps"""
+        if self.cancelled:
+            raise TaskCancelled()
+
+    def report(self, fraction, message=""):
+        """Send a progress update (0.0 to 1.0) to the Tk thread"""
+        self._executor._results.put((self, 'progress', (fraction, message)))
+
+
+class TaskExecutor:
+    """Thread pool whose callbacks always run on the Tk main loop"""
+
+    def __init__(self, root, max_workers=2, poll_interval=50):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="expense-task")
+        self._results = queue.Queue()
+        self._tasks = set()
+        self._lock = threading.Lock()
+        self._poll_id = None
+
+    def submit(self, func, *args, on_done=None, on_error=None, on_progress=None, group=None,
+               screen=None):
+        """Run func(task, *args) in the background and return its Task
+
+        on_done(result), on_error(exception) and on_progress(fraction, message)
+        are called on the Tk thread unless the task has been cancelled. With a
+        screen name the task's time and SQL count towards that screen in
+        query_profiler.
+        """
+        task = Task(self, group, screen)
+        task.on_done = on_done
+        task.on_error = on_error
+        task.on_progress = on_progress
+        with self._lock:
+            self._tasks.add(task)
+        task.future = self._pool.submit(self._run, task, func, args)
+        self._schedule_poll()
+        return task
+
+    def _run(self, task, func, args):
+        """Worker side: run the function and queue its outcome"""
+        if task.cancelled:
+            return
+        try:
+            with query_profiler.screen(task.screen) if task.screen else nullcontext():
+                result = func(task, *args)
+        except TaskCancelled:
+            return
+        except Exception as e:
+            self._results.put((task, 'error', e))
+        else:
+            self._results.put((task, 'done', result))
+
+    def _forget(self, task):
+        """Stop polling on behalf of a task"""
+        with self._lock:
+            self._tasks.discard(task)
+
+    def _schedule_poll(self):
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        """Tk side: deliver queued outcomes to their callbacks"""
+        self._poll_id = None
+        while True:
+            try:
+                task, kind, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if kind != 'progress':
+                with self._lock:
+                    self._tasks.discard(task)
+            if task.cancelled:
+                continue
+            if kind == 'done' and task.on_done:
+                task.on_done(payload)
+            elif kind == 'error' and task.on_error:
+                task.on_error(payload)
+            elif kind == 'progress' and task.on_progress:
+                task.on_progress(*payload)
+
+        with self._lock:
+            pending = bool(self._tasks)
+        if pending:
+            self._schedule_poll()
+
+    def cancel_group(self, group):
+        """Cancel every outstanding task submitted with this group"""
+        with self._lock:
+            tasks = [task for task in self._tasks if task.group == group]
+            self._tasks.difference_update(tasks)
+        for task in tasks:
+            task.cancel()
+
+    def cancel_all(self):
+        """Cancel every outstanding task"""
+        with self._lock:
+            tasks = list(self._tasks)
+            self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+
+    def shutdown(self):
+        """Cancel outstanding work and stop the worker threads"""
+        self.cancel_all()
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        self._pool.shutdown(wait=False, cancel_futures=True)